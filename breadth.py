@@ -0,0 +1,270 @@
+"""
+Market Breadth Module
+- Matriks close (symbol x candle) semua pair USDT likuid, dihitung vectorized (numpy)
+- % pair di atas MA20 / MA50, advance/decline, korelasi rolling tiap pair terhadap BTC
+- Incremental: history candle di-bootstrap sekali per symbol, tiap candle close cukup geser 1 kolom
+  (close candle diambil dari snapshot ticker, tanpa fetch kline ratusan symbol)
+"""
+
+import os
+import threading
+import time
+import numpy as np
+from candles import TS, CLOSE, timeframe_to_ms, to_array
+from swings import scan_fib_zones
+
+BREADTH_TIMEFRAME = os.getenv('BREADTH_TIMEFRAME', '1h')
+BREADTH_WINDOW = 60          # kolom candle tertutup yang disimpan (>= MA50 + 1)
+CORRELATION_WINDOW = 48      # return untuk korelasi rolling vs BTC
+FIB_ZONE_TOP = 8             # symbol di scanner zona Fib
+BREADTH_MIN_VOLUME = float(os.getenv('BREADTH_MIN_VOLUME', '1000000'))  # quoteVolume 24h minimal (USDT)
+BTC_SYMBOL = 'BTC/USDT'
+# Stablecoin / fiat: tidak ikut breadth (harga ~1, merusak statistik)
+EXCLUDED_BASES = {'USDC', 'FDUSD', 'TUSD', 'USDP', 'DAI', 'BUSD', 'EUR', 'AEUR', 'USDE'}
+
+
+def liquid_universe(snapshot, min_volume=BREADTH_MIN_VOLUME):
+    """Pair spot USDT likuid dari snapshot ticker (urut volume terbesar)"""
+    pairs = [
+        (symbol, t['quoteVolume']) for symbol, t in snapshot.items()
+        if symbol.endswith('/USDT') and symbol.split('/')[0] not in EXCLUDED_BASES
+        and t.get('quoteVolume') and t['quoteVolume'] >= min_volume and t.get('last')
+    ]
+    pairs.sort(key=lambda x: x[1], reverse=True)
+    return [symbol for symbol, _ in pairs]
+
+
+class BreadthEngine:
+    """
+    closes[i, j]: close candle tertutup ke-j (kolom terakhir = candle close terbaru) symbol ke-i.
+    NaN = belum ada data (symbol baru / belum di-bootstrap)
+    """
+
+    def __init__(self, timeframe=BREADTH_TIMEFRAME, window=BREADTH_WINDOW):
+        self.timeframe = timeframe
+        self.tf_ms = timeframe_to_ms(timeframe)
+        self.window = window
+        self.symbols = []
+        self.index = {}
+        self.closes = np.full((0, window), np.nan)
+        self.bootstrapped = set()
+        # Open time candle tertutup terakhir (kolom terakhir)
+        self.last_open = self._last_closed_open()
+        self.latest = None
+        self.lock = threading.Lock()
+
+    def _last_closed_open(self, now=None):
+        now_ms = int((now if now is not None else time.time()) * 1000)
+        return (now_ms // self.tf_ms - 1) * self.tf_ms
+
+    def set_universe(self, symbols):
+        """Tambah symbol baru (baris NaN); symbol yang hilang dari universe dibuang"""
+        with self.lock:
+            keep = [s for s in self.symbols if s in set(symbols)]
+            added = [s for s in symbols if s not in self.index]
+            rows = self.closes[[self.index[s] for s in keep]] if keep else np.empty((0, self.window))
+            self.closes = np.vstack([rows, np.full((len(added), self.window), np.nan)])
+            self.symbols = keep + added
+            self.index = {s: i for i, s in enumerate(self.symbols)}
+            self.bootstrapped &= set(self.symbols)
+
+    def pending_bootstrap(self):
+        """Symbol yang history candle-nya belum diisi (BTC dulu)"""
+        pending = [s for s in self.symbols if s not in self.bootstrapped]
+        pending.sort(key=lambda s: s != BTC_SYMBOL)
+        return pending
+
+    def bootstrap(self, symbol, ohlcv):
+        """Isi history 1 symbol dari kline (hanya candle tertutup, disejajarkan ke kolom)"""
+        data = to_array(ohlcv)
+        with self.lock:
+            row = self.index.get(symbol)
+            if row is None:
+                return
+            if len(data):
+                cols = (data[:, TS].astype(np.int64) - self.last_open) // self.tf_ms + self.window - 1
+                valid = (cols >= 0) & (cols < self.window)
+                self.closes[row, cols[valid]] = data[valid, CLOSE]
+            self.bootstrapped.add(symbol)
+
+    def roll(self, snapshot, now=None):
+        """
+        Candle baru close: geser matriks & isi kolom terakhir dengan harga snapshot.
+        Return jumlah kolom yang digeser (0 kalau belum ada candle close baru)
+        """
+        last_open = self._last_closed_open(now)
+        with self.lock:
+            shift = int((last_open - self.last_open) // self.tf_ms)
+            if shift <= 0:
+                return 0
+            shift = min(shift, self.window)
+            previous = self.closes[:, -1].copy()
+            self.closes = np.roll(self.closes, -shift, axis=1)
+            self.closes[:, -shift:] = np.nan
+            if shift > 1:
+                # Interval terlewat (restart / roll telat): kolom celah diisi close terakhir (forward-fill)
+                # supaya symbol tidak hilang dari metrik, lalu semua symbol di-bootstrap ulang dari kline
+                if shift < self.window:
+                    self.closes[:, -shift:-1] = previous[:, None]
+                self.bootstrapped.clear()
+            self.closes[:, -1] = [snapshot.get(s, {}).get('last') or np.nan for s in self.symbols]
+            self.last_open = last_open
+            return shift
+
+    def compute(self, snapshot):
+        """Hitung semua metrik breadth (vectorized). Hasil disimpan di self.latest"""
+        started = time.perf_counter()
+        with self.lock:
+            closes = self.closes.copy()
+            symbols = list(self.symbols)
+            btc_row = self.index.get(BTC_SYMBOL)
+
+        price = np.array([snapshot.get(s, {}).get('last') or np.nan for s in symbols], dtype=float)
+        change = np.array([snapshot.get(s, {}).get('percentage') for s in symbols], dtype=float)
+
+        # % di atas MA (hanya symbol dengan history lengkap)
+        def above(period):
+            ma = closes[:, -period:].mean(axis=1)
+            valid = ~np.isnan(ma) & ~np.isnan(price)
+            return float((price[valid] > ma[valid]).mean() * 100) if valid.any() else None, int(valid.sum())
+
+        above_ma20, n20 = above(20)
+        above_ma50, n50 = above(50)
+
+        # Advance / decline dari perubahan 24h
+        advancers = int(np.nansum(change > 0))
+        decliners = int(np.nansum(change < 0))
+        ad_ratio = advancers / decliners if decliners else None
+
+        # Korelasi rolling log-return vs BTC (1 operasi matriks untuk semua symbol)
+        correlation = {}
+        corr_median = None
+        if btc_row is not None:
+            returns = np.diff(np.log(closes[:, -(CORRELATION_WINDOW + 1):]), axis=1)
+            valid = ~np.isnan(returns).any(axis=1)
+            if valid[btc_row]:
+                centered = returns[valid] - returns[valid].mean(axis=1, keepdims=True)
+                btc = centered[int(valid[:btc_row].sum())]
+                norms = np.linalg.norm(centered, axis=1) * np.linalg.norm(btc)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    corr = centered @ btc / norms
+                valid_symbols = [s for s, v in zip(symbols, valid) if v]
+                correlation = {s: round(float(c), 3) for s, c in zip(valid_symbols, corr) if np.isfinite(c)}
+                others = [c for s, c in correlation.items() if s != BTC_SYMBOL]
+                corr_median = float(np.median(others)) if others else None
+
+        decorrelated = sorted((c, s) for s, c in correlation.items() if s != BTC_SYMBOL)[:5]
+
+        # Scanner Fib: harga di zona 0.5-0.618 swing terakhir (pivot semua symbol dalam 1 batch)
+        complete = ~np.isnan(closes).any(axis=1) & ~np.isnan(price)
+        fib_zones = scan_fib_zones(
+            [s for s, ok in zip(symbols, complete) if ok], closes[complete], price[complete], keys=('0.500', '0.618')
+        )[:FIB_ZONE_TOP] if complete.any() else []
+        self.latest = {
+            'timeframe': self.timeframe,
+            'updated_at': time.time(),
+            'symbols': len(symbols),
+            'above_ma20': above_ma20, 'ma20_count': n20,
+            'above_ma50': above_ma50, 'ma50_count': n50,
+            'advancers': advancers, 'decliners': decliners, 'ad_ratio': ad_ratio,
+            'btc_corr_median': corr_median,
+            'btc_corr_high': (sum(1 for s, c in correlation.items() if c >= 0.7 and s != BTC_SYMBOL)
+                              / max(1, len(correlation) - 1) * 100) if correlation else None,
+            'decorrelated': [(s, c) for c, s in decorrelated],
+            'correlation': correlation,
+            'fib_zones': fib_zones,
+            'compute_ms': (time.perf_counter() - started) * 1000,
+        }
+        return self.latest
+
+
+# ========== FORMAT ==========
+def _pct(value):
+    return f"{value:.0f}%" if value is not None else "-"
+
+
+def breadth_bias(metrics):
+    """Bias market dari breadth: RISK-ON / RISK-OFF / NETRAL"""
+    score = 0
+    if metrics.get('above_ma20') is not None:
+        score += 1 if metrics['above_ma20'] >= 60 else -1 if metrics['above_ma20'] <= 40 else 0
+    if metrics.get('ad_ratio') is not None:
+        score += 1 if metrics['ad_ratio'] >= 1.5 else -1 if metrics['ad_ratio'] <= 0.67 else 0
+    return 'RISK-ON' if score > 0 else 'RISK-OFF' if score < 0 else 'NETRAL'
+
+
+def format_breadth_for_prompt(metrics, symbol=None):
+    """1 baris ringkas untuk prompt AI"""
+    if not metrics:
+        return None
+    parts = [
+        f">MA20={_pct(metrics['above_ma20'])}",
+        f">MA50={_pct(metrics['above_ma50'])}",
+        f"AD={metrics['ad_ratio']:.2f}" if metrics['ad_ratio'] is not None else "AD=-",
+        f"BIAS={breadth_bias(metrics)}",
+    ]
+    if symbol:
+        base = symbol.split(':')[0]
+        corr = metrics['correlation'].get(base)
+        if corr is not None and base != BTC_SYMBOL:
+            parts.append(f"CORR_BTC={corr:.2f}")
+    return "|".join(parts)
+
+
+def format_breadth_for_telegram(metrics):
+    """Pesan /market"""
+    if not metrics:
+        return "🌐 *MARKET BREADTH*\n⏳ Data breadth belum siap, coba lagi sebentar."
+
+    age = max(0, time.time() - metrics['updated_at'])
+    ad = f"{metrics['ad_ratio']:.2f}" if metrics['ad_ratio'] is not None else "-"
+    corr = f"{metrics['btc_corr_median']:.2f}" if metrics['btc_corr_median'] is not None else "-"
+    msg = (
+        f"🌐 *MARKET BREADTH* ({metrics['symbols']} pair USDT, {metrics['timeframe']})\n"
+        f"━━━━━━━━━━━━━━━━━━\n"
+        f"🧭 Bias: *{breadth_bias(metrics)}*\n\n"
+        f"📈 Di atas MA20: {_pct(metrics['above_ma20'])} ({metrics['ma20_count']} pair)\n"
+        f"📈 Di atas MA50: {_pct(metrics['above_ma50'])} ({metrics['ma50_count']} pair)\n"
+        f"⚖️ Advance/Decline 24h: {metrics['advancers']}/{metrics['decliners']} (rasio {ad})\n\n"
+        f"🔗 Korelasi vs BTC (median): {corr}\n"
+        f"🔗 Korelasi tinggi (≥0.7): {_pct(metrics['btc_corr_high'])}\n"
+    )
+    if metrics['decorrelated']:
+        msg += "\n🧩 *Paling lepas dari BTC:*\n"
+        msg += "".join(f"• {s}: {c:+.2f}\n" for s, c in metrics['decorrelated'])
+    if metrics.get('fib_zones'):
+        msg += f"\n🎯 *Di zona Fib swing {metrics['timeframe']} terakhir:*\n"
+        msg += "".join(
+            f"• {s}: Fib {key} ({gap * 100:.2f}%) {'📈' if direction == 1 else '📉'}\n"
+            for s, key, gap, direction in metrics['fib_zones']
+        )
+    msg += f"\n🕐 Update {age:.0f} detik lalu"
+    return msg
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Benchmark breadth 400 symbol dengan data sintetis (faktor BTC + noise)"""
+    rng = np.random.default_rng(7)
+    engine = BreadthEngine()
+    n = 400
+    symbols = [BTC_SYMBOL] + [f"C{i}/USDT" for i in range(n - 1)]
+    engine.set_universe(symbols)
+
+    tf_ms = engine.tf_ms
+    times = engine.last_open - tf_ms * np.arange(BREADTH_WINDOW + 5)[::-1]
+    market = np.cumsum(rng.normal(0, 0.01, len(times)))
+    betas = np.r_[1.0, rng.uniform(-0.2, 1.5, n - 1)]
+    snapshot = {}
+    for symbol, beta in zip(symbols, betas):
+        close = 100 * np.exp(beta * market + np.cumsum(rng.normal(0, 0.006, len(times))))
+        engine.bootstrap(symbol, np.c_[times, close, close, close, close, np.ones(len(times))])
+        snapshot[symbol] = {'last': close[-1] * (1 + rng.normal(0, 0.01)), 'percentage': rng.normal(0, 3)}
+
+    started = time.perf_counter()
+    for _ in range(100):
+        metrics = engine.compute(snapshot)
+    print(f"🧪 Breadth {n} symbol: {(time.perf_counter() - started) * 10:.2f} ms / compute")
+    print(format_breadth_for_telegram(metrics))
+    print(format_breadth_for_prompt(metrics, 'C1/USDT:USDT'), f"(beta C1 {betas[2]:.2f})")
+
@@ -0,0 +1,142 @@
+"""
+Candle Store & Resampling Module
+- Simpan candle base (1m / 5m) per symbol, cukup 1 fetch per symbol
+- Resample ke timeframe lebih tinggi (15m, 1h, 4h) secara vectorized (numpy)
+- Support update candle parsial (candle terakhir yang belum close)
+"""
+
+import threading
+import numpy as np
+
+# ========== TIMEFRAME ==========
+TIMEFRAME_MS = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 60 * 60_000,
+    '2h': 2 * 60 * 60_000,
+    '4h': 4 * 60 * 60_000,
+    '1d': 24 * 60 * 60_000,
+}
+
+# Kolom candle: timestamp, open, high, low, close, volume (sama seperti ccxt)
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+
+
+def timeframe_to_ms(timeframe):
+    """Konversi timeframe ('5m', '1h', ...) ke milidetik"""
+    if timeframe not in TIMEFRAME_MS:
+        raise ValueError(f"Timeframe tidak didukung: {timeframe}")
+    return TIMEFRAME_MS[timeframe]
+
+
+def pick_base_timeframe(timeframes):
+    """Pilih timeframe base: yang terkecil, asal bisa membagi semua timeframe lain"""
+    base = min(timeframes, key=timeframe_to_ms)
+    base_ms = timeframe_to_ms(base)
+    for tf in timeframes:
+        if timeframe_to_ms(tf) % base_ms != 0:
+            raise ValueError(f"{tf} tidak bisa di-resample dari {base}")
+    return base
+
+
+def to_array(ohlcv):
+    """List OHLCV dari ccxt -> numpy array (n, 6) float"""
+    data = np.asarray(ohlcv, dtype=float)
+    if data.size == 0:
+        return np.empty((0, 6), dtype=float)
+    return data.reshape(-1, 6)
+
+
+# ========== RESAMPLING (VECTORIZED) ==========
+def resample_ohlcv(candles, timeframe, drop_incomplete_head=True):
+    """
+    Resample candle base ke timeframe lebih tinggi.
+    Candle terakhir boleh parsial (sama seperti candle berjalan dari exchange).
+    Candle pertama dibuang kalau data base mulai di tengah bucket.
+    """
+    data = to_array(candles)
+    if len(data) == 0:
+        return data
+
+    tf_ms = timeframe_to_ms(timeframe)
+    buckets = data[:, TS].astype(np.int64) // tf_ms
+
+    # Index awal & akhir tiap bucket
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(data)] - 1
+
+    out = np.empty((len(starts), 6), dtype=float)
+    out[:, TS] = buckets[starts] * tf_ms
+    out[:, OPEN] = data[starts, OPEN]
+    out[:, HIGH] = np.maximum.reduceat(data[:, HIGH], starts)
+    out[:, LOW] = np.minimum.reduceat(data[:, LOW], starts)
+    out[:, CLOSE] = data[ends, CLOSE]
+    out[:, VOLUME] = np.add.reduceat(data[:, VOLUME], starts)
+
+    if drop_incomplete_head and data[0, TS] != out[0, TS]:
+        out = out[1:]
+    return out
+
+
+def merge_candles(existing, new):
+    """Gabung candle baru ke buffer lama. Timestamp sama = replace (update parsial)"""
+    new = to_array(new)
+    if existing is None or len(existing) == 0:
+        return new
+    if len(new) == 0:
+        return existing
+
+    # Semua candle lama yang timestamp-nya >= candle baru pertama diganti
+    cut = np.searchsorted(existing[:, TS], new[0, TS], side='left')
+    return np.vstack([existing[:cut], new])
+
+
+# ========== CANDLE STORE ==========
+class CandleStore:
+    """Buffer candle base per (market_type, symbol, timeframe), thread-safe"""
+
+    def __init__(self, max_candles=1500):
+        self.max_candles = max_candles
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol, market_type, timeframe):
+        """Ambil buffer candle (numpy array) atau None"""
+        with self._lock:
+            return self._data.get((market_type, symbol, timeframe))
+
+    def set(self, symbol, market_type, timeframe, ohlcv):
+        """Ganti seluruh buffer candle"""
+        data = to_array(ohlcv)[-self.max_candles:]
+        with self._lock:
+            self._data[(market_type, symbol, timeframe)] = data
+        return data
+
+    def merge(self, symbol, market_type, timeframe, ohlcv):
+        """Gabung candle baru (hasil fetch incremental / stream) ke buffer"""
+        key = (market_type, symbol, timeframe)
+        with self._lock:
+            data = merge_candles(self._data.get(key), ohlcv)[-self.max_candles:]
+            self._data[key] = data
+        return data
+
+    def update(self, symbol, market_type, timeframe, candle):
+        """Update 1 candle (parsial atau candle baru)"""
+        return self.merge(symbol, market_type, timeframe, [candle])
+
+    def get_timeframe(self, symbol, market_type, base_timeframe, timeframe, limit=100):
+        """Ambil candle timeframe apapun dari buffer base (resample kalau perlu)"""
+        data = self.get(symbol, market_type, base_timeframe)
+        if data is None or len(data) == 0:
+            return None
+        if timeframe != base_timeframe:
+            data = resample_ohlcv(data, timeframe)
+        return data[-limit:]
+
+    def symbols(self):
+        """List (market_type, symbol, timeframe) yang ada di store"""
+        with self._lock:
+            return list(self._data.keys())
@@ -0,0 +1,182 @@
+"""
+Checkpoint Module
+- Snapshot state hangat ke 1 file biner lokal (npz terkompres, tanpa pickle): daftar pair, snapshot ticker,
+  breadth / tabel futures / tracker sinyal (key state backend), buffer candle, setting per user
+- Restore saat startup dengan cek umur: bot langsung cepat setelah restart, data di-refresh di background
+- Ditulis atomic (file tmp + rename), aman kalau proses mati di tengah tulis
+"""
+
+import io
+import json
+import os
+import time
+import numpy as np
+
+CHECKPOINT_PATH = os.getenv('CHECKPOINT_PATH', 'data/checkpoint.npz')   # kosong = nonaktif
+CHECKPOINT_INTERVAL = int(os.getenv('CHECKPOINT_INTERVAL', '60'))       # detik antar snapshot
+CHECKPOINT_MAX_AGE = int(os.getenv('CHECKPOINT_MAX_AGE', '21600'))      # file lebih tua: cache dibuang (6 jam)
+CHECKPOINT_STALE_LIMIT = 300   # entry cache yang TTL-nya sudah habis < 5 menit masih dipakai sementara
+CHECKPOINT_GRACE_TTL = 15      # TTL entry basi hasil restore (cukup untuk request pertama, lalu refresh)
+CHECKPOINT_VERSION = 1
+
+# Key state backend yang ikut di-checkpoint (cooldown, antrian & lease sengaja tidak)
+CHECKPOINT_STATE_KEYS = (
+    'pairs:spot', 'pairs:futures', 'tickers:spot', 'tickers:futures',
+    'breadth:latest', 'futures:table', 'futures:version', 'signals:tracker', 'signals:stats',
+)
+# Setting user yang disimpan (state percakapan seperti waiting_pair tidak)
+USER_SETTING_KEYS = ('profile', 'ai_narrative', 'chart_mode', 'market_type', 'last_analysis')
+
+
+# ========== SNAPSHOT ==========
+def user_settings(user_data):
+    """Copy setting semua user (panggil dari event loop, sebelum ditulis di thread)"""
+    settings = {}
+    for user_id, data in user_data.items():
+        row = {key: data[key] for key in USER_SETTING_KEYS if key in data}
+        if row:
+            settings[str(user_id)] = row
+    return settings
+
+
+def write_checkpoint(state, candle_store, settings, path=CHECKPOINT_PATH, state_keys=CHECKPOINT_STATE_KEYS):
+    """Tulis checkpoint. Return ukuran file (byte)"""
+    arrays = {}
+    meta = {'version': CHECKPOINT_VERSION, 'saved_at': time.time(), 'state': {}, 'candles': [], 'users': settings}
+
+    for key in state_keys:
+        value = state.get(key)
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.encode()
+        # TTL dicatat sebagai sisa detik saat disimpan (None = tanpa TTL)
+        meta['state'][key] = state.ttl(key)
+        arrays[f"state_{len(meta['state']) - 1}"] = np.frombuffer(value, dtype=np.uint8)
+
+    for market_type, symbol, timeframe in candle_store.symbols():
+        data = candle_store.get(symbol, market_type, timeframe)
+        if data is None or len(data) == 0:
+            continue
+        arrays[f"candles_{len(meta['candles'])}"] = data
+        meta['candles'].append([market_type, symbol, timeframe])
+
+    arrays['meta'] = np.frombuffer(json.dumps(meta, separators=(',', ':')).encode(), dtype=np.uint8)
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buf.getvalue())
+    os.replace(tmp_path, path)
+    return buf.tell()
+
+
+def read_checkpoint(path=CHECKPOINT_PATH):
+    """Baca checkpoint -> dict (meta + arrays) atau None kalau tidak ada / rusak / versi lain"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            meta = json.loads(npz['meta'].tobytes())
+            if meta.get('version') != CHECKPOINT_VERSION:
+                print(f"⚠️ Checkpoint versi {meta.get('version')} dilewati")
+                return None
+            meta['state'] = {key: (npz[f'state_{i}'].tobytes(), ttl) for i, (key, ttl) in enumerate(meta['state'].items())}
+            meta['candles'] = [(tuple(key), npz[f'candles_{i}']) for i, key in enumerate(meta['candles'])]
+            return meta
+    except Exception as e:
+        print(f"⚠️ Checkpoint {path} tidak bisa dibaca: {type(e).__name__}: {e}")
+        return None
+
+
+# ========== RESTORE ==========
+def restore_checkpoint(snapshot, state, candle_store, user_data=None, max_age=CHECKPOINT_MAX_AGE):
+    """
+    Isi ulang cache dari checkpoint. Data yang sudah ada (misal Redis bersama / worker lain) tidak ditimpa.
+    - Setting user selalu dipulihkan (tidak basi)
+    - Cache dibuang semua kalau checkpoint lebih tua dari max_age
+    - Entry state yang TTL-nya sudah lewat <= CHECKPOINT_STALE_LIMIT dipakai dengan TTL pendek
+    Return dict jumlah per kategori
+    """
+    counts = {'state': 0, 'candles': 0, 'users': 0, 'skipped': 0}
+    age = time.time() - snapshot['saved_at']
+
+    if user_data is not None:
+        for user_id, settings in snapshot['users'].items():
+            # user_data PTB: mapping read-only atas defaultdict -> lookup membuat dict user baru
+            data = user_data[int(user_id)]
+            for key, value in settings.items():
+                data.setdefault(key, value)
+            counts['users'] += 1
+
+    if age > max_age:
+        print(f"⚠️ Checkpoint {age / 3600:.1f} jam lalu, cache tidak dipakai")
+        counts['skipped'] = len(snapshot['state']) + len(snapshot['candles'])
+        return counts
+
+    for key, (value, ttl) in snapshot['state'].items():
+        if state.get(key) is not None:
+            counts['skipped'] += 1
+            continue
+        if ttl is not None:
+            left = ttl - age
+            if left < -CHECKPOINT_STALE_LIMIT:
+                counts['skipped'] += 1
+                continue
+            ttl = max(left, CHECKPOINT_GRACE_TTL)
+        state.set(key, value, ttl=ttl)
+        counts['state'] += 1
+
+    for (market_type, symbol, timeframe), data in snapshot['candles']:
+        # Buffer lama tetap berguna: fetch berikutnya cukup incremental (atau jadi fallback saat Binance down)
+        if candle_store.get(symbol, market_type, timeframe) is not None:
+            counts['skipped'] += 1
+            continue
+        candle_store.set(symbol, market_type, timeframe, data)
+        counts['candles'] += 1
+    return counts
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test siklus snapshot -> restore ke state & candle store baru + cek umur"""
+    import tempfile
+    from collections import defaultdict
+    from types import MappingProxyType
+    from candles import CandleStore
+    from shared_state import MemoryBackend, dumps_json
+
+    print("🧪 Testing Checkpoint Module\n")
+    print("=" * 60)
+    state = MemoryBackend()
+    state.set('pairs:spot', dumps_json([f"C{i}/USDT" for i in range(450)]), ttl=600)
+    state.set('tickers:spot', dumps_json({f"C{i}/USDT": {'last': 1.0 + i} for i in range(450)}), ttl=30)
+    state.set('signals:tracker', dumps_json({'open': [], 'stats': {}}))
+    store = CandleStore()
+    rng = np.random.default_rng(3)
+    for i in range(200):
+        closes = 100 + np.cumsum(rng.normal(0, 0.3, 1500))
+        store.set(f"C{i}/USDT", 'spot', '5m', np.c_[np.arange(1500) * 300_000, closes, closes, closes, closes, closes])
+    users = {7: {'profile': 'swing', 'chart_mode': 'lite', 'waiting_pair': True, 'last_analysis': ('BTC/USDT', 'spot')}}
+
+    path = os.path.join(tempfile.mkdtemp(), 'checkpoint.npz')
+    started = time.perf_counter()
+    size = write_checkpoint(state, store, user_settings(users), path)
+    print(f"Tulis: {size / 1024:.0f} KB dalam {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    started = time.perf_counter()
+    snapshot = read_checkpoint(path)
+    new_state, new_store = MemoryBackend(), CandleStore()
+    new_users = defaultdict(dict)
+    counts = restore_checkpoint(snapshot, new_state, new_store, MappingProxyType(new_users))
+    print(f"Restore: {counts} dalam {(time.perf_counter() - started) * 1000:.0f} ms")
+    print(f"User 7: {dict(new_users[7])}")
+    print(f"TTL tickers: {new_state.ttl('tickers:spot'):.0f}s | candle C5: {new_store.get('C5/USDT', 'spot', '5m').shape}")
+
+    snapshot['saved_at'] -= 120
+    print(f"Checkpoint 2 menit lalu: {restore_checkpoint(snapshot, MemoryBackend(), CandleStore())}")
+    snapshot['saved_at'] -= CHECKPOINT_MAX_AGE
+    print(f"Checkpoint basi: {restore_checkpoint(snapshot, MemoryBackend(), CandleStore())}")
+    print("\n✅ Test completed!")
@@ -0,0 +1,105 @@
+"""
+Telegram Delivery Module
+- Output analisa digabung jadi pesan sesedikit mungkin (foto + caption, 1 pesan gabungan)
+- Split hanya di batas panjang Telegram (4096 teks, 1024 caption), di batas paragraf
+- Flood control: AIORateLimiter (throttle global/grup + retry otomatis saat RetryAfter)
+"""
+
+import asyncio
+from telegram.error import BadRequest
+from telegram.ext import AIORateLimiter
+
+MAX_MESSAGE_LENGTH = 4096
+MAX_CAPTION_LENGTH = 1024
+RETRY_AFTER_MAX_RETRIES = 3
+
+
+def build_rate_limiter():
+    """Rate limiter bot: throttle sesuai limit Telegram + retry RetryAfter"""
+    return AIORateLimiter(max_retries=RETRY_AFTER_MAX_RETRIES)
+
+
+# ========== KOMPOSISI PESAN ==========
+def split_text(text, limit=MAX_MESSAGE_LENGTH):
+    """Pecah teks di batas paragraf -> baris -> hard cut, tiap potongan <= limit"""
+    chunks = []
+    current = ""
+    for block in text.split("\n\n"):
+        candidate = f"{current}\n\n{block}" if current else block
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        # Paragraf tunggal kepanjangan: pecah per baris, lalu hard cut
+        current = ""
+        for line in block.split("\n"):
+            candidate = f"{current}\n{line}" if current else line
+            if len(candidate) <= limit:
+                current = candidate
+                continue
+            if current:
+                chunks.append(current)
+            while len(line) > limit:
+                chunks.append(line[:limit])
+                line = line[limit:]
+            current = line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def compose_caption(header, extra):
+    """Caption foto = header + extra kalau muat 1024 karakter. Return (caption, sisa_untuk_pesan_teks)"""
+    combined = f"{header}\n\n{extra}"
+    if len(combined) <= MAX_CAPTION_LENGTH:
+        return combined, None
+    return header[:MAX_CAPTION_LENGTH], extra
+
+
+def join_sections(*sections):
+    """Gabung beberapa bagian teks (yang kosong dilewati) jadi 1 pesan"""
+    return "\n\n".join(section.strip() for section in sections if section and section.strip())
+
+
+# ========== KIRIM ==========
+async def _with_markdown_fallback(func, text_key, text, parse_mode, **kwargs):
+    """Kirim dengan Markdown; kalau entity rusak (biasanya output AI), kirim ulang sebagai teks polos"""
+    try:
+        return await func(**{text_key: text}, parse_mode=parse_mode, **kwargs)
+    except BadRequest as e:
+        if parse_mode and "parse" in str(e).lower():
+            print(f"⚠️ Markdown gagal di-parse, kirim sebagai teks polos: {e}")
+            return await func(**{text_key: text}, parse_mode=None, **kwargs)
+        raise
+
+
+async def send_text(bot, chat_id, text, parse_mode='Markdown'):
+    """Kirim teks panjang: split di batas 4096, potongan dikirim berurutan"""
+    messages = []
+    for chunk in split_text(text):
+        messages.append(await _with_markdown_fallback(
+            bot.send_message, 'text', chunk, parse_mode, chat_id=chat_id
+        ))
+    return messages
+
+
+async def send_photo(bot, chat_id, photo_path, caption, parse_mode='Markdown'):
+    """Kirim foto + caption (caption sudah <= 1024)"""
+    with open(photo_path, 'rb') as photo:
+        data = photo.read()
+    return await _with_markdown_fallback(
+        bot.send_photo, 'caption', caption, parse_mode, chat_id=chat_id, photo=data
+    )
+
+
+async def edit_text(bot, chat_id, message_id, text, parse_mode='Markdown'):
+    """Edit pesan (misal loading -> sinyal) lewat id; teks kepanjangan dipotong di batas 4096"""
+    return await _with_markdown_fallback(
+        bot.edit_message_text, 'text', split_text(text)[0], parse_mode, chat_id=chat_id, message_id=message_id
+    )
+
+
+async def send_concurrently(*coros):
+    """Kirim beberapa pesan independen (urutan tidak penting) secara paralel"""
+    return await asyncio.gather(*coros)
@@ -0,0 +1,265 @@
+"""
+Exchange Budget Module
+- Scheduler di depan semua call ccxt, sadar request weight Binance (header x-mbx-used-weight-1m)
+- Prioritas: interactive (analisa / klik user) > background (refresh cache); background berhenti lebih dulu
+- Single-flight: call identik yang sedang jalan digabung (1 request, hasil dibagi)
+- 429 / 418: semua call ditahan sampai Retry-After, supaya tidak kena IP ban
+- Circuit breaker (opsional): exchange down / timeout beruntun -> call langsung gagal tanpa network
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+import ccxt
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Limit weight per menit per IP (spot api.binance.com, futures fapi.binance.com)
+SPOT_WEIGHT_LIMIT = int(os.getenv('BINANCE_SPOT_WEIGHT_LIMIT', '6000'))
+FUTURES_WEIGHT_LIMIT = int(os.getenv('BINANCE_FUTURES_WEIGHT_LIMIT', '2400'))
+# Fraksi limit yang boleh dipakai: interactive sisakan margin, background berhenti jauh lebih awal
+INTERACTIVE_SHARE = float(os.getenv('WEIGHT_INTERACTIVE_SHARE', '0.9'))
+BACKGROUND_SHARE = float(os.getenv('WEIGHT_BACKGROUND_SHARE', '0.6'))
+# Default Retry-After kalau header tidak ada (detik)
+DEFAULT_BACKOFF = 60
+
+
+# ========== ESTIMASI WEIGHT ==========
+def _futures_klines_weight(limit):
+    limit = limit or 500
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def estimate_weight(market_type, method, kwargs):
+    """Estimasi weight 1 call (dokumentasi Binance); dipakai sebelum header respons tersedia"""
+    if method == 'fetch_ohlcv':
+        return 2 if market_type == 'spot' else _futures_klines_weight(kwargs.get('limit'))
+    if method == 'fetch_tickers':
+        return 80 if market_type == 'spot' else 40
+    if method == 'load_markets':
+        # ccxt binance memuat exchangeInfo spot + linear + inverse
+        return 30
+    if method == 'fetch_order_book':
+        limit = kwargs.get('limit') or 100
+        if market_type == 'spot':
+            return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+        return 2 if limit <= 50 else 5 if limit <= 100 else 10 if limit <= 500 else 20
+    if method == 'fetch_funding_rates':
+        return 10
+    if method == 'fetch_open_interest':
+        return 1
+    return 5
+
+
+def is_outage(error):
+    """Error jaringan / exchange down (dihitung breaker). Rate limit & error request bukan outage"""
+    return isinstance(error, ccxt.NetworkError) and not isinstance(error, ccxt.DDoSProtection)
+
+
+def _header(headers, name):
+    """Ambil header case-insensitive dari last_response_headers ccxt"""
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+# ========== BUDGET PER EXCHANGE ==========
+class WeightBudget:
+    """
+    Budget weight 1 instance ccxt (window 1 menit, reset di awal menit seperti Binance).
+    Thread-safe: call ccxt jalan di thread (asyncio.to_thread / ThreadPoolExecutor)
+    """
+
+    def __init__(self, exchange, market_type, limit, breaker=None):
+        self.exchange = exchange
+        self.market_type = market_type
+        self.limit = limit
+        self.breaker = breaker
+        self.used = 0
+        self.window = self._current_window()
+        self.blocked_until = 0.0
+        self.waiting_interactive = 0
+        self.inflight = {}
+        self.cond = threading.Condition()
+
+    @staticmethod
+    def _current_window():
+        return int(time.time() // 60)
+
+    def _roll_window(self):
+        window = self._current_window()
+        if window != self.window:
+            self.window = window
+            self.used = 0
+
+    def _allowed(self, weight, priority):
+        if time.time() < self.blocked_until:
+            return False
+        if priority == BACKGROUND:
+            # Background mengalah ke interactive yang sedang menunggu
+            if self.waiting_interactive:
+                return False
+            return self.used + weight <= self.limit * BACKGROUND_SHARE
+        return self.used + weight <= self.limit * INTERACTIVE_SHARE
+
+    def _wait_time(self):
+        now = time.time()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        # Tunggu window menit berikutnya
+        return (self.window + 1) * 60 - now + 0.05
+
+    def _acquire(self, weight, priority, deadline):
+        """Tahan call sampai budget cukup. False kalau deadline lewat"""
+        with self.cond:
+            if priority == INTERACTIVE:
+                self.waiting_interactive += 1
+            try:
+                while True:
+                    self._roll_window()
+                    if self._allowed(weight, priority):
+                        self.used += weight
+                        return True
+                    timeout = self._wait_time()
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        timeout = min(timeout, remaining)
+                    self.cond.wait(timeout=min(timeout, 1.0))
+            finally:
+                if priority == INTERACTIVE:
+                    self.waiting_interactive -= 1
+                    self.cond.notify_all()
+
+    def _record_response(self, error=None):
+        """Sinkronkan weight terpakai dari header; pasang backoff kalau 429/418"""
+        headers = getattr(self.exchange, 'last_response_headers', None)
+        with self.cond:
+            used = _header(headers, 'x-mbx-used-weight-1m')
+            if used is not None:
+                try:
+                    self._roll_window()
+                    self.used = max(self.used, int(used))
+                except ValueError:
+                    pass
+
+            if isinstance(error, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)):
+                retry_after = _header(headers, 'retry-after')
+                try:
+                    backoff = float(retry_after) if retry_after else DEFAULT_BACKOFF
+                except ValueError:
+                    backoff = DEFAULT_BACKOFF
+                self.blocked_until = max(self.blocked_until, time.time() + backoff)
+                print(f"🚫 Binance {self.market_type} rate limit ({type(error).__name__}), "
+                      f"semua call ditahan {backoff:.0f} detik")
+            self.cond.notify_all()
+
+    def call(self, method, *args, priority=INTERACTIVE, weight=None, timeout=None, **kwargs):
+        """
+        Jalankan exchange.<method>(*args, **kwargs) lewat budget.
+        Call identik yang sedang jalan digabung (single-flight).
+        timeout: batas tunggu budget (detik); lewat -> ccxt.RateLimitExceeded tanpa kirim request.
+        Breaker OPEN -> CircuitOpen tanpa kirim request
+        """
+        key = (method, args, tuple(sorted(kwargs.items())))
+        with self.cond:
+            shared = self.inflight.get(key)
+            if shared is None:
+                shared = Future()
+                self.inflight[key] = shared
+                owner = True
+            else:
+                owner = False
+        if not owner:
+            return shared.result()
+
+        try:
+            if self.breaker is not None:
+                self.breaker.check()
+            weight = weight or estimate_weight(self.market_type, method, kwargs)
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            if not self._acquire(weight, priority, deadline):
+                raise ccxt.RateLimitExceeded(f"Budget weight Binance {self.market_type} habis, call {method} ditunda")
+
+            # Header instance bisa milik call paralel lain; weight Binance per IP jadi tetap valid (ambil max)
+            try:
+                result = getattr(self.exchange, method)(*args, **kwargs)
+            except Exception as e:
+                self._record_response(e)
+                if self.breaker is not None:
+                    # Exchange menjawab (error request / rate limit) = tetap sehat
+                    (self.breaker.record_failure if is_outage(e) else self.breaker.record_success)()
+                raise
+            self._record_response()
+            if self.breaker is not None:
+                self.breaker.record_success()
+            shared.set_result(result)
+            return result
+        except Exception as e:
+            shared.set_exception(e)
+            raise
+        finally:
+            with self.cond:
+                self.inflight.pop(key, None)
+
+    def status(self):
+        """Snapshot pemakaian weight (untuk log / admin)"""
+        with self.cond:
+            self._roll_window()
+            return {
+                'market_type': self.market_type,
+                'used': self.used,
+                'limit': self.limit,
+                'blocked_for': max(0.0, self.blocked_until - time.time()),
+            }
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test budget dengan exchange palsu (tanpa network)"""
+
+    class FakeExchange:
+        def __init__(self):
+            self.calls = 0
+            self.last_response_headers = {}
+
+        def fetch_ohlcv(self, symbol, timeframe, since=None, limit=100):
+            self.calls += 1
+            time.sleep(0.2)
+            self.last_response_headers = {'X-MBX-USED-WEIGHT-1M': str(self.calls * 2)}
+            return [[0, 1, 1, 1, 1, 1]]
+
+    print("🧪 Testing WeightBudget\n")
+    fake = FakeExchange()
+    budget = WeightBudget(fake, 'spot', limit=20)
+
+    # Single-flight: 5 call identik bersamaan -> 1 request
+    threads = [threading.Thread(target=budget.call, args=('fetch_ohlcv', 'BTC/USDT', '5m'), kwargs={'limit': 100})
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"Single-flight: 5 call -> {fake.calls} request")
+
+    # Background berhenti di 60% limit, interactive masih jalan
+    budget.used = 11
+    try:
+        budget.call('fetch_ohlcv', 'ETH/USDT', '5m', priority=BACKGROUND, timeout=0.1, limit=100)
+    except ccxt.RateLimitExceeded as e:
+        print(f"Background ditunda: {e}")
+    budget.call('fetch_ohlcv', 'ETH/USDT', '5m', priority=INTERACTIVE, timeout=0.1, limit=100)
+    print(f"Interactive jalan: {budget.status()}")
+    print("\n✅ Test completed!")
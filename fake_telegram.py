@@ -0,0 +1,152 @@
+"""
+Fake Telegram Server (testing lokal)
+- Stub Bot API minimal: getMe, setWebhook, sendMessage, sendPhoto, editMessageText, dll
+- Kirim update ke webhook bot secara paralel & ukur latency balasan per chat
+
+Cara pakai:
+  1. python fake_telegram.py --menu 50 --analysis 5   (Bot API stub di 127.0.0.1:8081)
+  2. TELEGRAM_BASE_URL=http://127.0.0.1:8081 BOT_MODE=webhook \\
+     WEBHOOK_URL=http://127.0.0.1:8443 WEBHOOK_SECRET=test python main.py
+  Begitu bot memanggil setWebhook, stub langsung mengirim update ke webhook tsb.
+"""
+
+import json
+import sys
+import threading
+import time
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+FAKE_HOST = '127.0.0.1'
+FAKE_PORT = 8081
+
+# Diisi saat bot memanggil setWebhook
+WEBHOOK = {'url': None, 'secret': None}
+WEBHOOK_READY = threading.Event()
+
+# chat_id -> list timestamp pesan keluar dari bot
+SENT = {}
+SENT_LOCK = threading.Lock()
+MESSAGE_ID = [1000]
+
+
+def _message(chat_id, text=None):
+    MESSAGE_ID[0] += 1
+    msg = {
+        'message_id': MESSAGE_ID[0],
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'},
+    }
+    if text is not None:
+        msg['text'] = text
+    return msg
+
+
+class FakeBotAPI(BaseHTTPRequestHandler):
+    """Handler /bot<token>/<method>"""
+
+    def do_POST(self):
+        method = self.path.rsplit('/', 1)[-1]
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        params = {}
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            params = json.loads(body or b'{}')
+        else:
+            # Form / multipart: cukup ambil chat_id
+            for part in body.split(b'name="chat_id"')[1:2]:
+                params['chat_id'] = int(part.split(b'\r\n\r\n', 1)[1].split(b'\r\n', 1)[0])
+            if not params and body:
+                params = dict(parse_qsl(body.decode(errors='ignore')))
+
+        chat_id = int(params.get('chat_id', 0) or 0)
+        if method in ('sendMessage', 'sendPhoto', 'editMessageText'):
+            with SENT_LOCK:
+                SENT.setdefault(chat_id, []).append(time.time())
+
+        if method == 'setWebhook':
+            WEBHOOK['url'] = params.get('url')
+            WEBHOOK['secret'] = params.get('secret_token')
+            WEBHOOK_READY.set()
+
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'FakeBot', 'username': 'fake_bot'}
+        elif method in ('sendMessage', 'editMessageText'):
+            result = _message(chat_id, params.get('text', ''))
+        elif method == 'sendPhoto':
+            result = _message(chat_id)
+            result['photo'] = [{'file_id': 'x', 'file_unique_id': 'x', 'width': 1, 'height': 1}]
+        else:
+            result = True
+
+        payload = json.dumps({'ok': True, 'result': result}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    """Jalankan Bot API stub"""
+    server = ThreadingHTTPServer((FAKE_HOST, FAKE_PORT), FakeBotAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"🧪 Fake Telegram Bot API di http://{FAKE_HOST}:{FAKE_PORT}")
+    return server
+
+
+def post_update(update_id, chat_id, text):
+    """Kirim 1 update message ke webhook bot"""
+    update = {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': f'user{chat_id}'},
+            'text': text,
+        },
+    }
+    headers = {'X-Telegram-Bot-Api-Secret-Token': WEBHOOK['secret']} if WEBHOOK['secret'] else {}
+    requests.post(WEBHOOK['url'], json=update, timeout=10, headers=headers)
+
+
+def run_load(menu_count, analysis_count, pair='BTC/USDT'):
+    """Analisa berat dulu, lalu banyak klik menu; ukur latency balasan pertama per chat"""
+    posted = {}
+    threads = []
+    jobs = [(10_000 + i, pair) for i in range(analysis_count)] + [(20_000 + i, '≡ Menu') for i in range(menu_count)]
+    for update_id, (chat_id, text) in enumerate(jobs, 1):
+        posted[chat_id] = time.time()
+        t = threading.Thread(target=post_update, args=(update_id, chat_id, text))
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+
+    time.sleep(5)
+    with SENT_LOCK:
+        menu = sorted(SENT[c][0] - posted[c] for c in posted if c >= 20_000 and c in SENT)
+    if menu:
+        p50 = menu[len(menu) // 2]
+        p95 = menu[min(len(menu) - 1, int(len(menu) * 0.95))]
+        print(f"📊 Menu reply: {len(menu)}/{menu_count} | p50 {p50 * 1000:.0f}ms | p95 {p95 * 1000:.0f}ms")
+    else:
+        print("❌ Tidak ada balasan menu")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    menu = int(args[args.index('--menu') + 1]) if '--menu' in args else 50
+    analysis = int(args[args.index('--analysis') + 1]) if '--analysis' in args else 5
+
+    server = serve()
+    print("⏳ Menunggu bot memanggil setWebhook...")
+    WEBHOOK_READY.wait()
+    time.sleep(1)  # Beri waktu webhook server bot siap
+    print(f"🚀 Kirim {analysis} analisa + {menu} menu ke {WEBHOOK['url']}")
+    run_load(menu, analysis)
+    server.shutdown()
@@ -0,0 +1,287 @@
+"""
+Futures Data Module (USDT-M perpetual)
+- Funding rate + mark price semua perpetual: 1 bulk fetch (premiumIndex) per refresh
+- Open interest: Binance tidak punya endpoint bulk -> hanya top volume (weight 1 / symbol), perubahan antar refresh
+- Likuidasi: 1 stream WebSocket !forceOrder@arr untuk seluruh market, diagregasi rolling 1 jam
+- Disimpan kolumnar (numpy per metrik) -> serialisasi 1 blob untuk dibagi antar worker
+"""
+
+import asyncio
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+FUTURES_REFRESH = int(os.getenv('FUTURES_REFRESH', '60'))
+FUTURES_OI_TOP = int(os.getenv('FUTURES_OI_TOP', '30'))
+LIQUIDATION_WINDOW = 3600
+LIQUIDATION_WS_URL = "wss://fstream.binance.com/ws/!forceOrder@arr"
+
+COLUMNS = (
+    'funding_rate', 'mark_price', 'next_funding', 'open_interest', 'oi_change_pct',
+    'liq_long_1h', 'liq_short_1h',
+)
+
+
+def ws_symbol_to_unified(symbol_id):
+    """BTCUSDT -> BTC/USDT:USDT (format ccxt perpetual USDT-M)"""
+    if not symbol_id.endswith('USDT'):
+        return None
+    return f"{symbol_id[:-4]}/USDT:USDT"
+
+
+# ========== TABEL KOLUMNAR ==========
+class FuturesTable:
+    """1 baris per perpetual, 1 numpy array per metrik (NaN = belum ada data)"""
+
+    def __init__(self, symbols=(), columns=None, updated_at=None):
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.columns = columns or {c: np.full(len(self.symbols), np.nan) for c in COLUMNS}
+        self.updated_at = updated_at or time.time()
+
+    def row(self, symbol):
+        """Metrik 1 symbol sebagai dict float (None kalau NaN / symbol tidak ada)"""
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        return {c: (float(v) if np.isfinite(v) else None) for c, v in ((c, self.columns[c][i]) for c in COLUMNS)}
+
+    def top(self, column, n=10, ascending=False):
+        """n symbol dengan nilai kolom terbesar / terkecil (NaN dilewati)"""
+        values = self.columns[column]
+        idx = np.flatnonzero(np.isfinite(values))
+        order = idx[np.argsort(values[idx])]
+        if not ascending:
+            order = order[::-1]
+        return [(self.symbols[i], float(values[i])) for i in order[:n]]
+
+    def to_bytes(self):
+        buf = io.BytesIO()
+        np.savez(buf, symbols=np.array(self.symbols, dtype=str), updated_at=np.float64(self.updated_at),
+                 **self.columns)
+        return buf.getvalue()
+
+    @classmethod
+    def from_bytes(cls, raw):
+        with np.load(io.BytesIO(raw), allow_pickle=False) as data:
+            return cls(data['symbols'].tolist(), {c: data[c] for c in COLUMNS}, float(data['updated_at']))
+
+
+# ========== DATA PLANE ==========
+class FuturesDataPlane:
+    """
+    Refresh periodik (proses leader): funding bulk + OI top volume + agregasi likuidasi.
+    fetch_funding() -> dict ccxt fetch_funding_rates, fetch_open_interest(symbol) -> dict ccxt
+    """
+
+    def __init__(self, fetch_funding, fetch_open_interest):
+        self.fetch_funding = fetch_funding
+        self.fetch_open_interest = fetch_open_interest
+        self.table = FuturesTable()
+        self.previous_oi = {}
+        self.liquidations = deque()
+        # Deque diisi stream (event loop) & dibaca refresh() (thread) -> akses lewat lock
+        self._liq_lock = threading.Lock()
+        self.liquidation_task = None
+
+    def refresh(self, volume_ranking=()):
+        """Bangun tabel baru (dipanggil di thread). volume_ranking: symbol futures urut volume"""
+        rates = self.fetch_funding()
+        symbols = sorted(s for s in rates if s.endswith('/USDT:USDT'))
+        table = FuturesTable(symbols)
+        cols = table.columns
+
+        funding = [rates[s] for s in symbols]
+        cols['funding_rate'][:] = [r.get('fundingRate') if r.get('fundingRate') is not None else np.nan for r in funding]
+        cols['mark_price'][:] = [r.get('markPrice') or np.nan for r in funding]
+        cols['next_funding'][:] = [r.get('nextFundingTimestamp') or r.get('fundingTimestamp') or np.nan for r in funding]
+
+        # Open interest: top volume saja (1 call per symbol)
+        for symbol in [s for s in volume_ranking if s in table.index][:FUTURES_OI_TOP]:
+            try:
+                oi = self.fetch_open_interest(symbol)
+            except Exception as e:
+                print(f"⚠️ OI {symbol}: {type(e).__name__}")
+                continue
+            i = table.index[symbol]
+            amount = oi.get('openInterestAmount')
+            value = oi.get('openInterestValue') or (amount * cols['mark_price'][i] if amount else None)
+            if value:
+                cols['open_interest'][i] = value
+                previous = self.previous_oi.get(symbol)
+                if previous:
+                    cols['oi_change_pct'][i] = (value - previous) / previous * 100
+                self.previous_oi[symbol] = value
+
+        # Likuidasi rolling 1 jam (long dilikuidasi = order SELL paksa)
+        self._aggregate_liquidations(table)
+        self.table = table
+        return table
+
+    def _aggregate_liquidations(self, table):
+        cutoff = time.time() - LIQUIDATION_WINDOW
+        with self._liq_lock:
+            while self.liquidations and self.liquidations[0][0] < cutoff:
+                self.liquidations.popleft()
+            liquidations = list(self.liquidations)
+        table.columns['liq_long_1h'][:] = 0.0
+        table.columns['liq_short_1h'][:] = 0.0
+        if not liquidations:
+            return
+        events = [(table.index.get(s), side, notional) for _, s, side, notional in liquidations]
+        events = [e for e in events if e[0] is not None]
+        if not events:
+            return
+        rows = np.array([e[0] for e in events])
+        is_long = np.array([e[1] == 'SELL' for e in events])
+        notional = np.array([e[2] for e in events])
+        np.add.at(table.columns['liq_long_1h'], rows[is_long], notional[is_long])
+        np.add.at(table.columns['liq_short_1h'], rows[~is_long], notional[~is_long])
+
+    def record_liquidation(self, payload):
+        """1 event forceOrder dari stream"""
+        order = payload.get('o', {})
+        symbol = ws_symbol_to_unified(order.get('s', ''))
+        if not symbol:
+            return
+        notional = float(order.get('ap') or order.get('p') or 0) * float(order.get('z') or order.get('q') or 0)
+        with self._liq_lock:
+            self.liquidations.append((order.get('T', time.time() * 1000) / 1000, symbol, order.get('S'), notional))
+
+    def start_liquidation_stream(self):
+        """Mulai stream likuidasi (kalau paket websockets ada)"""
+        if self.liquidation_task and not self.liquidation_task.done():
+            return
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            print("⚠️ Paket websockets tidak ada, data likuidasi nonaktif")
+            return
+        self.liquidation_task = asyncio.create_task(self._liquidation_stream())
+
+    async def _liquidation_stream(self):
+        import websockets
+        while True:
+            try:
+                async with websockets.connect(LIQUIDATION_WS_URL, ping_interval=20) as ws:
+                    async for raw in ws:
+                        self.record_liquidation(json.loads(raw))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Stream likuidasi error: {type(e).__name__}: {e}")
+                await asyncio.sleep(5)
+
+
+# ========== FORMAT ==========
+def _usd(value):
+    if value is None:
+        return "-"
+    if value >= 1e9:
+        return f"${value / 1e9:.2f}B"
+    if value >= 1e6:
+        return f"${value / 1e6:.1f}M"
+    return f"${value / 1e3:.0f}K"
+
+
+def format_futures_metrics(metrics):
+    """Bagian futures untuk ringkasan teknikal Telegram"""
+    if not metrics:
+        return ""
+    msg = "🧾 *FUTURES DATA:*\n"
+    if metrics['funding_rate'] is not None:
+        msg += f"• Funding: {metrics['funding_rate'] * 100:+.4f}%"
+        if metrics['next_funding']:
+            minutes = int(max(0, (metrics['next_funding'] / 1000 - time.time()) / 60))
+            msg += f" (berikutnya {minutes // 60}j {minutes % 60}m)"
+        msg += "\n"
+    if metrics['open_interest'] is not None:
+        change = f" ({metrics['oi_change_pct']:+.2f}%)" if metrics['oi_change_pct'] is not None else ""
+        msg += f"• Open Interest: {_usd(metrics['open_interest'])}{change}\n"
+    if metrics['liq_long_1h'] or metrics['liq_short_1h']:
+        msg += f"• Likuidasi 1j: Long {_usd(metrics['liq_long_1h'] or 0)} | Short {_usd(metrics['liq_short_1h'] or 0)}\n"
+    return msg
+
+
+def format_funding_scanner(table, n=8):
+    """Pesan /funding: funding ekstrem, OI naik terbesar, likuidasi terbesar"""
+    if table is None or not table.symbols:
+        return "🧾 *FUNDING SCANNER*\n⏳ Data futures belum siap, coba lagi sebentar."
+
+    def short(symbol):
+        return symbol.split('/')[0]
+
+    msg = f"🧾 *FUNDING SCANNER* ({len(table.symbols)} perpetual USDT-M)\n━━━━━━━━━━━━━━━━━━\n"
+    msg += "\n🔥 *Funding tertinggi (long bayar):*\n"
+    msg += "".join(f"• {short(s)}: {v * 100:+.4f}%\n" for s, v in table.top('funding_rate', n))
+    msg += "\n🧊 *Funding terendah (short bayar):*\n"
+    msg += "".join(f"• {short(s)}: {v * 100:+.4f}%\n" for s, v in table.top('funding_rate', n, ascending=True))
+
+    oi_up = [(s, v) for s, v in table.top('oi_change_pct', 5) if v > 0]
+    if oi_up:
+        msg += "\n📈 *OI naik terbesar:*\n"
+        msg += "".join(f"• {short(s)}: {v:+.2f}%\n" for s, v in oi_up)
+
+    total_liq = table.columns['liq_long_1h'] + table.columns['liq_short_1h']
+    idx = np.argsort(np.nan_to_num(total_liq))[::-1][:5]
+    liq = [(table.symbols[i], table.columns['liq_long_1h'][i], table.columns['liq_short_1h'][i])
+           for i in idx if total_liq[i] > 0]
+    if liq:
+        msg += "\n💥 *Likuidasi 1 jam terbesar:*\n"
+        msg += "".join(f"• {short(s)}: Long {_usd(l)} | Short {_usd(sh)}\n" for s, l, sh in liq)
+
+    age = max(0, time.time() - table.updated_at)
+    msg += f"\n🕐 Update {age:.0f} detik lalu"
+    return msg
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test tabel kolumnar: refresh dari data sintetis, likuidasi, serialisasi & scanner"""
+    rng = np.random.default_rng(7)
+    symbols = [f"C{i:03d}/USDT:USDT" for i in range(300)] + ['BTC/USDT:USDT', 'ETH/USDT:USDT']
+    rates = {
+        s: {'fundingRate': float(rng.normal(0.0001, 0.0003)), 'markPrice': float(rng.uniform(0.1, 100)),
+            'fundingTimestamp': (time.time() + 3600) * 1000}
+        for s in symbols
+    }
+    oi_calls = []
+
+    def fake_oi(symbol):
+        oi_calls.append(symbol)
+        return {'openInterestAmount': float(rng.uniform(1e5, 1e7))}
+
+    print("🧪 Testing Futures Data Module\n")
+    print("=" * 60)
+    plane = FuturesDataPlane(lambda: rates, fake_oi)
+    for _ in range(200):
+        side = 'SELL' if rng.random() < 0.6 else 'BUY'
+        plane.record_liquidation({'o': {'s': 'BTCUSDT', 'S': side, 'ap': '60000', 'z': f"{rng.uniform(0.01, 2):.3f}",
+                                        'T': time.time() * 1000}})
+    ranking = ['BTC/USDT:USDT', 'ETH/USDT:USDT'] + symbols[:50]
+
+    plane.refresh(ranking)
+    started = time.perf_counter()
+    table = plane.refresh(ranking)
+    print(f"Refresh {len(table.symbols)} perpetual: {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"| OI call {len(oi_calls)} (2 refresh, top {FUTURES_OI_TOP})")
+
+    raw = table.to_bytes()
+    started = time.perf_counter()
+    restored = FuturesTable.from_bytes(raw)
+    print(f"Serialisasi: {len(raw) / 1024:.1f} KB | decode {(time.perf_counter() - started) * 1000:.2f} ms")
+    assert restored.symbols == table.symbols
+    assert np.allclose(np.nan_to_num(restored.columns['funding_rate']), np.nan_to_num(table.columns['funding_rate']))
+
+    started = time.perf_counter()
+    for _ in range(10000):
+        row = restored.row('BTC/USDT:USDT')
+    print(f"Lookup 1 symbol: {(time.perf_counter() - started) / 10000 * 1e6:.1f} µs")
+    print(row)
+    print(format_futures_metrics(row))
+    print(format_funding_scanner(restored))
+    print("\n✅ Test completed!")
@@ -0,0 +1,288 @@
+"""
+Indicators Module
+- calculate_indicators: indikator teknikal 1 timeframe (MA, S/R, trend, RSI, MACD, BB, swing/Fib)
+- IndicatorSnapshot: hasil ringkas berbasis __slots__ (skalar float + referensi buffer candle, bukan copy)
+- Swing Fib = swing dominan zigzag (swings.py); level & nearest Fib diturunkan saat dibutuhkan
+- Serialisasi biner (1 record numpy + extra JSON kecil) untuk cache & transfer antar proses
+"""
+
+import json
+import struct
+import numpy as np
+from candles import to_array
+from swings import FIB_KEYS, FIB_RATIOS, dominant_swing
+
+FIB_INDEX = {k: i for i, k in enumerate(FIB_KEYS)}
+
+TREND_LABELS = {1: "Uptrend (Naik) 📈", -1: "Downtrend (Turun) 📉", 0: "Sideways (Datar) ↔️"}
+
+# Field skalar (urutan = layout record biner)
+SCALAR_FIELDS = (
+    'current_price', 'ma20', 'ma50', 'support', 'resistance', 'rsi',
+    'macd_line', 'macd_signal', 'macd_hist', 'bb_upper', 'bb_mid', 'bb_lower',
+    'swing_high', 'swing_low', 'price_change', 'volume',
+)
+# Data tambahan per request (level order book, data futures), dict kecil atau None
+EXTRA_FIELDS = ('orderbook', 'futures')
+# Field integer: arah trend & swing (+1/0/-1), index pivot swing di buffer candle
+INT_FIELDS = (('trend_dir', 'i1'), ('swing_dir', 'i1'), ('swing_low_idx', '<i4'), ('swing_high_idx', '<i4'))
+RECORD_DTYPE = np.dtype([(name, '<f8') for name in SCALAR_FIELDS] + list(INT_FIELDS))
+
+
+# ========== SNAPSHOT ==========
+class IndicatorSnapshot:
+    """Indikator 1 timeframe. candles: array OHLCV (n, 6) yang sama dengan frame (tidak dicopy)"""
+    __slots__ = SCALAR_FIELDS + tuple(name for name, _ in INT_FIELDS) + ('candles',) + EXTRA_FIELDS
+
+    def __init__(self, candles=None, trend_dir=0, swing_dir=0, swing_low_idx=-1, swing_high_idx=-1,
+                 orderbook=None, futures=None, **scalars):
+        for name in SCALAR_FIELDS:
+            setattr(self, name, float(scalars[name]))
+        self.trend_dir = int(trend_dir)
+        self.swing_dir = int(swing_dir)
+        self.swing_low_idx = int(swing_low_idx)
+        self.swing_high_idx = int(swing_high_idx)
+        self.candles = candles
+        self.orderbook = orderbook
+        self.futures = futures
+
+    # ----- Turunan (dihitung saat dipakai, tidak disimpan) -----
+    @property
+    def trend(self):
+        return TREND_LABELS[self.trend_dir]
+
+    @property
+    def closes(self):
+        return self.candles[:, 4]
+
+    @property
+    def highs(self):
+        return self.candles[:, 2]
+
+    @property
+    def lows(self):
+        return self.candles[:, 3]
+
+    @property
+    def fib_prices(self):
+        """Harga semua level Fib (urutan FIB_KEYS)"""
+        return self.swing_low + (self.swing_high - self.swing_low) * FIB_RATIOS
+
+    def fib(self, key):
+        """Harga 1 level Fib, key string ('0.618') sesuai FIB_KEYS"""
+        return self.swing_low + (self.swing_high - self.swing_low) * FIB_RATIOS[FIB_INDEX[key]]
+
+    @property
+    def nearest_fib(self):
+        """(key, harga) level Fib terdekat dari harga sekarang"""
+        prices = self.fib_prices
+        i = int(np.argmin(np.abs(prices - self.current_price)))
+        return FIB_KEYS[i], float(prices[i])
+
+    def replace(self, **changes):
+        """Copy dangkal dengan field diganti (candle tetap referensi yang sama)"""
+        clone = object.__new__(IndicatorSnapshot)
+        for name in self.__slots__:
+            setattr(clone, name, changes.get(name, getattr(self, name)))
+        return clone
+
+    def to_dict(self):
+        """Skalar + trend + extra (tanpa candle), untuk debug / JSON"""
+        data = {name: getattr(self, name) for name in SCALAR_FIELDS}
+        data['trend'] = self.trend
+        data.update({name: getattr(self, name) for name in EXTRA_FIELDS if getattr(self, name)})
+        return data
+
+    # ----- Serialisasi biner -----
+    def to_bytes(self):
+        """Record skalar (fixed size) + extra JSON (kalau ada). Candle tidak ikut"""
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        for name in SCALAR_FIELDS:
+            record[name] = getattr(self, name)
+        for name, _ in INT_FIELDS:
+            record[name] = getattr(self, name)
+        extra = {name: getattr(self, name) for name in EXTRA_FIELDS if getattr(self, name)}
+        extra_raw = json.dumps(extra, separators=(',', ':')).encode() if extra else b''
+        return record.tobytes() + extra_raw
+
+    @classmethod
+    def from_bytes(cls, raw, candles=None):
+        record = np.frombuffer(raw[:RECORD_DTYPE.itemsize], dtype=RECORD_DTYPE)[0]
+        extra = json.loads(raw[RECORD_DTYPE.itemsize:]) if len(raw) > RECORD_DTYPE.itemsize else {}
+        return cls(candles=candles, **{name: record[name] for name, _ in INT_FIELDS},
+                   **{name: record[name] for name in SCALAR_FIELDS}, **extra)
+
+
+def pack_frames(frames):
+    """Indikator semua timeframe -> bytes: [len header][header JSON (tf, role, ukuran)][snapshot...]"""
+    blobs = [frame['ind'].to_bytes() for frame in frames]
+    header = json.dumps([[f['tf'], f['role'], len(b)] for f, b in zip(frames, blobs)], separators=(',', ':')).encode()
+    return struct.pack('<I', len(header)) + header + b''.join(blobs)
+
+
+def unpack_frames(raw):
+    """Kebalikan pack_frames -> list frame {'tf', 'role', 'ind'} (tanpa candle)"""
+    (size,) = struct.unpack_from('<I', raw)
+    offset = 4 + size
+    frames = []
+    for tf, role, length in json.loads(raw[4:offset]):
+        frames.append({'tf': tf, 'role': role, 'ind': IndicatorSnapshot.from_bytes(raw[offset:offset + length])})
+        offset += length
+    return frames
+
+
+# ========== FUNGSI HITUNG INDIKATOR TEKNIKAL ==========
+def calculate_indicators(ohlcv_data):
+    """Hitung semua indikator teknikal untuk scalping -> IndicatorSnapshot (candle tidak dicopy)"""
+    data = to_array(ohlcv_data)
+    closes  = data[:, 4]
+    highs   = data[:, 2]
+    lows    = data[:, 3]
+    volumes = data[:, 5]
+
+    # ----- Moving Averages (rolling, ambil nilai terakhir) -----
+    ma20 = float(np.convolve(closes, np.ones(20)/20, mode='valid')[-1]) if len(closes) >= 20 else float(closes[-1])
+    ma50 = float(np.convolve(closes, np.ones(50)/50, mode='valid')[-1]) if len(closes) >= 50 else float(closes[-1])
+
+    # ----- Support & Resistance (dari 20 candle terakhir) -----
+    support   = float(np.min(lows[-20:]))
+    resistance = float(np.max(highs[-20:]))
+
+    # ----- Trend -----
+    if closes[-1] > ma20 > ma50:
+        trend_dir = 1
+    elif closes[-1] < ma20 < ma50:
+        trend_dir = -1
+    else:
+        trend_dir = 0
+
+    # ----- RSI 14 (PERBAIKAN: pakai data terakhir, bukan pertama) -----
+    deltas = np.diff(closes)
+    seed = deltas[-14:]  # 14 candle TERAKHIR
+    up   = seed[seed >= 0].sum() / 14
+    down = -seed[seed < 0].sum() / 14
+    rs   = up / down if down != 0 else 0
+    rsi  = 100 - (100 / (1 + rs))
+
+    # ----- MACD (12, 26, 9) -----
+    if len(closes) >= 26:
+        ema12 = float(closes[-1])  # seed
+        ema26 = float(closes[-1])
+        alpha12 = 2.0 / (12 + 1)
+        alpha26 = 2.0 / (26 + 1)
+        for c in closes[-26:]:
+            ema12 = alpha12 * c + (1 - alpha12) * ema12
+            ema26 = alpha26 * c + (1 - alpha26) * ema26
+        macd_line   = ema12 - ema26
+        # Signal line (EMA 9 dari MACD) — simplified: pakai rata-rata 9 nilai terakhir
+        # Untuk akurasi lebih, buat array MACD terakhir
+        macd_values = []
+        ema12_t = float(closes[0])
+        ema26_t = float(closes[0])
+        for c in closes:
+            ema12_t = alpha12 * c + (1 - alpha12) * ema12_t
+            ema26_t = alpha26 * c + (1 - alpha26) * ema26_t
+            macd_values.append(ema12_t - ema26_t)
+        macd_values = np.array(macd_values)
+        # Signal = EMA 9 dari macd_values
+        alpha9 = 2.0 / (9 + 1)
+        signal = macd_values[0]
+        for m in macd_values:
+            signal = alpha9 * m + (1 - alpha9) * signal
+        macd_signal = float(signal)
+        macd_hist   = float(macd_line - macd_signal)
+    else:
+        macd_line   = 0.0
+        macd_signal = 0.0
+        macd_hist   = 0.0
+
+    # ----- Bollinger Bands (20 period, 2 std) -----
+    if len(closes) >= 20:
+        bb_mid   = float(np.mean(closes[-20:]))
+        bb_std   = float(np.std(closes[-20:], ddof=0))
+        bb_upper = bb_mid + 2 * bb_std
+        bb_lower = bb_mid - 2 * bb_std
+    else:
+        bb_mid   = float(closes[-1])
+        bb_upper = bb_mid
+        bb_lower = bb_mid
+
+    # ----- Fibonacci Retracement & Extension -----
+    # Swing dominan dari pivot zigzag seluruh history (bukan max/min 20 candle terakhir)
+    swing = dominant_swing(highs, lows)
+    current_price = float(closes[-1])
+
+    # Price change
+    price_change = ((closes[-1] - closes[-24]) / closes[-24] * 100) if len(closes) >= 24 else 0.0
+
+    return IndicatorSnapshot(
+        candles=data,
+        trend_dir=trend_dir,
+        swing_dir=swing['direction'],
+        swing_low_idx=swing['low_idx'],
+        swing_high_idx=swing['high_idx'],
+        current_price=current_price,
+        ma20=ma20,
+        ma50=ma50,
+        support=support,
+        resistance=resistance,
+        rsi=rsi,
+        macd_line=macd_line,
+        macd_signal=macd_signal,
+        macd_hist=macd_hist,
+        bb_upper=bb_upper,
+        bb_mid=bb_mid,
+        bb_lower=bb_lower,
+        swing_high=swing['high'],
+        swing_low=swing['low'],
+        price_change=price_change,
+        volume=np.mean(volumes[-20:]),
+    )
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test snapshot: ukuran memori vs dict lama, serialisasi biner vs JSON"""
+    import time
+    import tracemalloc
+
+    rng = np.random.default_rng(5)
+    n = 100
+    ts = np.arange(n) * 300000.0
+    price = 100 + np.cumsum(rng.normal(size=n))
+    ohlcv = np.c_[ts, price, price + 0.5, price - 0.5, price + 0.1, rng.random(n) * 100]
+
+    print("🧪 Testing Indicators Module\n")
+    print("=" * 60)
+    ind = calculate_indicators(ohlcv)
+    print(f"Trend: {ind.trend} | RSI {ind.rsi:.1f} | Fib 0.618 {ind.fib('0.618'):.4f} | Nearest {ind.nearest_fib}")
+    assert ind.candles is ohlcv or ind.candles.base is ohlcv or np.shares_memory(ind.candles, ohlcv)
+
+    def legacy_dict(snapshot):
+        """Bentuk dict lama (fib dict, tuple nearest, view closes/highs/lows)"""
+        return dict(snapshot.to_dict(), fib_levels=dict(zip(FIB_KEYS, snapshot.fib_prices.tolist())),
+                    nearest_fib=snapshot.nearest_fib, closes=ohlcv[:, 4], highs=ohlcv[:, 2], lows=ohlcv[:, 3])
+
+    def retained(build):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        kept = [build() for _ in range(1000)]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        return sum(stat.size_diff for stat in after.compare_to(before, 'filename')), kept
+
+    snapshot_size, _ = retained(lambda: calculate_indicators(ohlcv))
+    legacy_size, _ = retained(lambda: legacy_dict(calculate_indicators(ohlcv)))
+    print(f"Memori 1000 hasil tersimpan: snapshot {snapshot_size / 1024:.0f} KB | dict lama ~{legacy_size / 1024:.0f} KB")
+
+    frames = [{'tf': '15m', 'role': 'Trend', 'ind': ind},
+              {'tf': '5m', 'role': 'Entry', 'ind': ind.replace(orderbook={'support': 99.5, 'resistance': 101.2})}]
+    raw = pack_frames(frames)
+    as_json = json.dumps([{'tf': f['tf'], 'role': f['role'], 'ind': f['ind'].to_dict()} for f in frames])
+    started = time.perf_counter()
+    for _ in range(10000):
+        restored = unpack_frames(raw)
+    print(f"Biner {len(raw)} B vs JSON {len(as_json)} B | unpack {(time.perf_counter() - started) / 10000 * 1e6:.1f} µs")
+    assert restored[1]['ind'].orderbook['support'] == 99.5
+    assert restored[0]['ind'].rsi == ind.rsi and restored[0]['ind'].trend == ind.trend
+    print("\n✅ Test completed!")
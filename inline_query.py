@@ -0,0 +1,196 @@
+"""
+Inline Query Module
+- Mode inline Telegram (@bot btc): harga, trend 15m/5m, RSI, arah MACD, level Fib terdekat
+- Jawaban HANYA dari cache (snapshot ticker, candle store, warm cache) — tidak pernah fetch exchange / LLM
+- Index prefix symbol: list key terurut + bisect, dibangun dari output get_all_pairs (spot + futures)
+"""
+
+import os
+import time
+from bisect import bisect_left
+
+INLINE_TIMEFRAMES = ('15m', '5m')
+INLINE_MAX_RESULTS = int(os.getenv('INLINE_MAX_RESULTS', '8'))
+INLINE_CACHE_TIME = int(os.getenv('INLINE_CACHE_TIME', '10'))  # detik, cache jawaban di server Telegram
+INLINE_REFRESH = 30                                               # refresh index & snapshot ticker (background)
+MARKET_ALIASES = {'s': 'spot', 'spot': 'spot', 'f': 'futures', 'fut': 'futures', 'futures': 'futures', 'perp': 'futures'}
+MACD_LABELS = {True: "MACD 🟢", False: "MACD 🔴"}
+TREND_SHORT = {1: "📈", -1: "📉", 0: "↔️"}
+
+
+def compact_key(symbol):
+    """BTC/USDT:USDT -> BTCUSDT (format yang biasa diketik user)"""
+    return symbol.split(':')[0].replace('/', '').upper()
+
+
+def parse_inline_query(text):
+    """'btc f' / 'BTC/USDT' / 'eth spot' -> (prefix, market_type atau None)"""
+    words = text.strip().split()
+    market_type = None
+    if words and words[-1].lower() in MARKET_ALIASES:
+        market_type = MARKET_ALIASES[words.pop().lower()]
+    prefix = ''.join(words).upper().split(':')[0].replace('/', '')
+    return prefix, market_type
+
+
+# ========== INDEX SYMBOL ==========
+class SymbolIndex:
+    """
+    Index prefix semua pair: keys (urut) sejajar dengan entries (symbol, market_type, base).
+    Snapshot ticker terakhir disimpan di sini (harga + volume untuk ranking), dibaca tanpa network
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+        self.pairs = {}
+        self.tickers = {}
+        self.tickers_at = {}
+
+    def build(self, market_type, pairs):
+        """Bangun ulang index kalau daftar pair market ini berubah"""
+        if self.pairs.get(market_type) == pairs:
+            return False
+        self.pairs[market_type] = list(pairs)
+        rows = sorted(
+            (compact_key(symbol), symbol, market, symbol.split('/')[0].upper())
+            for market, market_pairs in self.pairs.items() for symbol in market_pairs
+        )
+        self.keys = [row[0] for row in rows]
+        self.entries = [row[1:] for row in rows]
+        print(f"✅ Inline index: {len(self.keys)} pair")
+        return True
+
+    def update_tickers(self, market_type, snapshot):
+        self.tickers[market_type] = snapshot
+        self.tickers_at[market_type] = time.time()
+
+    def ticker(self, symbol, market_type):
+        """(ticker, umur detik) dari snapshot terakhir, atau (None, None)"""
+        ticker = self.tickers.get(market_type, {}).get(symbol)
+        if ticker is None:
+            return None, None
+        return ticker, time.time() - self.tickers_at[market_type]
+
+    def _volume(self, symbol, market_type):
+        return (self.tickers.get(market_type, {}).get(symbol) or {}).get('quoteVolume') or 0
+
+    def search(self, text, limit=INLINE_MAX_RESULTS):
+        """List (symbol, market_type): base persis dulu, lalu volume 24h terbesar"""
+        prefix, market_type = parse_inline_query(text)
+        if prefix:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + '\uffff', lo)
+            candidates = self.entries[lo:hi]
+        else:
+            candidates = self.entries
+        if market_type:
+            candidates = [entry for entry in candidates if entry[1] == market_type]
+        ranked = sorted(candidates, key=lambda e: (e[2] != prefix, -self._volume(e[0], e[1])))
+        return [(symbol, market) for symbol, market, _ in ranked[:limit]]
+
+
+# ========== CACHE INDIKATOR ==========
+class QuoteCache:
+    """Snapshot indikator per (symbol, market, timeframe), dihitung ulang hanya kalau candle terakhir berubah"""
+
+    def __init__(self, calculate, max_entries=2000):
+        self.calculate = calculate
+        self.max_entries = max_entries
+        self._data = {}
+
+    def get(self, symbol, market_type, timeframe, candles):
+        if candles is None or len(candles) < 2:
+            return None
+        key = (symbol, market_type, timeframe)
+        stamp = (float(candles[-1][0]), float(candles[-1][4]))
+        cached = self._data.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        try:
+            ind = self.calculate(candles)
+        except Exception as e:
+            print(f"⚠️ Inline indikator {symbol} {timeframe} gagal: {e}")
+            return None
+        if len(self._data) >= self.max_entries:
+            self._data.clear()
+        self._data[key] = (stamp, ind)
+        return ind
+
+
+# ========== FORMAT HASIL ==========
+def format_inline_quote(symbol, market_type, ticker, age, frames):
+    """
+    Hasil 1 pair untuk inline: dict title, description, text (Markdown).
+    frames: list (timeframe, IndicatorSnapshot) dari cache — boleh kosong (hanya harga)
+    """
+    market_label = "SPOT" if market_type == 'spot' else "FUTURES"
+    price = ticker.get('last') if ticker else None
+    if price is None and frames:
+        price = frames[-1][1].current_price
+    change = (ticker or {}).get('percentage')
+    change_text = f" ({change:+.2f}%)" if change is not None else ""
+    price_text = f"${price:.4f}" if price is not None else "-"
+
+    lines = [f"💰 *{symbol}* ({market_label}) {price_text}{change_text}"]
+    short = []
+    for timeframe, ind in frames:
+        lines.append(f"⏱️ {timeframe}: {ind.trend} | RSI {ind.rsi:.0f} | {MACD_LABELS[ind.macd_hist > 0]}")
+        short.append(f"{timeframe} {TREND_SHORT[ind.trend_dir]} RSI {ind.rsi:.0f}")
+    if frames:
+        timeframe, entry = frames[-1]
+        fib_key, fib_price = entry.nearest_fib
+        lines.append(f"📐 Fib terdekat ({timeframe}): {fib_key} ${fib_price:.4f}")
+        short.append(f"Fib {fib_key} ${fib_price:.4f}")
+    else:
+        lines.append("_Indikator belum ada di cache — analisa lengkap lewat chat bot_")
+        short.append("indikator belum di cache")
+    if age is not None:
+        lines.append(f"🕒 _Data cache {age:.0f} detik lalu_")
+
+    return {
+        'title': f"{symbol} {market_label} {price_text}{change_text}",
+        'description': " · ".join(short),
+        'text': "\n".join(lines),
+    }
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test index prefix 2500 pair + format hasil dari snapshot sintetis"""
+    import random
+    import numpy as np
+    from indicators import calculate_indicators
+
+    random.seed(4)
+    names = {''.join(random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(random.randint(2, 6))) for _ in range(1200)}
+    spot = sorted(f"{n}/USDT" for n in names | {'BTC', 'BTCDOM', 'ETH'})
+    futures = sorted(f"{n}/USDT:USDT" for n in list(names)[:600] + ['BTC', 'BTCDOM', 'ETH'])
+    index = SymbolIndex()
+    index.build('spot', spot)
+    index.build('futures', futures)
+    index.update_tickers('spot', {s: {'last': 1.0, 'percentage': 0.5, 'quoteVolume': random.random() * 1e9} for s in spot})
+
+    print("🧪 Testing Inline Query Module\n")
+    print("=" * 60)
+    for text in ('btc', 'BTC/USDT', 'btc f', 'eth spot', 'b', ''):
+        print(f"{text!r:12} -> {index.search(text, 4)}")
+
+    started = time.perf_counter()
+    for _ in range(10000):
+        index.search('b')
+    print(f"Search: {(time.perf_counter() - started) / 10000 * 1e6:.1f} µs / query")
+
+    rng = np.random.default_rng(2)
+    closes = 100 + np.cumsum(rng.normal(0, 0.4, 100))
+    candles = np.c_[np.arange(100) * 300_000, closes, closes + 0.3, closes - 0.3, closes, np.ones(100)]
+    quotes = QuoteCache(calculate_indicators)
+    started = time.perf_counter()
+    for _ in range(10000):
+        frames = [(tf, quotes.get('BTC/USDT', 'spot', tf, candles)) for tf in INLINE_TIMEFRAMES]
+    print(f"Indikator dari cache: {(time.perf_counter() - started) / 10000 * 1e6:.1f} µs / query")
+    result = format_inline_quote('BTC/USDT', 'spot', *index.ticker('BTC/USDT', 'spot'), frames)
+    print(result['title'], '|', result['description'])
+    print(result['text'])
+    print(format_inline_quote('XYZ/USDT', 'spot', None, None, [])['text'])
+    print("\n✅ Test completed!")
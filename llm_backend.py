@@ -0,0 +1,291 @@
+"""
+LLM Backend Module
+- Abstraksi backend: Groq (remote), server lokal OpenAI-compatible (llama.cpp / Ollama / vLLM)
+- Timeout per backend + hedged request (backend cadangan mulai kalau yang utama lambat)
+- Circuit breaker per backend (backend yang sedang down dilewati tanpa menunggu timeout)
+- Fallback terakhir: ringkasan rule-based dari IndicatorSnapshot (selalu berhasil)
+"""
+
+import os
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from signal_engine import compute_signal
+from resilience import get_breaker
+
+GROQ_MODEL = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
+GROQ_TIMEOUT = float(os.getenv('GROQ_TIMEOUT', '20'))
+LOCAL_LLM_URL = os.getenv('LOCAL_LLM_URL')  # contoh: http://127.0.0.1:8080/v1
+LOCAL_LLM_MODEL = os.getenv('LOCAL_LLM_MODEL', 'qwen2.5-3b-instruct')
+LOCAL_LLM_TIMEOUT = float(os.getenv('LOCAL_LLM_TIMEOUT', '30'))
+LLM_BACKENDS = os.getenv('LLM_BACKENDS', 'groq,local')
+LLM_HEDGE_DELAY = float(os.getenv('LLM_HEDGE_DELAY', '8'))
+
+
+# ========== BACKEND ==========
+class LLMBackend:
+    """Base class backend. request = dict: symbol, system, user, frames, max_tokens, temperature"""
+    name = 'base'
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+
+    @property
+    def breaker(self):
+        return get_breaker(self.name)
+
+    def generate(self, request):
+        raise NotImplementedError
+
+
+class GroqBackend(LLMBackend):
+    """Groq cloud (default llama-3.3-70b-versatile)"""
+    name = 'groq'
+
+    def __init__(self, client, model=GROQ_MODEL, timeout=GROQ_TIMEOUT):
+        super().__init__(timeout)
+        # Retry dimatikan: kalau Groq lambat/rate-limit, router langsung pindah backend
+        self.client = client.with_options(timeout=timeout, max_retries=0)
+        self.model = model
+
+    def generate(self, request):
+        started = time.perf_counter()
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": request['system']},
+                {"role": "user", "content": request['user']},
+            ],
+            temperature=request.get('temperature', 0.4),
+            max_completion_tokens=request['max_tokens'],
+            top_p=1,
+            stream=False,
+            stop=None
+        )
+        latency = time.perf_counter() - started
+
+        usage = completion.usage
+        if usage:
+            print(f"🤖 Groq {request['symbol']}: prompt {usage.prompt_tokens} token "
+                  f"(estimasi {request.get('est_tokens')}), completion {usage.completion_tokens} token, {latency:.2f}s")
+        return completion.choices[0].message.content
+
+
+class LocalLLMBackend(LLMBackend):
+    """Model lokal via API OpenAI-compatible (/chat/completions)"""
+    name = 'local'
+
+    def __init__(self, base_url, model=LOCAL_LLM_MODEL, timeout=LOCAL_LLM_TIMEOUT):
+        super().__init__(timeout)
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+
+    def generate(self, request):
+        started = time.perf_counter()
+        response = requests.post(
+            f"{self.base_url}/chat/completions",
+            json={
+                'model': self.model,
+                'messages': [
+                    {"role": "system", "content": request['system']},
+                    {"role": "user", "content": request['user']},
+                ],
+                'temperature': request.get('temperature', 0.4),
+                'max_tokens': request['max_tokens'],
+                'stream': False,
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        print(f"🤖 Local LLM {request['symbol']}: {time.perf_counter() - started:.2f}s")
+        return response.json()['choices'][0]['message']['content']
+
+
+class RuleBasedBackend(LLMBackend):
+    """Ringkasan deterministik dari indikator — tanpa network, dipakai sebagai fallback terakhir"""
+    name = 'rule'
+
+    def __init__(self):
+        super().__init__(timeout=0)
+
+    def generate(self, request):
+        return rule_based_summary(request['frames'])
+
+
+# ========== RULE-BASED SUMMARY ==========
+def rule_based_summary(frames):
+    """Analisa singkat dari trend, RSI, MACD semua timeframe + plan dari signal engine"""
+    lines = ["1. 📊 *KONDISI PASAR*"]
+    for frame in frames:
+        ind = frame['ind']
+        macd = "MACD bullish" if ind.macd_hist > 0 else "MACD bearish"
+        if ind.rsi > 70:
+            rsi = f"RSI {ind.rsi:.0f} overbought"
+        elif ind.rsi < 30:
+            rsi = f"RSI {ind.rsi:.0f} oversold"
+        else:
+            rsi = f"RSI {ind.rsi:.0f}"
+        lines.append(f"   - {frame['tf']} ({frame['role']}): {ind.trend}, {rsi}, {macd}")
+
+    signal = compute_signal(frames)
+    entry = frames[-1]['ind']
+    lines += ["", "2. 📈 *SINYAL*", f"   {signal['direction']}"]
+    lines += [f"   - {reason}" for reason in signal['reasons']]
+
+    if signal['direction'] != 'TUNGGU':
+        tp1, tp2, tp3 = signal['tp']
+        lines += [
+            "",
+            "3. 💰 *ENTRY / EXIT PLAN*",
+            f"   ├─ Entry: ${signal['entry']:.4f}",
+            f"   ├─ TP1: ${tp1:.4f} | TP2: ${tp2:.4f} | TP3: ${tp3:.4f}",
+            f"   ├─ SL: ${signal['sl']:.4f}",
+            f"   └─ R:R 1:{signal['rr'][-1]:.2f}",
+        ]
+    else:
+        fib_key, fib_price = entry.nearest_fib
+        lines += [
+            "",
+            "3. 🎯 *LEVEL PENTING*",
+            f"   ├─ Support: ${entry.support:.4f}",
+            f"   ├─ Resistance: ${entry.resistance:.4f}",
+            f"   └─ Fib terdekat: {fib_key} (${fib_price:.4f})",
+        ]
+
+    lines += ["", "_Analisa otomatis (rule-based) karena AI sedang tidak tersedia._"]
+    return "\n".join(lines)
+
+
+# ========== ROUTER (TIMEOUT + HEDGE + FALLBACK) ==========
+class LLMRouter:
+    """
+    Jalankan backend berurutan dengan hedging:
+    backend berikutnya mulai kalau yang sebelumnya gagal atau belum selesai setelah hedge_delay.
+    Hasil pertama yang sukses dipakai. Total waktu dibatasi timeout backend terlama
+    dan request['deadline'] (epoch, sisa waktu analisa). Backend dengan breaker OPEN dilewati.
+    """
+
+    def __init__(self, backends, fallback=None, hedge_delay=LLM_HEDGE_DELAY):
+        self.backends = backends
+        self.fallback = fallback or RuleBasedBackend()
+        self.hedge_delay = hedge_delay
+        self.pool = ThreadPoolExecutor(max_workers=max(2, len(backends) * 4))
+
+    def generate(self, request):
+        """Return (text, nama_backend)"""
+        budget = max((b.timeout for b in self.backends), default=0) + 1
+        if request.get('deadline'):
+            budget = min(budget, request['deadline'] - time.time())
+        if self.backends and budget > 0:
+            deadline = time.monotonic() + budget
+            queue = list(self.backends)
+            running = {}
+
+            while queue or running:
+                # Budget habis: backend sisa tidak dijalankan (hemat kuota & thread pool)
+                if deadline - time.monotonic() <= 0:
+                    break
+                if queue:
+                    backend = queue.pop(0)
+                    if not backend.breaker.allow():
+                        print(f"⏭️ LLM backend {backend.name} dilewati (breaker OPEN)")
+                        continue
+                    future = self.pool.submit(backend.generate, request)
+                    # Hasil dicatat ke breaker saat call benar-benar selesai (juga yang sudah ditinggal deadline)
+                    future.add_done_callback(partial(_record_outcome, backend.breaker))
+                    running[future] = backend
+                wait_for = self.hedge_delay if queue else deadline - time.monotonic()
+                wait_for = min(wait_for, deadline - time.monotonic())
+                if wait_for <= 0:
+                    break
+
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+                for future in done:
+                    backend = running.pop(future)
+                    try:
+                        text = future.result()
+                        if text:
+                            return text, backend.name
+                    except Exception as e:
+                        print(f"⚠️ LLM backend {backend.name} gagal: {type(e).__name__}: {e}")
+
+            if running:
+                print(f"⚠️ LLM timeout: {', '.join(b.name for b in running.values())}")
+
+        return self.fallback.generate(request), self.fallback.name
+
+
+def _record_outcome(breaker, future):
+    (breaker.record_failure if future.exception() else breaker.record_success)()
+
+
+def build_router(groq_client=None):
+    """Bangun router dari env LLM_BACKENDS (urutan prioritas, misal 'groq,local')"""
+    backends = []
+    for name in [n.strip() for n in LLM_BACKENDS.split(',') if n.strip()]:
+        if name == 'groq' and groq_client is not None:
+            backends.append(GroqBackend(groq_client))
+        elif name == 'local' and LOCAL_LLM_URL:
+            backends.append(LocalLLMBackend(LOCAL_LLM_URL))
+    print(f"🤖 LLM backends: {' -> '.join(b.name for b in backends) or '-'} -> rule")
+    return LLMRouter(backends)
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test router dengan stub server lokal OpenAI-compatible (lambat & cepat)"""
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from indicators import IndicatorSnapshot
+
+    def start_stub(delay, reply):
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                time.sleep(delay)
+                body = json.dumps({'choices': [{'message': {'content': reply}}]}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except BrokenPipeError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{server.server_port}/v1"
+
+    frame = {'tf': '5m', 'role': 'Entry', 'ind': IndicatorSnapshot(
+        trend_dir=1, current_price=104.0, rsi=58.0, ma20=103.5, ma50=102.0,
+        macd_line=1.5, macd_signal=0.3, macd_hist=1.2, bb_upper=106.0, bb_mid=104.0, bb_lower=102.0,
+        support=100.0, resistance=110.0, swing_low=100.0, swing_high=110.0, price_change=0.0, volume=0.0,
+    )}
+    request = {'symbol': 'TEST/USDT', 'system': 'sys', 'user': 'user', 'frames': [frame], 'max_tokens': 50}
+
+    slow = LocalLLMBackend(start_stub(5.0, 'jawaban backend lambat'), timeout=3)
+    slow.name = 'slow'
+    fast = LocalLLMBackend(start_stub(0.2, 'jawaban backend cepat'), timeout=3)
+    fast.name = 'fast'
+
+    print("🧪 Testing LLM Router\n")
+    print("=" * 60)
+    for label, router in [
+        ("Hedge: slow -> fast", LLMRouter([slow, fast], hedge_delay=0.5)),
+        ("Timeout -> rule-based", LLMRouter([slow], hedge_delay=0.5)),
+        ("Deadline analisa 1s", LLMRouter([slow, fast], hedge_delay=2)),
+    ]:
+        started = time.perf_counter()
+        text, source = router.generate(dict(request, deadline=time.time() + 1) if 'Deadline' in label else request)
+        print(f"{label}: [{source}] {time.perf_counter() - started:.2f}s")
+        print(text.splitlines()[0])
+        print("-" * 60)
+    time.sleep(3)
+    print(f"Breaker: {slow.breaker.status()} | {fast.breaker.status()}")
+    print("\n✅ Test completed!")
@@ -1,34 +1,73 @@
 import os
+import sys
+import json
 import time
+import uuid
+import asyncio
 import ccxt
 import numpy as np
-import requests
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from datetime import datetime, timedelta
-from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba_array
+from numpy.lib.stride_tricks import sliding_window_view
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton, InlineQueryResultArticle, InputTextMessageContent
+from telegram.error import BadRequest
+from telegram.ext import Application, ExtBot, CommandHandler, MessageHandler, CallbackQueryHandler, InlineQueryHandler, filters, ContextTypes
 from groq import Groq
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Modul lokal dibaca setelah .env (konfigurasinya dari os.getenv saat import)
+from candles import CandleStore, pick_base_timeframe, timeframe_to_ms
+from prompt_builder import build_prompt, MAX_COMPLETION_TOKENS
+from llm_backend import build_router
+from exchange_budget import WeightBudget, INTERACTIVE, BACKGROUND, SPOT_WEIGHT_LIMIT, FUTURES_WEIGHT_LIMIT
+from shared_state import build_state_backend, acquire_lease, dumps_json, loads_json, dumps_array, loads_array
+from indicators import FIB_KEYS, calculate_indicators, pack_frames
+from signal_engine import compute_signal, format_signal
+from warm_cache import WarmCache, WARM_CHARTS, candle_open_time, pick_hot_pairs, record_request, request_history, seconds_until_close
+from news import NEWS_SERVICE, get_news_snapshot, NewsSnapshot
+from orderbook import OrderBookManager, format_orderbook_levels
+from futures_data import FuturesDataPlane, FuturesTable, FUTURES_REFRESH, format_futures_metrics, format_funding_scanner
+from pair_browser import PairBrowser, ALL_LETTERS, parse_callback as parse_pair_callback
+from sparkline import format_lite_chart
+from inline_query import SymbolIndex, QuoteCache, INLINE_TIMEFRAMES, INLINE_CACHE_TIME, INLINE_REFRESH, format_inline_quote
+from signal_tracker import SignalTracker, TRACKER_REFRESH, format_stats
+from resilience import Deadline, CircuitOpen, get_breaker, ANALYSIS_DEADLINE
+from profiling import ProfileArm, ProfileSession, PROFILE_DIR, PROFILE_MAX_RUNS, recent_profiles
+from checkpoint import CHECKPOINT_PATH, CHECKPOINT_INTERVAL, read_checkpoint, restore_checkpoint, user_settings, write_checkpoint
+from breadth import BreadthEngine, BREADTH_WINDOW, liquid_universe, format_breadth_for_prompt, format_breadth_for_telegram
+from result_store import ResultStore, signal_to_json
+from delivery import build_rate_limiter, compose_caption, join_sections, send_text, send_photo, edit_text, send_concurrently
+
 # ========== KONFIGURASI DARI .ENV ==========
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+# URL Bot API alternatif (misal fake Telegram server lokal untuk testing)
+TELEGRAM_BASE_URL = os.getenv('TELEGRAM_BASE_URL')
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 BINANCE_API_KEY = os.getenv('BINANCE_API_KEY')
 BINANCE_SECRET_KEY = os.getenv('BINANCE_SECRET_KEY')
-# CRYPTOPANIC_API_KEY tidak dipakai lagi, sekarang pakai CoinGecko (gratis)
+# News: CoinGecko (gratis, tanpa key) + CryptoPanic kalau CRYPTOPANIC_API_KEY diisi (dibaca di news.py)
 
-# Inisialisasi Groq Client
+# Inisialisasi Groq Client + router LLM (Groq -> model lokal -> rule-based)
 groq_client = Groq(api_key=GROQ_API_KEY)
+llm_router = build_router(groq_client)
+
+# Timeout HTTP ccxt (ms) — default ccxt 10 detik terlalu lama untuk analisa interaktif
+BINANCE_TIMEOUT_MS = int(os.getenv('BINANCE_TIMEOUT_MS', '6000'))
 
 # Inisialisasi Exchange Binance
 exchange_spot = ccxt.binance({
     'apiKey': BINANCE_API_KEY,
     'secret': BINANCE_SECRET_KEY,
     'enableRateLimit': True,
+    'timeout': BINANCE_TIMEOUT_MS,
     'options': {'defaultType': 'spot'}
 })
 
@@ -36,26 +75,133 @@ exchange_futures = ccxt.binance({
     'apiKey': BINANCE_API_KEY,
     'secret': BINANCE_SECRET_KEY,
     'enableRateLimit': True,
+    'timeout': BINANCE_TIMEOUT_MS,
     'options': {'defaultType': 'future'}
 })
 
-# ========== CACHE & COOLDOWN ==========
-PAIR_CACHE = {'spot': [], 'futures': [], 'last_update': None}
-USER_COOLDOWN = {}
+# Semua call ccxt lewat budget weight Binance (prioritas interactive > background, anti 429/418)
+# + circuit breaker per market (Binance down -> langsung gagal, analisa pakai candle cache)
+BINANCE_BUDGET = {
+    'spot': WeightBudget(exchange_spot, 'spot', SPOT_WEIGHT_LIMIT, get_breaker('binance_spot')),
+    'futures': WeightBudget(exchange_futures, 'futures', FUTURES_WEIGHT_LIMIT, get_breaker('binance_futures')),
+}
+
+# Style chart global (dark), dipakai semua Figure
+plt.style.use('dark_background')
+
+# ========== PROFIL ANALISA ==========
+# Urutan timeframe = urutan panel chart (atas -> bawah), timeframe terakhir = timeframe entry
+ANALYSIS_PROFILES = {
+    'scalping': {
+        'label': 'Scalping',
+        'timeframes': [('15m', 'Trend'), ('5m', 'Entry')],
+    },
+    'intraday': {
+        'label': 'Intraday',
+        'timeframes': [('1h', 'Konteks'), ('15m', 'Trend'), ('5m', 'Entry')],
+    },
+    'swing': {
+        'label': 'Swing',
+        'timeframes': [('4h', 'Trend'), ('1h', 'Entry')],
+    },
+}
+DEFAULT_PROFILE = 'scalping'
+
+def timeframe_label(timeframe):
+    """'15m' -> '15 Menit', '4h' -> '4 Jam'"""
+    units = {'m': 'Menit', 'h': 'Jam', 'd': 'Hari'}
+    return f"{timeframe[:-1]} {units.get(timeframe[-1], timeframe[-1])}"
+
+# ========== CACHE & COOLDOWN (SHARED ANTAR WORKER) ==========
+# Cooldown, cache pair/ticker/candle & antrian analisa ada di state backend (memory / redis)
+STATE = build_state_backend()
 COOLDOWN_SECONDS = 12
+PAIR_CACHE_TTL = 600        # 10 menit
+TICKER_CACHE_TTL = 30       # snapshot fetch_tickers
+CANDLE_SHARED_TTL = 3600    # buffer candle di state backend
+CANDLE_SHARED_FRESH = 10    # candle dari worker lain < 10 detik dipakai tanpa fetch
+NEWS_WAIT_CAP = 8           # detik maksimal menunggu news dalam analisa (sisanya untuk chart + AI)
+STALE_CANDLES = 2           # candle entry terakhir lebih tua dari N timeframe -> ditandai data cache
+
+# ========== MODE BOT (POLLING / WEBHOOK) ==========
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')            # URL publik https, contoh: https://bot.domain.com
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8443'))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+# Jumlah update yang diproses bersamaan + slot analisa berat per proses,
+# supaya menu tetap responsif walaupun banyak analisa panjang
+CONCURRENT_UPDATES = int(os.getenv('CONCURRENT_UPDATES', '64'))
+MAX_CONCURRENT_ANALYSES = int(os.getenv('MAX_CONCURRENT_ANALYSES', '8'))
+# Analisa lewat antrian job: diproses di proses bot sendiri dan/atau `python main.py worker`
+ANALYSIS_QUEUE = 'analysis'
+RUN_ANALYSIS_IN_BOT = os.getenv('RUN_ANALYSIS_IN_BOT', '1') == '1'
+# Hanya update yang memang di-handle
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY, Update.INLINE_QUERY]
+
+# Lewati LLM kalau sinyal cepat = TUNGGU (timeframe tidak selaras)
+SKIP_LLM_ON_WAIT = os.getenv('SKIP_LLM_ON_WAIT', '1') == '1'
+
+# Admin (user id Telegram, pisah koma): akses /prof
+ADMIN_USER_IDS = {int(uid) for uid in os.getenv('ADMIN_USER_IDS', '').split(',') if uid.strip()}
+# Profil N analisa berikutnya (/prof N atau env PROFILE_NEXT); job yang diprofil membawa flag 'profiling'
+PROFILE_ARM = ProfileArm()
+
+# Buffer candle base per symbol (timeframe lain di-resample dari sini)
+CANDLE_STORE = CandleStore()
+# Warm cache hot pair (candle + indikator [+ chart]) di proses yang menjalankan analisa
+WARM_CACHE = WarmCache()
+WARM_CACHE_ENABLED = os.getenv('WARM_CACHE_ENABLED', '1') == '1'
+WARM_CONCURRENCY = 2
+# Hasil analisa persisten (dedup per candle + /history)
+RESULT_STORE = ResultStore()
+# Order book lokal (snapshot REST 1x + diff WebSocket) untuk pair yang diminta
+ORDERBOOK_SNAPSHOT_LIMIT = 1000
+# Market breadth (1 proses leader menghitung, hasil dibagi lewat state backend)
+BREADTH = BreadthEngine()
+BREADTH_REFRESH = 60            # detik
+BREADTH_BOOTSTRAP_BATCH = 40    # symbol di-bootstrap per putaran (weight kecil, prioritas background)
+BREADTH_TTL = 600
+# Data futures (funding semua perpetual 1 bulk fetch, OI top volume, likuidasi stream) dibagi lewat state backend
+FUTURES_TTL = 600
+# Gaya chart: candle (candlestick + volume) / line (garis close)
+CHART_STYLE = os.getenv('CHART_STYLE', 'candle')
+# Mode chart per user: full (PNG), compact (JPEG resolusi kecil), lite (teks + sparkline, tanpa gambar)
+CHART_MODES = {
+    'full': "🖼️ Full (PNG)",
+    'compact': "🗜️ Hemat (JPEG kecil)",
+    'lite': "📝 Lite (teks + sparkline)",
+}
+DEFAULT_CHART_MODE = os.getenv('DEFAULT_CHART_MODE', 'full')
+CHART_COMPACT_DPI = int(os.getenv('CHART_COMPACT_DPI', '72'))
+CHART_JPEG_QUALITY = int(os.getenv('CHART_JPEG_QUALITY', '60'))
+HISTORY_PAGE_SIZE = 5
+MAX_FETCH_LIMIT = 1000
+
+# Halaman pair browser (dihitung 1x per refresh cache pair, dipakai semua user)
+PAIR_BROWSER = PairBrowser(max_age=PAIR_CACHE_TTL)
+
+# Tracker hasil sinyal (TP/SL) — dijalankan 1 leader, state & statistik dibagi lewat state backend
+SIGNAL_TRACKER = SignalTracker()
+_tracker_loaded = {'done': False}
+
+# Inline query (@bot btc): index symbol + indikator dari cache saja
+INLINE_INDEX = SymbolIndex()
+INLINE_QUOTES = QuoteCache(calculate_indicators)
+
+# Thread pool untuk fetch exchange paralel (ccxt sync)
+FETCH_POOL = ThreadPoolExecutor(max_workers=8)
 
 # ========== FUNGSI AMBIL SEMUA PAIR (DENGAN CACHE) ==========
-def get_all_pairs(market_type='spot'):
-    """Ambil semua pair USDT dari Binance dengan caching 10 menit"""
-    now = datetime.now()
-    # Kalau cache masih fresh (< 10 menit), pakai cache
-    if (PAIR_CACHE[market_type] and PAIR_CACHE['last_update']
-            and (now - PAIR_CACHE['last_update']) < timedelta(minutes=10)):
-        return PAIR_CACHE[market_type]
+def get_all_pairs(market_type='spot', priority=INTERACTIVE):
+    """Ambil semua pair USDT dari Binance dengan caching 10 menit (shared antar worker)"""
+    cached = loads_json(STATE.get(f"pairs:{market_type}"))
+    if cached:
+        return cached
 
     try:
-        exchange = exchange_spot if market_type == 'spot' else exchange_futures
-        markets = exchange.load_markets()
+        markets = BINANCE_BUDGET[market_type].call('load_markets', priority=priority)
 
         usdt_pairs = []
         for symbol, market in markets.items():
@@ -68,8 +214,7 @@ def get_all_pairs(market_type='spot'):
         usdt_pairs.sort()
 
         # Update cache
-        PAIR_CACHE[market_type] = usdt_pairs
-        PAIR_CACHE['last_update'] = now
+        STATE.set(f"pairs:{market_type}", dumps_json(usdt_pairs), ttl=PAIR_CACHE_TTL)
 
         print(f"✅ Loaded {len(usdt_pairs)} {market_type.upper()} pairs")
         return usdt_pairs
@@ -81,324 +226,243 @@ def get_all_pairs(market_type='spot'):
             'SOL/USDT', 'ADA/USDT', 'DOGE/USDT', 'AVAX/USDT'
         ]
 
+# ========== SNAPSHOT TICKER (DENGAN CACHE) ==========
+def get_ticker_snapshot(market_type='spot', priority=INTERACTIVE):
+    """Snapshot semua ticker: 1x fetch_tickers, cache 30 detik (shared antar worker)"""
+    key = f"tickers:{market_type}"
+    cached = loads_json(STATE.get(key))
+    if cached is not None:
+        return cached
+
+    tickers = BINANCE_BUDGET[market_type].call('fetch_tickers', priority=priority)
+    # Simpan field yang dipakai saja (payload kecil untuk cache bersama)
+    snapshot = {
+        symbol: {'last': t.get('last'), 'percentage': t.get('percentage'), 'quoteVolume': t.get('quoteVolume')}
+        for symbol, t in tickers.items()
+    }
+    STATE.set(key, dumps_json(snapshot), ttl=TICKER_CACHE_TTL)
+    return snapshot
+
+# ========== ORDER BOOK ==========
+def fetch_orderbook_snapshot(symbol, market_type):
+    """Snapshot L2 REST (sekali per sync stream) -> (bids, asks, lastUpdateId)"""
+    book = BINANCE_BUDGET[market_type].call('fetch_order_book', symbol, limit=ORDERBOOK_SNAPSHOT_LIMIT)
+    return book['bids'], book['asks'], book['nonce']
+
+ORDERBOOKS = OrderBookManager(fetch_orderbook_snapshot)
+
+# ========== DATA FUTURES (FUNDING / OI / LIKUIDASI) ==========
+FUTURES_DATA = FuturesDataPlane(
+    lambda: BINANCE_BUDGET['futures'].call('fetch_funding_rates', priority=BACKGROUND),
+    lambda symbol: BINANCE_BUDGET['futures'].call('fetch_open_interest', symbol, priority=BACKGROUND),
+)
+# Tabel hasil decode terakhir di proses ini (decode ulang hanya kalau versi di state berubah)
+_futures_table = {'version': None, 'table': None}
+
+def get_futures_table():
+    """Tabel futures terbaru dari state backend (1 get kecil per request, decode hanya saat versi baru)"""
+    version = STATE.get('futures:version')
+    if version is None:
+        return None
+    if version != _futures_table['version']:
+        raw = STATE.get('futures:table')
+        if raw is None:
+            return None
+        _futures_table['table'] = FuturesTable.from_bytes(raw)
+        _futures_table['version'] = version
+    return _futures_table['table']
+
 # ========== FUNGSI AMBIL DATA OHLCV ==========
-def get_ohlcv_data(symbol, market_type='spot', timeframe='5m', limit=100):
-    """Ambil data OHLCV dari Binance"""
+def get_ohlcv_data(symbol, market_type='spot', timeframe='5m', limit=100, since=None, priority=INTERACTIVE, timeout=None):
+    """Ambil data OHLCV dari Binance (lewat budget weight; timeout = batas tunggu budget)"""
     try:
-        exchange = exchange_spot if market_type == 'spot' else exchange_futures
-        ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+        ohlcv = BINANCE_BUDGET[market_type].call(
+            'fetch_ohlcv', symbol, timeframe, since=since, limit=limit, priority=priority, timeout=timeout
+        )
         return ohlcv
     except Exception as e:
         print(f"Error fetching OHLCV [{timeframe}]: {e}")
         return None
 
-# ========== FUNGSI AMBIL NEWS DARI COINGECKO ==========
-def get_crypto_news(symbol):
+def refresh_base_candles(symbol, market_type, base_tf, needed, priority=INTERACTIVE, timeout=None):
     """
-    Ambil news dari CoinGecko - Gratis tanpa API key!
-    Menggunakan: trending coins + global market data
+    Update buffer candle base: pakai buffer dari worker lain kalau masih fresh,
+    fetch incremental kalau buffer sudah ada, full kalau belum.
+    Fetch gagal (Binance down / breaker OPEN) -> buffer lama dipakai kalau ada
     """
-    try:
-        coin = symbol.split('/')[0].lower()
-        
-        # 1. Get trending coins
-        trending_url = "https://api.coingecko.com/api/v3/search/trending"
-        response = requests.get(trending_url, timeout=5)
-        
-        news_list = []
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Cari coin yang diminta di trending
-            if 'coins' in data:
-                for item in data['coins'][:10]:
-                    coin_data = item.get('item', {})
-                    symbol_match = coin_data.get('symbol', '').lower()
-                    name_match = coin_data.get('name', '').lower()
-                    
-                    # Jika coin match dengan yang dicari
-                    if coin in symbol_match or coin in name_match:
-                        rank = coin_data.get('market_cap_rank', 'N/A')
-                        score = coin_data.get('score', 0)
-                        
-                        # Determine sentiment berdasarkan trending score
-                        if score >= 5:
-                            sentiment = 'bullish'
-                        elif score >= 3:
-                            sentiment = 'neutral'
-                        else:
-                            sentiment = 'bearish'
-                        
-                        news_list.append({
-                            'title': f"{coin_data.get('name')} is trending on CoinGecko (Score: {score})",
-                            'sentiment': sentiment,
-                            'source': 'CoinGecko Trending',
-                            'rank': rank
-                        })
-                
-                # Jika coin tidak trending, ambil data umum trending
-                if not news_list:
-                    # Ambil top 3 trending untuk konteks market
-                    for idx, item in enumerate(data['coins'][:3], 1):
-                        coin_data = item.get('item', {})
-                        news_list.append({
-                            'title': f"#{idx} Trending: {coin_data.get('name')} ({coin_data.get('symbol')})",
-                            'sentiment': 'neutral',
-                            'source': 'CoinGecko Trending'
-                        })
-        
-        # 2. Get global market data untuk context
-        try:
-            global_url = "https://api.coingecko.com/api/v3/global"
-            global_response = requests.get(global_url, timeout=5)
-            
-            if global_response.status_code == 200:
-                global_data = global_response.json().get('data', {})
-                
-                # Market cap change
-                market_cap_change = global_data.get('market_cap_change_percentage_24h_usd', 0)
-                btc_dominance = global_data.get('market_cap_percentage', {}).get('btc', 0)
-                
-                # Sentiment berdasarkan market cap change
-                if market_cap_change > 2:
-                    market_sentiment = 'bullish'
-                    market_emoji = '📈'
-                elif market_cap_change < -2:
-                    market_sentiment = 'bearish'
-                    market_emoji = '📉'
-                else:
-                    market_sentiment = 'neutral'
-                    market_emoji = '➡️'
-                
-                news_list.append({
-                    'title': f"{market_emoji} Global Market Cap 24h: {market_cap_change:+.2f}% | BTC Dominance: {btc_dominance:.1f}%",
-                    'sentiment': market_sentiment,
-                    'source': 'CoinGecko Global'
-                })
-        except:
-            pass
-        
-        print(f"✅ CoinGecko: {len(news_list)} news items")
-        return news_list[:5]  # Limit 5 items
-        
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ CoinGecko API tidak dapat diakses: {type(e).__name__}")
-        return []
-    except Exception as e:
-        print(f"⚠️ Error fetching CoinGecko news: {e}")
-        return []
-
-def format_news_for_prompt(news_list):
-    """Format news untuk AI prompt"""
-    if not news_list:
-        return "⚠️ News tidak tersedia saat ini. Fokus pada analisa teknikal saja."
-    
-    formatted = ""
-    for i, news in enumerate(news_list, 1):
-        sentiment = news.get('sentiment', 'neutral')
-        
-        if sentiment == 'bullish':
-            emoji = "BULLISH ✅"
-        elif sentiment == 'bearish':
-            emoji = "BEARISH ⚠️"
-        else:
-            emoji = "NETRAL ➡️"
-        
-        title = news.get('title', 'No title')
-        formatted += f"{i}. [{emoji}] {title}\n"
-    
-    return formatted
-
-def format_news_for_telegram(news_list):
-    """Format news untuk Telegram"""
-    if not news_list:
-        return "📰 *NEWS:*\n⚠️ News tidak tersedia saat ini.\nAnalisa fokus pada teknikal."
-    
-    msg = "📰 *MARKET NEWS (CoinGecko):*\n"
-    for i, news in enumerate(news_list, 1):
-        sentiment = news.get('sentiment', 'neutral')
-        
-        if sentiment == 'bullish':
-            emoji = "🟢 Bullish"
-        elif sentiment == 'bearish':
-            emoji = "🔴 Bearish"
-        else:
-            emoji = "🟡 Netral"
-        
-        title = news.get('title', 'No title')
-        
-        msg += f"\n{i}. {emoji}\n"
-        msg += f"   {title}\n"
-    
-    return msg
+    key = f"candles:{market_type}:{symbol}:{base_tf}"
+    shared, fetched_at = loads_array(STATE.get(key))
+    if shared is not None and len(shared) >= needed:
+        local = CANDLE_STORE.get(symbol, market_type, base_tf)
+        if local is None or shared[-1][0] >= local[-1][0]:
+            CANDLE_STORE.set(symbol, market_type, base_tf, shared)
+        if time.time() - fetched_at < CANDLE_SHARED_FRESH:
+            return CANDLE_STORE.get(symbol, market_type, base_tf)
+
+    data = None
+    cached = CANDLE_STORE.get(symbol, market_type, base_tf)
+    if cached is not None and len(cached) >= needed:
+        # Jumlah candle yang hilang sejak candle terakhir di buffer (termasuk candle parsial)
+        missing = int((time.time() * 1000 - cached[-1][0]) // timeframe_to_ms(base_tf)) + 1
+        if missing < needed:
+            fresh = get_ohlcv_data(
+                symbol, market_type, base_tf, limit=missing + 1, since=int(cached[-1][0]), priority=priority,
+                timeout=timeout
+            )
+            if not fresh:
+                return _stale_candles(symbol, market_type, base_tf)
+            data = CANDLE_STORE.merge(symbol, market_type, base_tf, fresh)
+
+    if data is None:
+        fresh = get_ohlcv_data(symbol, market_type, base_tf, limit=needed, priority=priority, timeout=timeout)
+        if not fresh:
+            return _stale_candles(symbol, market_type, base_tf)
+        data = CANDLE_STORE.set(symbol, market_type, base_tf, fresh)
+
+    STATE.set(key, dumps_array(data), ttl=CANDLE_SHARED_TTL)
+    return data
+
+def _stale_candles(symbol, market_type, base_tf):
+    """Fallback buffer candle lama (lokal) saat fetch gagal, None kalau belum pernah ada"""
+    data = CANDLE_STORE.get(symbol, market_type, base_tf)
+    if data is not None and len(data):
+        age = time.time() - data[-1][0] / 1000
+        print(f"⚠️ Candle {symbol} {base_tf}: fetch gagal, pakai cache ({age / 60:.0f} menit)")
+        return data
+    return None
+
+def get_multi_timeframe_data(symbol, market_type='spot', timeframes=('15m', '5m'), limit=100, priority=INTERACTIVE, timeout=None):
+    """
+    Ambil candle base SEKALI per symbol, lalu resample ke semua timeframe yang diminta.
+    Timeframe yang butuh base terlalu banyak (misal 4h dari 5m) di-fetch langsung.
+    Return: {timeframe: array OHLCV} atau None kalau gagal
+    """
+    base_tf = pick_base_timeframe(timeframes)
+    base_ms = timeframe_to_ms(base_tf)
+
+    resampled, direct = [], []
+    for tf in timeframes:
+        # +1 bucket cadangan karena candle pertama hasil resample bisa tidak lengkap
+        needed = (limit + 1) * (timeframe_to_ms(tf) // base_ms)
+        (resampled if needed <= MAX_FETCH_LIMIT else direct).append((tf, needed))
+
+    # Fetch base + timeframe direct secara paralel
+    jobs = {}
+    if resampled:
+        jobs[base_tf] = FETCH_POOL.submit(
+            refresh_base_candles, symbol, market_type, base_tf, max(n for _, n in resampled), priority, timeout
+        )
+    for tf, _ in direct:
+        jobs[tf] = FETCH_POOL.submit(refresh_base_candles, symbol, market_type, tf, limit, priority, timeout)
+    results = {tf: job.result() for tf, job in jobs.items()}
+    if any(data is None for data in results.values()):
+        return None
 
-# ========== FUNGSI HITUNG INDIKATOR TEKNIKAL ==========
-def calculate_indicators(ohlcv_data):
-    """Hitung semua indikator teknikal untuk scalping"""
-    closes = np.array([x[4] for x in ohlcv_data], dtype=float)
-    highs = np.array([x[2] for x in ohlcv_data], dtype=float)
-    lows  = np.array([x[3] for x in ohlcv_data], dtype=float)
-    volumes = np.array([x[5] for x in ohlcv_data], dtype=float)
-
-    # ----- Moving Averages (rolling, ambil nilai terakhir) -----
-    ma20 = float(np.convolve(closes, np.ones(20)/20, mode='valid')[-1]) if len(closes) >= 20 else float(closes[-1])
-    ma50 = float(np.convolve(closes, np.ones(50)/50, mode='valid')[-1]) if len(closes) >= 50 else float(closes[-1])
-
-    # ----- Support & Resistance (dari 20 candle terakhir) -----
-    support   = float(np.min(lows[-20:]))
-    resistance = float(np.max(highs[-20:]))
-
-    # ----- Trend -----
-    if closes[-1] > ma20 > ma50:
-        trend = "Uptrend (Naik) 📈"
-    elif closes[-1] < ma20 < ma50:
-        trend = "Downtrend (Turun) 📉"
-    else:
-        trend = "Sideways (Datar) ↔️"
-
-    # ----- RSI 14 (PERBAIKAN: pakai data terakhir, bukan pertama) -----
-    deltas = np.diff(closes)
-    seed = deltas[-14:]  # 14 candle TERAKHIR
-    up   = seed[seed >= 0].sum() / 14
-    down = -seed[seed < 0].sum() / 14
-    rs   = up / down if down != 0 else 0
-    rsi  = 100 - (100 / (1 + rs))
-
-    # ----- MACD (12, 26, 9) -----
-    if len(closes) >= 26:
-        ema12 = float(closes[-1])  # seed
-        ema26 = float(closes[-1])
-        alpha12 = 2.0 / (12 + 1)
-        alpha26 = 2.0 / (26 + 1)
-        for c in closes[-26:]:
-            ema12 = alpha12 * c + (1 - alpha12) * ema12
-            ema26 = alpha26 * c + (1 - alpha26) * ema26
-        macd_line   = ema12 - ema26
-        # Signal line (EMA 9 dari MACD) — simplified: pakai rata-rata 9 nilai terakhir
-        # Untuk akurasi lebih, buat array MACD terakhir
-        macd_values = []
-        ema12_t = float(closes[0])
-        ema26_t = float(closes[0])
-        for c in closes:
-            ema12_t = alpha12 * c + (1 - alpha12) * ema12_t
-            ema26_t = alpha26 * c + (1 - alpha26) * ema26_t
-            macd_values.append(ema12_t - ema26_t)
-        macd_values = np.array(macd_values)
-        # Signal = EMA 9 dari macd_values
-        alpha9 = 2.0 / (9 + 1)
-        signal = macd_values[0]
-        for m in macd_values:
-            signal = alpha9 * m + (1 - alpha9) * signal
-        macd_signal = float(signal)
-        macd_hist   = float(macd_line - macd_signal)
-    else:
-        macd_line   = 0.0
-        macd_signal = 0.0
-        macd_hist   = 0.0
-
-    # ----- Bollinger Bands (20 period, 2 std) -----
-    if len(closes) >= 20:
-        bb_mid   = float(np.mean(closes[-20:]))
-        bb_std   = float(np.std(closes[-20:], ddof=0))
-        bb_upper = bb_mid + 2 * bb_std
-        bb_lower = bb_mid - 2 * bb_std
+    frames = {}
+    for tf, _ in resampled:
+        frames[tf] = CANDLE_STORE.get_timeframe(symbol, market_type, base_tf, tf, limit)
+    for tf, _ in direct:
+        frames[tf] = results[tf][-limit:]
+
+    return frames
+
+# ========== FUNGSI BUAT MULTI TIMEFRAME CHART ==========
+def _candle_x(timestamps):
+    """Timestamp ms -> angka tanggal matplotlib (waktu lokal, seperti datetime.fromtimestamp)"""
+    return np.asarray(timestamps, dtype=float) / 86_400_000 + time.localtime().tm_gmtoff / 86400
+
+def _draw_candles(ax, x, opens, highs, lows, closes, width):
+    """Semua wick (1 LineCollection) + body (1 PolyCollection) untuk 1 panel"""
+    up = closes >= opens
+    colors = np.where(up[:, None], to_rgba_array('#26a69a'), to_rgba_array('#ef5350'))
+    wicks = np.stack([np.c_[x, lows], np.c_[x, highs]], axis=1)
+    ax.add_collection(LineCollection(wicks, colors=colors, linewidths=0.8, zorder=3))
+
+    # Body minimal setinggi 0.05% harga supaya doji tetap terlihat
+    bottom = np.minimum(opens, closes)
+    top = np.maximum(np.maximum(opens, closes), bottom + closes * 0.0005)
+    left, right = x - width / 2, x + width / 2
+    bodies = np.stack([np.c_[left, bottom], np.c_[left, top], np.c_[right, top], np.c_[right, bottom]], axis=1)
+    ax.add_collection(PolyCollection(bodies, facecolors=colors, edgecolors=colors, linewidths=0.5, zorder=4))
+    ax.autoscale_view()
+    return colors
+
+def _draw_volume(ax, x, volumes, colors, width):
+    """Bar volume (1 PolyCollection) + MA20 volume"""
+    left, right = x - width / 2, x + width / 2
+    zeros = np.zeros_like(volumes)
+    bars = np.stack([np.c_[left, zeros], np.c_[left, volumes], np.c_[right, volumes], np.c_[right, zeros]], axis=1)
+    ax.add_collection(PolyCollection(bars, facecolors=colors[:, :3], alpha=0.6, linewidths=0))
+    ax.autoscale_view()
+    if len(volumes) >= 20:
+        ax.plot(x[19:], np.convolve(volumes, np.ones(20) / 20, mode='valid'), color='#FFD700', linewidth=1, label='Vol MA20')
+        ax.legend(loc='upper left', fontsize=7, framealpha=0.7)
+    ax.set_ylim(0, volumes.max() * 1.15 if volumes.max() > 0 else 1)
+    ax.set_ylabel('Volume', fontsize=9, color='white')
+
+def create_multi_chart(frames, symbol, market_type, profile='scalping', prefix='chart', style=None, compact=False):
+    """
+    Buat chart N panel (1 panel per timeframe, urutan sesuai profil) dengan Fibonacci & BB.
+    style 'candle': candlestick + subpanel volume (collection vectorized, bukan 1 artist per bar),
+    style 'line': garis harga close. Pakai Figure langsung (tanpa pyplot) supaya aman dijalankan di thread.
+    compact=True: JPEG dpi kecil (untuk koneksi lambat) menggantikan PNG dpi 130
+    """
+    style = style or CHART_STYLE
+    candle = style == 'candle'
+    fig = Figure(figsize=(16, 5 * len(frames) + (1.2 * len(frames) if candle else 0)))
+    if candle:
+        # Per timeframe: panel harga + panel volume menempel di bawahnya
+        panels = [cell.subgridspec(2, 1, height_ratios=[4, 1], hspace=0.05)
+                  for cell in fig.add_gridspec(len(frames), 1, hspace=0.22)]
+        axes = [fig.add_subplot(panel[0]) for panel in panels]
+        volume_axes = [fig.add_subplot(panel[1], sharex=ax) for panel, ax in zip(panels, axes)]
     else:
-        bb_mid   = float(closes[-1])
-        bb_upper = bb_mid
-        bb_lower = bb_mid
-
-    # ----- Fibonacci Retracement & Extension -----
-    # Swing High & Swing Low dari 20 candle terakhir
-    swing_high = float(np.max(highs[-20:]))
-    swing_low  = float(np.min(lows[-20:]))
-    fib_range  = swing_high - swing_low
-
-    fib_levels = {
-        '0.000': swing_low,
-        '0.236': swing_low + fib_range * 0.236,
-        '0.382': swing_low + fib_range * 0.382,
-        '0.500': swing_low + fib_range * 0.500,
-        '0.618': swing_low + fib_range * 0.618,
-        '0.786': swing_low + fib_range * 0.786,
-        '1.000': swing_high,
-        # Extension levels
-        '1.272': swing_low + fib_range * 1.272,
-        '1.618': swing_low + fib_range * 1.618,
-    }
-
-    # Cari level Fib terdekat dari harga sekarang
-    current_price = float(closes[-1])
-    nearest_fib = min(fib_levels.items(), key=lambda x: abs(x[1] - current_price))
-
-    # Price change
-    price_change = ((closes[-1] - closes[-24]) / closes[-24] * 100) if len(closes) >= 24 else 0.0
-
-    return {
-        'current_price': current_price,
-        'ma20': ma20,
-        'ma50': ma50,
-        'support': support,
-        'resistance': resistance,
-        'trend': trend,
-        'rsi': float(rsi),
-        'macd_line': macd_line,
-        'macd_signal': macd_signal,
-        'macd_hist': macd_hist,
-        'bb_upper': bb_upper,
-        'bb_mid': bb_mid,
-        'bb_lower': bb_lower,
-        'fib_levels': fib_levels,
-        'nearest_fib': nearest_fib,
-        'swing_high': swing_high,
-        'swing_low': swing_low,
-        'price_change': float(price_change),
-        'closes': closes,
-        'highs': highs,
-        'lows': lows,
-        'volume': float(np.mean(volumes[-20:]))
-    }
-
-# ========== FUNGSI BUAT DUAL TIMEFRAME CHART ==========
-def create_dual_chart(ohlcv_5m, ohlcv_15m, ind_5m, ind_15m, symbol, market_type):
-    """Buat chart dual timeframe: 15m (atas) + 5m (bawah) dengan Fibonacci & BB"""
-    plt.style.use('dark_background')
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 10), gridspec_kw={'height_ratios': [1, 1]})
+        axes = fig.subplots(len(frames), 1, squeeze=False)[:, 0]
+        volume_axes = [None] * len(frames)
     fig.patch.set_facecolor('#0e1117')
 
     market_label = "SPOT" if market_type == 'spot' else "FUTURES"
 
-    # ---------- Helper: plot satu timeframe ----------
-    def plot_tf(ax, ohlcv, ind, tf_label):
-        timestamps = [x[0] for x in ohlcv]
-        closes = ind['closes']
-        dates  = [datetime.fromtimestamp(ts / 1000) for ts in timestamps]
+    def style_axis(ax):
+        ax.grid(True, alpha=0.2, linestyle=':')
+        ax.set_facecolor('#0e1117')
+        ax.tick_params(colors='white')
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m %H:%M'))
 
-        # Price line
-        ax.plot(dates, closes, color='#00ff00', linewidth=2, zorder=3, label='Harga')
+    # ---------- Helper: plot satu timeframe ----------
+    def plot_tf(ax, volume_ax, ohlcv, ind, tf_label):
+        candles = np.asarray(ohlcv, dtype=float)
+        x = _candle_x(candles[:, 0])
+        closes = ind.closes
+        width = (x[1] - x[0]) * 0.7 if len(x) > 1 else 0.0005
+
+        if volume_ax is not None:
+            colors = _draw_candles(ax, x, candles[:, 1], candles[:, 2], candles[:, 3], closes, width)
+            _draw_volume(volume_ax, x, candles[:, 5], colors, width)
+            style_axis(volume_ax)
+            ax.tick_params(labelbottom=False)
+        else:
+            ax.plot(x, closes, color='#00ff00', linewidth=2, zorder=3, label='Harga')
 
-        # MA20 rolling
+        # MA20 / MA50 rolling
         if len(closes) >= 20:
-            ma20_arr = np.convolve(closes, np.ones(20)/20, mode='valid')
-            ma20_dates = dates[19:]
-            ax.plot(ma20_dates, ma20_arr, color='#FFD700', linestyle='--', linewidth=1.5, label='MA20', zorder=2)
-
-        # MA50 rolling
+            ax.plot(x[19:], np.convolve(closes, np.ones(20)/20, mode='valid'),
+                    color='#FFD700', linestyle='--', linewidth=1.5, label='MA20', zorder=2)
         if len(closes) >= 50:
-            ma50_arr = np.convolve(closes, np.ones(50)/50, mode='valid')
-            ma50_dates = dates[49:]
-            ax.plot(ma50_dates, ma50_arr, color='#FF6347', linestyle='--', linewidth=1.5, label='MA50', zorder=2)
+            ax.plot(x[49:], np.convolve(closes, np.ones(50)/50, mode='valid'),
+                    color='#FF6347', linestyle='--', linewidth=1.5, label='MA50', zorder=2)
 
-        # Bollinger Bands
+        # Bollinger Bands (std rolling vectorized)
         if len(closes) >= 20:
-            bb_mid_arr   = np.convolve(closes, np.ones(20)/20, mode='valid')
-            bb_std_arr   = np.array([np.std(closes[i:i+20], ddof=0) for i in range(len(closes)-19)])
+            windows      = sliding_window_view(closes, 20)
+            bb_mid_arr   = windows.mean(axis=1)
+            bb_std_arr   = windows.std(axis=1)
             bb_upper_arr = bb_mid_arr + 2 * bb_std_arr
             bb_lower_arr = bb_mid_arr - 2 * bb_std_arr
-            bb_dates     = dates[19:]
-            ax.plot(bb_dates, bb_upper_arr, color='#8888ff', linestyle=':', linewidth=1, label='BB Upper')
-            ax.plot(bb_dates, bb_lower_arr, color='#8888ff', linestyle=':', linewidth=1, label='BB Lower')
-            ax.fill_between(bb_dates, bb_lower_arr, bb_upper_arr, alpha=0.08, color='#8888ff')
+            bb_x         = x[19:]
+            ax.plot(bb_x, bb_upper_arr, color='#8888ff', linestyle=':', linewidth=1, label='BB Upper')
+            ax.plot(bb_x, bb_lower_arr, color='#8888ff', linestyle=':', linewidth=1, label='BB Lower')
+            ax.fill_between(bb_x, bb_lower_arr, bb_upper_arr, alpha=0.08, color='#8888ff')
 
         # Fibonacci levels (horizontal dashed)
         fib_colors = {
@@ -406,167 +470,85 @@ def create_dual_chart(ohlcv_5m, ohlcv_15m, ind_5m, ind_15m, symbol, market_type)
             '0.618': '#00ccff', '0.786': '#ff44aa',
             '1.272': '#44ff44', '1.618': '#44ff44'
         }
-        for level_name, level_val in ind['fib_levels'].items():
+        for level_name, level_val in zip(FIB_KEYS, ind.fib_prices):
             if level_name in fib_colors:
                 ax.axhline(y=level_val, color=fib_colors[level_name], linestyle='--', linewidth=0.8, alpha=0.6)
-                ax.text(dates[2], level_val, f'  Fib {level_name}', color=fib_colors[level_name],
+                ax.text(x[min(2, len(x) - 1)], level_val, f'  Fib {level_name}', color=fib_colors[level_name],
                         fontsize=7, va='center', alpha=0.9)
 
+        # Leg swing dominan (basis Fibonacci)
+        if 0 <= ind.swing_low_idx < len(x) and 0 <= ind.swing_high_idx < len(x):
+            leg = sorted([(ind.swing_low_idx, ind.swing_low), (ind.swing_high_idx, ind.swing_high)])
+            ax.plot([x[i] for i, _ in leg], [p for _, p in leg], color='#ffaa00', linestyle='-.',
+                    linewidth=1.2, marker='o', markersize=5, alpha=0.8, label='Swing Fib', zorder=5)
+
         # Support & Resistance
-        ax.axhline(y=ind['support'],    color='#00BFFF', linestyle='-', linewidth=2, alpha=0.8, label=f"Support ${ind['support']:.2f}")
-        ax.axhline(y=ind['resistance'], color='#FF1493', linestyle='-', linewidth=2, alpha=0.8, label=f"Resist  ${ind['resistance']:.2f}")
+        ax.axhline(y=ind.support,    color='#00BFFF', linestyle='-', linewidth=2, alpha=0.8, label=f"Support ${ind.support:.2f}")
+        ax.axhline(y=ind.resistance, color='#FF1493', linestyle='-', linewidth=2, alpha=0.8, label=f"Resist  ${ind.resistance:.2f}")
 
         # Current price label
-        ax.text(dates[-1], ind['current_price'], f"  ${ind['current_price']:.2f}",
-                color='white', fontsize=11, va='center', fontweight='bold',
+        ax.text(x[-1], ind.current_price, f"  ${ind.current_price:.2f}",
+                color='white', fontsize=11, va='center', fontweight='bold', zorder=6,
                 bbox=dict(boxstyle='round,pad=0.4', facecolor='#00aa44', alpha=0.85))
 
         # Styling
         ax.set_title(f'{symbol} — {tf_label} | {market_label}', fontsize=14, fontweight='bold', color='white', pad=10)
         ax.set_ylabel('Harga (USDT)', fontsize=10, color='white')
         ax.legend(loc='upper left', fontsize=7, framealpha=0.7, ncol=3)
-        ax.grid(True, alpha=0.2, linestyle=':')
-        ax.set_facecolor('#0e1117')
-        ax.tick_params(colors='white')
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m %H:%M'))
-        fig.autofmt_xdate()
-
-    # Plot kedua timeframe
-    plot_tf(ax1, ohlcv_15m, ind_15m, '15 Menit (Trend)')
-    plot_tf(ax2, ohlcv_5m,  ind_5m,  '5 Menit (Entry)')
-
-    plt.tight_layout(pad=2.0)
-
-    chart_path = f'chart_{symbol.replace("/", "_")}_{market_type}_scalp.png'
-    plt.savefig(chart_path, dpi=130, bbox_inches='tight', facecolor='#0e1117')
-    plt.close()
+        style_axis(ax)
+
+    # Plot semua timeframe (panel atas = timeframe terbesar)
+    for ax, volume_ax, frame in zip(axes, volume_axes, frames):
+        plot_tf(ax, volume_ax, frame['ohlcv'], frame['ind'], f"{timeframe_label(frame['tf'])} ({frame['role']})")
+
+    fig.autofmt_xdate()
+    if not candle:
+        fig.tight_layout(pad=2.0)
+
+    chart_path = f'{prefix}_{symbol.replace("/", "_").replace(":", "_")}_{market_type}_{profile}'
+    # Chart per job unik (beberapa slot bisa render pair yang sama bersamaan); chart warm cache tetap 1 per pair
+    if prefix != 'warm':
+        chart_path += f'_{uuid.uuid4().hex[:8]}'
+    if compact:
+        chart_path += '.jpg'
+        fig.savefig(chart_path, dpi=CHART_COMPACT_DPI, bbox_inches='tight', facecolor='#0e1117',
+                    pil_kwargs={'quality': CHART_JPEG_QUALITY, 'optimize': True})
+    else:
+        chart_path += '.png'
+        fig.savefig(chart_path, dpi=130, bbox_inches='tight', facecolor='#0e1117')
     return chart_path
 
-# ========== FUNGSI ANALISA AI GROQ KHUSUS SCALPING ==========
-def analyze_with_groq_scalping(symbol, ind_5m, ind_15m, news_text, market_type):
-    """AI Groq analisis lengkap untuk scalping: teknikal + Fibonacci + News"""
-
+# ========== FUNGSI ANALISA AI ==========
+def analyze_with_ai(symbol, frames, news_text, market_type, profile='scalping', market_line=None, deadline=None):
+    """
+    Analisa AI sesuai profil: teknikal semua timeframe + Fibonacci + breadth market + News.
+    Return (text, backend): Groq -> model lokal -> rule-based, dengan timeout & hedging.
+    deadline: epoch batas analisa (sisa waktu membatasi router LLM)
+    """
     market_label = "SPOT" if market_type == 'spot' else "FUTURES"
+    style = ANALYSIS_PROFILES[profile]['label']
 
-    prompt = f"""
-Kamu adalah trader profesional yang ahli dalam SCALPING crypto.
-Analisa secara LENGKAP dan DETAIL pair {symbol} ({market_label}) untuk strategi SCALPING.
-
-===== DATA TIMEFRAME 15 MENIT (TREND) =====
-- Harga: ${ind_15m['current_price']:.4f}
-- Trend: {ind_15m['trend']}
-- RSI: {ind_15m['rsi']:.1f}
-- MA20: ${ind_15m['ma20']:.4f}
-- MA50: ${ind_15m['ma50']:.4f}
-- MACD Line: {ind_15m['macd_line']:.6f} | Signal: {ind_15m['macd_signal']:.6f} | Histogram: {ind_15m['macd_hist']:.6f}
-- Bollinger Bands: Upper ${ind_15m['bb_upper']:.4f} | Mid ${ind_15m['bb_mid']:.4f} | Lower ${ind_15m['bb_lower']:.4f}
-- Support: ${ind_15m['support']:.4f} | Resistance: ${ind_15m['resistance']:.4f}
-- Fibonacci Level Terdekat: {ind_15m['nearest_fib'][0]} di ${ind_15m['nearest_fib'][1]:.4f}
-- Swing High: ${ind_15m['swing_high']:.4f} | Swing Low: ${ind_15m['swing_low']:.4f}
-- Fib Levels: 0.382=${ind_15m['fib_levels']['0.382']:.4f} | 0.500=${ind_15m['fib_levels']['0.500']:.4f} | 0.618=${ind_15m['fib_levels']['0.618']:.4f} | 0.786=${ind_15m['fib_levels']['0.786']:.4f}
-- Fib Extension: 1.272=${ind_15m['fib_levels']['1.272']:.4f} | 1.618=${ind_15m['fib_levels']['1.618']:.4f}
-
-===== DATA TIMEFRAME 5 MENIT (ENTRY) =====
-- Harga: ${ind_5m['current_price']:.4f}
-- Trend: {ind_5m['trend']}
-- RSI: {ind_5m['rsi']:.1f}
-- MA20: ${ind_5m['ma20']:.4f}
-- MA50: ${ind_5m['ma50']:.4f}
-- MACD Line: {ind_5m['macd_line']:.6f} | Signal: {ind_5m['macd_signal']:.6f} | Histogram: {ind_5m['macd_hist']:.6f}
-- Bollinger Bands: Upper ${ind_5m['bb_upper']:.4f} | Mid ${ind_5m['bb_mid']:.4f} | Lower ${ind_5m['bb_lower']:.4f}
-- Support: ${ind_5m['support']:.4f} | Resistance: ${ind_5m['resistance']:.4f}
-- Fibonacci Level Terdekat: {ind_5m['nearest_fib'][0]} di ${ind_5m['nearest_fib'][1]:.4f}
-- Swing High: ${ind_5m['swing_high']:.4f} | Swing Low: ${ind_5m['swing_low']:.4f}
-- Fib Levels: 0.382=${ind_5m['fib_levels']['0.382']:.4f} | 0.500=${ind_5m['fib_levels']['0.500']:.4f} | 0.618=${ind_5m['fib_levels']['0.618']:.4f} | 0.786=${ind_5m['fib_levels']['0.786']:.4f}
-- Fib Extension: 1.272=${ind_5m['fib_levels']['1.272']:.4f} | 1.618=${ind_5m['fib_levels']['1.618']:.4f}
-
-===== NEWS TERBARU =====
-{news_text}
-
-===== INSTRUKSI ANALISA =====
-Berikan analisa SCALPING yang LENGKAP dalam format berikut:
-
-1. 📊 KONDISI PASAR SEKARANG
-   - Jelaskan kondisi dari 15m dan 5m
-   - Apakah trend dan momentum selaras?
-
-2. 📰 DAMPAK NEWS
-   - Bagaimana news di atas mempengaruhi harga?
-   - Apakah news mendukung atau menghambat entry?
-
-3. 🎯 FIBONACCI ANALISA
-   - Harga sekarang di level Fib mana?
-   - Level support/resistance Fib terdekat?
-   - Potensi bounce atau breakdown di mana?
-
-4. 📈 SINYAL SCALPING
-   - BUY / SELL / TUNGGU?
-   - Jelaskan alasannya berdasarkan semua data di atas.
-
-5. 💰 ENTRY / EXIT PLAN
-   Format seperti ini (gunakan emoji dan spasi yang jelas):
-   
-   🎯 *ENTRY POINT*
-   ├─ Price: $XX.XXXX
-   ├─ Kondisi: [jelaskan kondisi entry]
-   └─ Timeframe: 5m
-   
-   🟢 *TAKE PROFIT*
-   ├─ TP1: $XX.XXXX (Fib X.XXX atau resistance)
-   ├─ TP2: $XX.XXXX (Fib X.XXX atau extension)
-   └─ TP3: $XX.XXXX (target maksimal)
-   
-   🔴 *STOP LOSS*
-   └─ SL: $XX.XXXX (di bawah/atas Fib/Support)
-   
-   📊 *RISK/REWARD*
-   └─ Ratio: 1:X (dijelaskan perhitungannya)
-
-6. ⚠️ RISIKO
-   - Apa risiko utama dari trade ini?
-   - Kondisi apa yang harus diwaspadai?
-
-PENTING: 
-- Untuk bagian ENTRY/EXIT PLAN, gunakan format TREE (├─ dan └─) seperti contoh di atas
-- Gunakan *bold* untuk judul setiap bagian (ENTRY POINT, TAKE PROFIT, dll)
-- Berikan angka SPESIFIK untuk setiap price level
-- Jelaskan MENGAPA level tersebut dipilih (Fib berapa, support/resistance, dll)
-
-Gunakan bahasa Indonesia yang JELAS dan TO THE POINT.
-Jawab dengan SANGAT SPESIFIK, jangan asal-asalan angka.
-"""
-
-    try:
-        completion = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Kamu adalah trader profesional yang ahli scalping crypto. Berikan analisa teknikal yang AKURAT, SPESIFIK, dan ACTIONABLE. Selalu kombinasikan analisa teknikal dengan sentiment news."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            temperature=0.4,
-            max_completion_tokens=2500,
-            top_p=1,
-            stream=False,
-            stop=None
-        )
-        return completion.choices[0].message.content
+    # System prompt statis (cache) + data ringkas dalam budget token
+    system_prompt, user_prompt, est_tokens = build_prompt(
+        symbol, market_label, style, frames, news_text, market_line=market_line
+    )
 
-    except Exception as e:
-        print(f"Error Groq API: {e}")
-        return "⚠️ Maaf, AI analisa gagal. Coba lagi beberapa detik kemudian."
+    return llm_router.generate({
+        'symbol': symbol,
+        'system': system_prompt,
+        'user': user_prompt,
+        'est_tokens': est_tokens,
+        'frames': frames,
+        'max_tokens': MAX_COMPLETION_TOKENS,
+        'temperature': 0.4,
+        'deadline': deadline,
+    })
 
 # ========== TOP GAINERS / LOSERS / VOLUME ==========
 async def get_top_gainers(market_type='spot', top_n=15):
     """Ambil top gainers dari Binance"""
     try:
-        exchange = exchange_spot if market_type == 'spot' else exchange_futures
-        tickers = exchange.fetch_tickers()
+        tickers = await asyncio.to_thread(get_ticker_snapshot, market_type)
         usdt_tickers = {
             k: v for k, v in tickers.items()
             if '/USDT' in k and v.get('percentage') is not None
@@ -580,8 +562,7 @@ async def get_top_gainers(market_type='spot', top_n=15):
 async def get_top_losers(market_type='spot', top_n=15):
     """Ambil top losers dari Binance"""
     try:
-        exchange = exchange_spot if market_type == 'spot' else exchange_futures
-        tickers = exchange.fetch_tickers()
+        tickers = await asyncio.to_thread(get_ticker_snapshot, market_type)
         usdt_tickers = {
             k: v for k, v in tickers.items()
             if '/USDT' in k and v.get('percentage') is not None
@@ -595,8 +576,7 @@ async def get_top_losers(market_type='spot', top_n=15):
 async def get_top_volume(market_type='spot', top_n=15):
     """Ambil top volume dari Binance"""
     try:
-        exchange = exchange_spot if market_type == 'spot' else exchange_futures
-        tickers = exchange.fetch_tickers()
+        tickers = await asyncio.to_thread(get_ticker_snapshot, market_type)
         usdt_tickers = {
             k: v for k, v in tickers.items()
             if '/USDT' in k and v.get('quoteVolume') is not None
@@ -634,11 +614,17 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "🚀 *SCALPING TRADING BOT*\n"
         "━━━━━━━━━━━━━━━━━━\n\n"
         "📊 *Fitur:*\n"
-        "• Dual Timeframe: 15m + 5m\n"
+        "• Multi Timeframe: 15m + 5m (ganti via /profile)\n"
         "• Indikator: RSI, MACD, Bollinger Bands\n"
         "• Fibonacci Retracement & Extension\n"
-        "• News Real-time dari CryptoPanic\n"
-        "• Analisa AI Groq khusus Scalping\n\n"
+        "• News CoinGecko (+ CryptoPanic kalau ada API key)\n"
+        "• Sinyal cepat rule-based + Analisa AI Groq (/ai untuk on/off)\n"
+        "• History analisa per pair (/history BTC)\n"
+        "• Hit-rate TP/SL sinyal per pair (/stats BTC)\n"
+        "• Breadth market & korelasi BTC (/market)\n"
+        "• Funding, open interest & likuidasi futures (/funding)\n"
+        "• Mode hemat kuota: chart JPEG kecil / teks sparkline (/chart)\n"
+        "• Inline di chat mana pun: ketik @nama_bot btc\n\n"
         "━━━━━━━━━━━━━━━━━━\n"
         "📈 *Pilih menu di bawah:*\n"
     )
@@ -650,7 +636,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 async def market_selection_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handler pilihan Spot atau Futures"""
+    """Handler pilihan Spot atau Futures -> halaman pertama pair browser (inline, berhalaman)"""
     query = update.callback_query
     await query.answer()
 
@@ -658,36 +644,43 @@ async def market_selection_handler(update: Update, context: ContextTypes.DEFAULT
     market_type = query.data.split('_')[1]
     context.user_data['market_type'] = market_type
 
-    loading_message = await query.message.reply_text("⏳ Memuat pair dari Binance...")
+    text, markup = await asyncio.to_thread(get_pair_page, market_type)
+    await query.edit_message_text(text, parse_mode='Markdown', reply_markup=markup)
 
+def get_pair_page(market_type, sort='a', letter=ALL_LETTERS, page=0):
+    """Halaman pair browser; dibangun ulang hanya saat cache pair di-refresh"""
     pairs = get_all_pairs(market_type)
+    if PAIR_BROWSER.needs_rebuild(market_type, pairs):
+        try:
+            tickers = get_ticker_snapshot(market_type)
+        except Exception as e:
+            print(f"⚠️ Ticker untuk urutan volume gagal: {e}")
+            tickers = {}
+        PAIR_BROWSER.build(market_type, pairs, tickers)
+    return PAIR_BROWSER.page(market_type, sort, letter, page)
+
+async def pair_browser_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler navigasi pair browser (halaman / urutan / filter huruf) — edit pesan yang sama"""
+    query = update.callback_query
+    await query.answer()
+    market_type, sort, letter, page = parse_pair_callback(query.data)
+    context.user_data['market_type'] = market_type
 
-    # Keyboard 2 kolom
-    keyboard = []
-    row = []
-    for i, pair in enumerate(pairs):
-        row.append(KeyboardButton(pair))
-        if (i + 1) % 2 == 0:
-            keyboard.append(row)
-            row = []
-    if row:
-        keyboard.append(row)
-    keyboard.append([KeyboardButton("≡ Menu")])
-
-    reply_markup = ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
-    market_label = "SPOT" if market_type == 'spot' else "FUTURES"
-
-    await query.edit_message_text(
-        f"📊 *ALL {market_label} PAIRS*\nTotal: *{len(pairs)} pairs*\nScroll untuk lihat semua:",
-        parse_mode='Markdown'
-    )
-    # Hapus loading message dulu
-    await loading_message.delete()
-    # Kirim pesan baru dengan ReplyKeyboardMarkup (tidak bisa pakai edit_text)
-    await query.message.reply_text(
-        f"✅ {len(pairs)} {market_label} pairs tersedia! Pilih pair di bawah 👇",
-        reply_markup=reply_markup
-    )
+    text, markup = await asyncio.to_thread(get_pair_page, market_type, sort, letter, page)
+    try:
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=markup)
+    except BadRequest as e:
+        # Klik tombol halaman yang sedang tampil
+        if 'not modified' not in str(e):
+            raise
+
+async def pair_pick_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler tombol pair di browser -> analisa"""
+    query = update.callback_query
+    await query.answer()
+    _, market_type, selected_pair = query.data.split('_', 2)
+    context.user_data['market_type'] = market_type
+    await process_pair_analysis(query, context, selected_pair, market_type, from_inline=True)
 
 async def handle_menu_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler menu utama"""
@@ -826,14 +819,82 @@ async def handle_menu_selection(update: Update, context: ContextTypes.DEFAULT_TY
             )
 
     elif selected_menu == "🔄 Refresh Data":
-        # Reset cache
-        PAIR_CACHE['last_update'] = None
+        # Reset cache pair & ticker (berlaku untuk semua worker)
+        STATE.delete('pairs:spot', 'pairs:futures', 'tickers:spot', 'tickers:futures')
         await update.message.reply_text("🔄 Cache di-reset. Data akan di-refresh.")
         await start(update, context)
 
     elif selected_menu == "≡ Menu":
         await start(update, context)
 
+def format_stale_note(entry_frame):
+    """Catatan kalau candle entry sudah basi (fallback cache saat Binance down), '' kalau fresh"""
+    last_open = entry_frame['ohlcv'][-1][0]
+    age = time.time() * 1000 - last_open - timeframe_to_ms(entry_frame['tf'])
+    if age <= (STALE_CANDLES - 1) * timeframe_to_ms(entry_frame['tf']):
+        return ""
+    return f"\n🕒 _Data candle cache ({age / 60000:.0f} menit lalu), Binance sedang bermasalah_"
+
+def format_technical_summary(symbol, market_type, frames):
+    """Ringkasan data teknikal semua timeframe untuk Telegram (Fib & S/R dari timeframe entry)"""
+    market_label = "SPOT" if market_type == 'spot' else "FUTURES"
+    entry = frames[-1]['ind']
+    nearest_key, nearest_price = entry.nearest_fib
+
+    summary = (
+        f"📊 *DATA TEKNIKAL {symbol}*\n"
+        f"🏷️ Market: {market_label}\n"
+        f"━━━━━━━━━━━━━━━━━━\n\n"
+
+        f"💰 *Harga Sekarang:* ${entry.current_price:.4f}\n\n"
+    )
+
+    for frame in frames:
+        ind = frame['ind']
+        rsi_status  = "Overbought 🔥" if ind.rsi > 70 else ("Oversold 🧊" if ind.rsi < 30 else "Normal ✅")
+        macd_signal = "Bullish 🟢" if ind.macd_hist > 0 else "Bearish 🔴"
+        summary += (
+            f"⏱️ *TIMEFRAME {timeframe_label(frame['tf']).upper()} ({frame['role']}):*\n"
+            f"• Trend: {ind.trend}\n"
+            f"• RSI: {ind.rsi:.1f} ({rsi_status})\n"
+            f"• MACD: {macd_signal}\n"
+            f"• BB: Upper ${ind.bb_upper:.4f} | Lower ${ind.bb_lower:.4f}\n\n"
+        )
+
+    summary += (
+        f"📐 *FIBONACCI ({frames[-1]['tf']}):*\n"
+        f"• Swing High: ${entry.swing_high:.4f}\n"
+        f"• Swing Low:  ${entry.swing_low:.4f}\n"
+        f"• 0.382: ${entry.fib('0.382'):.4f}\n"
+        f"• 0.500: ${entry.fib('0.500'):.4f}\n"
+        f"• 0.618: ${entry.fib('0.618'):.4f} ⭐\n"
+        f"• 0.786: ${entry.fib('0.786'):.4f}\n"
+        f"• Ext 1.272: ${entry.fib('1.272'):.4f}\n"
+        f"• Ext 1.618: ${entry.fib('1.618'):.4f}\n"
+        f"• Level Terdekat: Fib {nearest_key} (${nearest_price:.4f})\n\n"
+
+        f"🔵 *Support:* ${entry.support:.4f}\n"
+        f"🔴 *Resistance:* ${entry.resistance:.4f}\n"
+    )
+    if entry.orderbook:
+        summary += "\n" + format_orderbook_levels(entry.orderbook)
+    if entry.futures:
+        summary += "\n" + format_futures_metrics(entry.futures)
+    summary += "━━━━━━━━━━━━━━━━━━\n"
+    return summary
+
+async def build_frames(ohlcv_frames, profile_cfg):
+    """Hitung indikator semua timeframe profil (paralel) -> list frame {'tf', 'role', 'ohlcv', 'ind'}"""
+    timeframes = [tf for tf, _ in profile_cfg['timeframes']]
+    indicators = await asyncio.gather(*[
+        asyncio.to_thread(calculate_indicators, ohlcv_frames[tf]) for tf in timeframes
+    ])
+    return [
+        # ohlcv = buffer candle yang sama dengan snapshot (1 array per timeframe, tanpa copy)
+        {'tf': tf, 'role': role, 'ohlcv': ind.candles, 'ind': ind}
+        for (tf, role), ind in zip(profile_cfg['timeframes'], indicators)
+    ]
+
 async def process_pair_analysis(update_or_query, context, selected_pair, market_type, from_inline=False):
     """Fungsi untuk proses analisa pair (bisa dipanggil dari inline keyboard atau text)"""
     
@@ -847,133 +908,342 @@ async def process_pair_analysis(update_or_query, context, selected_pair, market_
         message = update_or_query.message
         user_id = update_or_query.message.from_user.id
     
-    # ----- Cooldown per user -----
-    now = time.time()
-    if user_id in USER_COOLDOWN and (now - USER_COOLDOWN[user_id]) < COOLDOWN_SECONDS:
-        remaining = COOLDOWN_SECONDS - (now - USER_COOLDOWN[user_id])
+    # ----- Cooldown per user (atomic, berlaku di semua worker) -----
+    cooldown_key = f"cooldown:{user_id}"
+    if not STATE.set_if_absent(cooldown_key, b'1', ttl=COOLDOWN_SECONDS):
+        remaining = STATE.ttl(cooldown_key) or 1
         await message.reply_text(f"⏳ Tunggu dulu ya, {remaining:.0f} detik lagi.")
         return
-    USER_COOLDOWN[user_id] = now
+
+    # Profil analisa user (default: scalping 15m + 5m)
+    profile = context.user_data.get('profile', DEFAULT_PROFILE)
+    timeframes = [tf for tf, _ in ANALYSIS_PROFILES[profile]['timeframes']]
+    record_request(STATE, selected_pair, market_type, profile)
+    context.user_data['last_analysis'] = (selected_pair, market_type)
 
     # Loading
     market_label = "SPOT" if market_type == 'spot' else "FUTURES"
     loading_msg = await message.reply_text(
         f"⏳ Menganalisa *{selected_pair}* ({market_label})...\n"
-        f"Ambil data 15m + 5m + News + AI...\nTunggu sebentar! 🔍",
+        f"Ambil data {' + '.join(timeframes)} + News + AI...\nTunggu sebentar! 🔍",
         parse_mode='Markdown'
     )
 
-    chart_path = None
-    try:
-        # 1. Ambil data dual timeframe
-        ohlcv_15m = get_ohlcv_data(selected_pair, market_type, timeframe='15m', limit=100)
-        ohlcv_5m  = get_ohlcv_data(selected_pair, market_type, timeframe='5m',  limit=100)
-
-        if not ohlcv_15m or not ohlcv_5m:
-            await loading_msg.edit_text("❌ Gagal ambil data dari Binance. Coba lagi!")
-            return
-
-        # 2. Hitung indikator kedua timeframe
-        ind_15m = calculate_indicators(ohlcv_15m)
-        ind_5m  = calculate_indicators(ohlcv_5m)
-
-        # 3. Ambil news
-        news_list      = get_crypto_news(selected_pair)
-        news_for_prompt = format_news_for_prompt(news_list)
-        news_for_tg    = format_news_for_telegram(news_list)
-
-        # 4. Buat chart
-        chart_path = create_dual_chart(ohlcv_5m, ohlcv_15m, ind_5m, ind_15m, selected_pair, market_type)
+    # Masukkan ke antrian; diproses worker mana pun yang slotnya kosong
+    job = {
+        'chat_id': message.chat_id,
+        'user_id': user_id,
+        'pair': selected_pair,
+        'market_type': market_type,
+        'profile': profile,
+        'ai_narrative': context.user_data.get('ai_narrative', True),
+        'chart_mode': context.user_data.get('chart_mode', DEFAULT_CHART_MODE),
+        'loading_message_id': loading_msg.message_id,
+        # Deadline absolut (epoch) ikut job: waktu antre di queue ikut terhitung
+        'deadline': time.time() + ANALYSIS_DEADLINE,
+    }
+    if PROFILE_ARM.take():
+        job['profiling'] = True
+    STATE.push_job(ANALYSIS_QUEUE, dumps_json(job))
+
+async def send_stored_result(bot, chat_id, stored, loading_id=None, chart_mode=DEFAULT_CHART_MODE):
+    """Kirim ulang hasil analisa tersimpan (sinyal, chart + caption, pesan gabungan)"""
+    if loading_id:
+        sent_at = datetime.fromtimestamp(stored['created_at']).strftime('%H:%M:%S')
+        sends = [edit_text(bot, chat_id, loading_id, f"{stored['signal_text']}\n♻️ _Hasil candle ini (dibuat {sent_at})_")]
+    else:
+        sent_at = datetime.fromtimestamp(stored['created_at']).strftime('%d/%m/%Y %H:%M')
+        sends = [send_text(bot, chat_id, f"{stored['signal_text']}\n🗂️ _Arsip {sent_at}_")]
+    if chart_mode != 'lite' and stored['chart_path'] and os.path.exists(stored['chart_path']):
+        sends.append(send_photo(bot, chat_id, stored['chart_path'], stored['caption']))
+    elif stored['caption']:
+        # Mode lite / hasil tanpa chart: caption dikirim sebagai teks
+        sends.append(send_text(bot, chat_id, stored['caption']))
+    await send_concurrently(*sends)
+    if stored['body']:
+        await send_text(bot, chat_id, stored['body'])
+
+async def run_analysis_job(bot, job):
+    """Analisa berat 1 job dari antrian: data -> indikator -> sinyal -> chart + AI -> kirim"""
+    selected_pair = job['pair']
+    market_type = job['market_type']
+    profile = job['profile']
+    chat_id = job['chat_id']
+    loading_id = job['loading_message_id']
+    chart_mode = job.get('chart_mode', DEFAULT_CHART_MODE)
+    deadline = Deadline(at=job.get('deadline'))
+
+    profile_cfg = ANALYSIS_PROFILES[profile]
+    timeframes = [tf for tf, _ in profile_cfg['timeframes']]
+    market_label = "SPOT" if market_type == 'spot' else "FUTURES"
 
-        # 5. AI analisa scalping
-        ai_analysis = analyze_with_groq_scalping(selected_pair, ind_5m, ind_15m, news_for_prompt, market_type)
+    # Request sama di candle entry yang sama: kirim ulang hasil tersimpan (tanpa hitung ulang).
+    # Key yang sama dipakai untuk simpan hasil di bawah
+    candle_key = candle_open_time(timeframes[-1])
+    stored = await asyncio.to_thread(RESULT_STORE.find, selected_pair, market_type, profile, candle_key)
+    # (chart tersimpan harus sesuai mode user: PNG untuk full, JPEG untuk compact, bebas untuk lite)
+    chart_ext = {'full': '.png', 'compact': '.jpg'}.get(chart_mode)
+    if stored and (stored['ai_source'] or not job.get('ai_narrative', True)
+                   or (stored['direction'] == 'TUNGGU' and SKIP_LLM_ON_WAIT)) \
+            and (chart_ext is None or (stored['chart_path'] or '').endswith(chart_ext)):
+        await send_stored_result(bot, chat_id, stored, loading_id, chart_mode)
+        return
+    if deadline.expired:
+        # Terlalu lama di antrian (worker penuh): user diminta coba lagi, tidak menghabiskan kuota API
+        await edit_text(bot, chat_id, loading_id, "⌛ Antrian sedang padat, analisa dibatalkan. Coba lagi ya!", parse_mode=None)
+        return
 
-        # ===== KIRIM PESAN KE TELEGRAM =====
+    chart_path = None
+    signal_sent = False
+    signal_edit = None
+    # Task background job ini; yang belum selesai saat keluar (error / timeout) di-cancel di finally
+    background = []
+    # Hot pair yang masih fresh: lewati fetch exchange & hitung indikator (dan chart kalau ada)
+    warm = WARM_CACHE.get_fresh(selected_pair, market_type, profile)
+    try:
+        # 1. Ambil data semua timeframe profil (1x fetch base, sisanya resample) + news paralel
+        news_task = asyncio.create_task(get_news_snapshot(selected_pair))
+        book_task = asyncio.create_task(ORDERBOOKS.levels(selected_pair, market_type))
+        background += [news_task, book_task]
+        if warm:
+            frames = warm['frames']
+        else:
+            ohlcv_frames = await asyncio.wait_for(asyncio.to_thread(
+                get_multi_timeframe_data, selected_pair, market_type, timeframes, 100,
+                INTERACTIVE, deadline.remaining()
+            ), timeout=deadline.remaining())
+
+            if not ohlcv_frames or any(len(ohlcv_frames[tf]) == 0 for tf in timeframes):
+                await edit_text(bot, chat_id, loading_id, "❌ Gagal ambil data dari Binance. Coba lagi!", parse_mode=None)
+                return
+
+            # 2. Hitung indikator semua timeframe (paralel)
+            frames = await build_frames(ohlcv_frames, profile_cfg)
+
+        # Level order book + data futures (cache saja, tanpa network) ditempel ke frame entry
+        # (copy, frame warm cache tidak diubah)
+        extra = {}
+        book_levels = await book_task
+        if book_levels:
+            extra['orderbook'] = book_levels
+        if market_type == 'futures':
+            futures_table = get_futures_table()
+            futures_row = futures_table.row(selected_pair) if futures_table else None
+            if futures_row:
+                extra['futures'] = futures_row
+        if extra:
+            frames = frames[:-1] + [{**frames[-1], 'ind': frames[-1]['ind'].replace(**extra)}]
+
+        # 3. Sinyal cepat rule-based (tanpa network) -> langsung edit pesan loading (jalan di background)
+        signal = compute_signal(frames)
+        stale_note = format_stale_note(frames[-1])
+        signal_edit = asyncio.create_task(edit_text(
+            bot, chat_id, loading_id,
+            format_signal(signal, selected_pair, market_label) + stale_note
+            + "\n⏳ _Chart & analisa lengkap menyusul..._"
+        ))
+        signal_sent = True
+
+        # 4. Ambil news (snapshot per coin di-cache, render prompt/Telegram sudah di-memo).
+        #    Dibatasi sisa deadline: news telat -> analisa jalan tanpa news (fetch tetap selesai & masuk cache)
+        try:
+            news = await asyncio.wait_for(asyncio.shield(news_task), timeout=deadline.remaining(NEWS_WAIT_CAP))
+        except asyncio.TimeoutError:
+            print(f"⚠️ News {selected_pair}: lewat deadline, analisa tanpa news")
+            news = NewsSnapshot(selected_pair.split('/')[0].lower(), [])
+        news_for_prompt = news.prompt_text
+        news_for_tg     = news.telegram_text
+
+        # 5. AI narrative (opsional) jalan di background, chart dirender paralel.
+        #    Kalau sinyal TUNGGU, LLM dilewati (hemat Groq) kecuali SKIP_LLM_ON_WAIT=0
+        use_ai = job.get('ai_narrative', True)
+        if signal['direction'] == 'TUNGGU' and SKIP_LLM_ON_WAIT:
+            use_ai = False
+        ai_task = None
+        if use_ai:
+            market_line = format_breadth_for_prompt(loads_json(STATE.get('breadth:latest')), selected_pair)
+            ai_task = asyncio.create_task(asyncio.to_thread(
+                analyze_with_ai, selected_pair, frames, news_for_prompt, market_type, profile, market_line,
+                deadline.at
+            ))
+            background.append(ai_task)
+        # Mode lite: tanpa render gambar; compact: JPEG kecil (chart PNG warm cache tidak dipakai)
+        if chart_mode == 'full' and warm and warm['chart_path']:
+            chart_path = warm['chart_path']
+        elif chart_mode != 'lite':
+            chart_path = await asyncio.to_thread(
+                create_multi_chart, frames, selected_pair, market_type, profile, compact=chart_mode == 'compact'
+            )
 
-        # --- Kirim Chart ---
-        with open(chart_path, 'rb') as chart_file:
-            caption = (
-                f"📊 *{selected_pair} — Scalping Chart*\n"
+        summary = format_technical_summary(selected_pair, market_type, frames)
+        if chart_path:
+            # ===== KIRIM KE TELEGRAM: foto + caption, lalu 1 pesan gabungan =====
+            # --- Chart + data teknikal di caption (kalau muat 1024 karakter) ---
+            tf_desc = " + ".join(f"{frame['tf']} ({frame['role']})" for frame in frames)
+            header = (
+                f"📊 *{selected_pair} — {profile_cfg['label']} Chart*\n"
                 f"🏷️ Market: {market_label}\n"
-                f"⏰ Dual Timeframe: 15m (Trend) + 5m (Entry)\n"
+                f"⏰ Timeframe: {tf_desc}\n"
                 f"📐 Fibonacci + Bollinger Bands + MA"
             )
-            await message.reply_photo(photo=chart_file, caption=caption, parse_mode='Markdown')
-
-        # --- Kirim News ---
-        await message.reply_text(news_for_tg, parse_mode='Markdown')
-
-        # --- Kirim Data Teknikal Summary ---
-        rsi_5m_status  = "Overbought 🔥" if ind_5m['rsi'] > 70 else ("Oversold 🧊" if ind_5m['rsi'] < 30 else "Normal ✅")
-        rsi_15m_status = "Overbought 🔥" if ind_15m['rsi'] > 70 else ("Oversold 🧊" if ind_15m['rsi'] < 30 else "Normal ✅")
-        macd_5m_signal = "Bullish 🟢" if ind_5m['macd_hist'] > 0 else "Bearish 🔴"
-        macd_15m_signal = "Bullish 🟢" if ind_15m['macd_hist'] > 0 else "Bearish 🔴"
-
-        summary = (
-            f"📊 *DATA TEKNIKAL {selected_pair}*\n"
-            f"🏷️ Market: {market_label}\n"
-            f"━━━━━━━━━━━━━━━━━━\n\n"
-
-            f"💰 *Harga Sekarang:* ${ind_5m['current_price']:.4f}\n\n"
-
-            f"⏱️ *TIMEFRAME 15 MENIT (Trend):*\n"
-            f"• Trend: {ind_15m['trend']}\n"
-            f"• RSI: {ind_15m['rsi']:.1f} ({rsi_15m_status})\n"
-            f"• MACD: {macd_15m_signal}\n"
-            f"• BB: Upper ${ind_15m['bb_upper']:.4f} | Lower ${ind_15m['bb_lower']:.4f}\n\n"
-
-            f"⏱️ *TIMEFRAME 5 MENIT (Entry):*\n"
-            f"• Trend: {ind_5m['trend']}\n"
-            f"• RSI: {ind_5m['rsi']:.1f} ({rsi_5m_status})\n"
-            f"• MACD: {macd_5m_signal}\n"
-            f"• BB: Upper ${ind_5m['bb_upper']:.4f} | Lower ${ind_5m['bb_lower']:.4f}\n\n"
-
-            f"📐 *FIBONACCI:*\n"
-            f"• Swing High: ${ind_5m['swing_high']:.4f}\n"
-            f"• Swing Low:  ${ind_5m['swing_low']:.4f}\n"
-            f"• 0.382: ${ind_5m['fib_levels']['0.382']:.4f}\n"
-            f"• 0.500: ${ind_5m['fib_levels']['0.500']:.4f}\n"
-            f"• 0.618: ${ind_5m['fib_levels']['0.618']:.4f} ⭐\n"
-            f"• 0.786: ${ind_5m['fib_levels']['0.786']:.4f}\n"
-            f"• Ext 1.272: ${ind_5m['fib_levels']['1.272']:.4f}\n"
-            f"• Ext 1.618: ${ind_5m['fib_levels']['1.618']:.4f}\n"
-            f"• Level Terdekat: Fib {ind_5m['nearest_fib'][0]} (${ind_5m['nearest_fib'][1]:.4f})\n\n"
-
-            f"🔵 *Support:* ${ind_5m['support']:.4f}\n"
-            f"🔴 *Resistance:* ${ind_5m['resistance']:.4f}\n"
-            f"━━━━━━━━━━━━━━━━━━\n"
-        )
-        await message.reply_text(summary, parse_mode='Markdown')
-
-        # --- Kirim AI Analisa ---
-        ai_message = (
-            f"🤖 *ANALISA AI — SCALPING {selected_pair}*\n"
-            f"━━━━━━━━━━━━━━━━━━\n\n"
-            f"{ai_analysis}\n\n"
-            f"━━━━━━━━━━━━━━━━━━\n"
-            f"⚠️ *Disclaimer:* Ini BUKAN rekomendasi trading!\n"
-            f"Analisa ini untuk edukasi saja. Selalu lakukan riset mandiri.\n"
-        )
-        await message.reply_text(ai_message, parse_mode='Markdown')
-
-        # Hapus loading
-        await loading_msg.delete()
+            caption, summary_rest = compose_caption(header, summary)
+            # Edit sinyal & upload foto independen -> paralel
+            await send_concurrently(signal_edit, send_photo(bot, chat_id, chart_path, caption))
+        else:
+            # --- Mode lite: chart teks (sparkline + tangga level) sebagai pesan biasa ---
+            caption, summary_rest = format_lite_chart(selected_pair, market_type, frames), summary
+            await send_concurrently(signal_edit, send_text(bot, chat_id, caption))
+
+        # --- Pesan gabungan: news + sisa data teknikal + AI (menyusul) ---
+        ai_section = ai_analysis = ai_source = None
+        if ai_task:
+            ai_analysis, ai_source = await ai_task
+            ai_title = "ANALISA OTOMATIS" if ai_source == 'rule' else "ANALISA AI"
+            ai_section = (
+                f"🤖 *{ai_title} — {profile_cfg['label'].upper()} {selected_pair}*\n"
+                f"━━━━━━━━━━━━━━━━━━\n\n"
+                f"{ai_analysis}\n\n"
+                f"━━━━━━━━━━━━━━━━━━\n"
+                f"⚠️ *Disclaimer:* Ini BUKAN rekomendasi trading!\n"
+                f"Analisa ini untuk edukasi saja. Selalu lakukan riset mandiri.\n"
+            )
+        body = join_sections(news_for_tg, summary_rest, ai_section)
+        await send_text(bot, chat_id, body)
 
+        # Simpan hasil (chart dipindah ke folder blob store). Hanya kalau candle entry = candle berjalan:
+        # hasil dari candle cache basi (Binance down) tidak boleh jadi hasil dedup / menimpa hasil candle lama
+        if int(frames[-1]['ohlcv'][-1][0]) != candle_key:
+            print(f"⚠️ Hasil {selected_pair} tidak disimpan (candle entry bukan candle berjalan)")
+            return
+        is_warm_chart = bool(warm and chart_path == warm['chart_path'])
+        await asyncio.to_thread(RESULT_STORE.save, {
+            'symbol': selected_pair,
+            'market_type': market_type,
+            'profile': profile,
+            'timeframe': frames[-1]['tf'],
+            'candle_time': candle_key,
+            'direction': signal['direction'],
+            'signal_json': signal_to_json(signal),
+            'indicators': pack_frames(frames),
+            'news_text': news_for_tg,
+            'ai_text': ai_analysis,
+            'ai_source': ai_source,
+            'signal_text': format_signal(signal, selected_pair, market_label),
+            'caption': caption,
+            'body': body,
+        }, chart_path, is_warm_chart)
+
+    except (CircuitOpen, asyncio.TimeoutError) as e:
+        # Dependency down / deadline habis: pesan singkat tanpa stack detail
+        reason = str(e) if isinstance(e, CircuitOpen) else "Data Binance terlalu lama"
+        error_text = f"⚠️ {reason}.\nAnalisa belum bisa dibuat sekarang, coba lagi sebentar lagi 🙏"
+        if signal_sent:
+            await bot.send_message(chat_id=chat_id, text=error_text)
+        else:
+            await bot.edit_message_text(chat_id=chat_id, message_id=loading_id, text=error_text)
     except Exception as e:
-        await loading_msg.edit_text(
+        # Kalau sinyal cepat sudah terkirim, jangan timpa — kirim error sebagai pesan baru
+        error_text = (
             f"❌ Error: {str(e)}\n\n"
             f"Kemungkinan:\n"
-            f"• API Binance/Groq/CryptoPanic bermasalah\n"
+            f"• API Binance/Groq/News bermasalah\n"
             f"• Pair tidak tersedia\n"
             f"• Koneksi internet bermasalah\n\n"
             f"Coba lagi ya! 🙏"
         )
+        if signal_sent:
+            await bot.send_message(chat_id=chat_id, text=error_text)
+        else:
+            await bot.edit_message_text(chat_id=chat_id, message_id=loading_id, text=error_text)
         print(f"Error: {e}")
     finally:
-        # Selalu hapus chart file
-        if chart_path and os.path.exists(chart_path):
+        for task in background:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # exception task yang ditinggal sudah "diambil" (tanpa warning asyncio)
+        # Edit sinyal cepat dibiarkan selesai (user tetap dapat sinyal walau tahap berikutnya gagal)
+        if signal_edit is not None:
+            await asyncio.gather(signal_edit, return_exceptions=True)
+        # Chart yang tidak sempat disimpan ke store dihapus (kecuali milik warm cache)
+        if chart_path and not (warm and chart_path == warm['chart_path']) and os.path.exists(chart_path):
             os.remove(chart_path)
 
+# ========== WORKER ANTRIAN ANALISA ==========
+async def analysis_dispatcher(bot, slots=MAX_CONCURRENT_ANALYSES):
+    """
+    Ambil job dari antrian selama ada slot kosong (maks `slots` analisa bersamaan per proses).
+    Dipakai di proses bot (post_init) dan di `python main.py worker`
+    """
+    free_slots = asyncio.Semaphore(slots)
+    # pop_job blocking (BRPOP / queue.get) -> thread sendiri supaya event loop tetap jalan
+    popper = ThreadPoolExecutor(max_workers=1, thread_name_prefix='job-pop')
+    running = set()
+    loop = asyncio.get_running_loop()
+    print(f"👷 Analysis worker aktif ({slots} slot, backend {STATE.name})")
+
+    profile_lock = asyncio.Lock()
+
+    async def run_profiled(job):
+        """
+        Job yang di-arm /prof: sampling profiler + tracemalloc, dijalankan eksklusif (semua slot dipegang)
+        supaya sample tidak tercampur analisa lain. Slot sendiri dilepas dulu: 2 job profil tidak saling tunggu.
+        async with: snapshot & tulis laporan di thread, event loop tidak tertahan
+        """
+        free_slots.release()
+        held = 0
+        try:
+            async with profile_lock:
+                for _ in range(slots):
+                    await free_slots.acquire()
+                    held += 1
+                async with ProfileSession(f"{job['pair']}_{job['market_type']}_{job['profile']}"):
+                    await run_analysis_job(bot, job)
+        finally:
+            for _ in range(held):
+                free_slots.release()
+
+    async def run(job):
+        profiled = bool(job.get('profiling'))
+        try:
+            await (run_profiled(job) if profiled else run_analysis_job(bot, job))
+        except Exception as e:
+            print(f"⚠️ Job analisa gagal: {e}")
+        finally:
+            if not profiled:
+                free_slots.release()
+
+    try:
+        while True:
+            await free_slots.acquire()
+            raw = await loop.run_in_executor(popper, STATE.pop_job, ANALYSIS_QUEUE, 5)
+            if raw is None:
+                free_slots.release()
+                continue
+            task = asyncio.create_task(run(loads_json(raw)))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        popper.shutdown(wait=False, cancel_futures=True)
+
+def normalize_pair(text, market_type):
+    """Kalau user ketik "btc", "BTC", "btc/usdt", "BTC/USDT" dll → normalize"""
+    typed = text.strip().upper()
+
+    # Untuk FUTURES, format: SOL/USDT:USDT
+    # Untuk SPOT, format: SOL/USDT
+    if market_type == 'futures':
+        if '/USDT:USDT' not in typed:
+            if '/USDT' in typed and ':USDT' not in typed:
+                typed = typed + ':USDT'
+            elif '/USDT' not in typed:
+                typed = typed + '/USDT:USDT'
+    else:
+        # Spot market
+        if '/USDT' not in typed:
+            typed = typed + '/USDT'
+    return typed
+
 async def handle_pair_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler ketika user pilih pair atau menu"""
     selected_text = update.message.text
@@ -995,31 +1265,15 @@ async def handle_pair_selection(update: Update, context: ContextTypes.DEFAULT_TY
         return
 
     # ----- Auto-format manual input -----
-    # Kalau user ketik "btc", "BTC", "btc/usdt", "BTC/USDT" dll → normalize
-    typed = selected_text.strip().upper()
     market_type = context.user_data.get('market_type', 'futures')
-
-    # Untuk FUTURES, format: SOL/USDT:USDT
-    # Untuk SPOT, format: SOL/USDT
-    if market_type == 'futures':
-        if '/USDT:USDT' not in typed:
-            if '/USDT' in typed and ':USDT' not in typed:
-                typed = typed + ':USDT'
-            elif '/USDT' not in typed:
-                typed = typed + '/USDT:USDT'
-    else:
-        # Spot market
-        if '/USDT' not in typed:
-            typed = typed + '/USDT'
-
-    selected_pair = typed
+    selected_pair = normalize_pair(selected_text, market_type)
 
     # Kalau dari mode "waiting_pair", reset state-nya
     if context.user_data.get('waiting_pair'):
         context.user_data.pop('waiting_pair', None)
 
     # Validasi pair dari cache
-    valid_pairs = get_all_pairs(market_type)
+    valid_pairs = await asyncio.to_thread(get_all_pairs, market_type)
     if selected_pair not in valid_pairs:
         # Coba cari pair yang mirip (partial match)
         suggestions = [p for p in valid_pairs if selected_pair.split('/')[0] in p][:5]
@@ -1036,6 +1290,149 @@ async def handle_pair_selection(update: Update, context: ContextTypes.DEFAULT_TY
     # Panggil fungsi proses analisa
     await process_pair_analysis(update, context, selected_pair, market_type, from_inline=False)
 
+# ========== PROFIL HANDLER ==========
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler /profile — pilih profil analisa (set timeframe)"""
+    current = context.user_data.get('profile', DEFAULT_PROFILE)
+    keyboard = []
+    for name, cfg in ANALYSIS_PROFILES.items():
+        mark = "✅ " if name == current else ""
+        tf_desc = " + ".join(tf for tf, _ in cfg['timeframes'])
+        keyboard.append([InlineKeyboardButton(f"{mark}{cfg['label']} ({tf_desc})", callback_data=f'profile_{name}')])
+
+    await update.message.reply_text(
+        "⚙️ *Pilih Profil Analisa:*",
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+async def profile_selection_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler pilihan profil analisa"""
+    query = update.callback_query
+    await query.answer()
+
+    profile = query.data.split('_', 1)[1]
+    if profile not in ANALYSIS_PROFILES:
+        return
+    context.user_data['profile'] = profile
+
+    cfg = ANALYSIS_PROFILES[profile]
+    tf_desc = " + ".join(f"{tf} ({role})" for tf, role in cfg['timeframes'])
+    await query.edit_message_text(
+        f"✅ Profil *{cfg['label']}* aktif\n⏰ Timeframe: {tf_desc}",
+        parse_mode='Markdown'
+    )
+
+# ========== AI NARRATIVE TOGGLE ==========
+async def ai_toggle_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler /ai — nyalakan/matikan analisa AI (sinyal cepat tetap dikirim)"""
+    enabled = not context.user_data.get('ai_narrative', True)
+    context.user_data['ai_narrative'] = enabled
+    status = "✅ AKTIF" if enabled else "⏸️ NONAKTIF (hanya sinyal cepat + chart)"
+    await update.message.reply_text(f"🤖 Analisa AI: {status}")
+
+# ========== MODE CHART (HEMAT KUOTA) ==========
+async def chart_mode_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler /chart — pilih mode chart: full PNG, JPEG kecil, atau lite (teks tanpa gambar)"""
+    current = context.user_data.get('chart_mode', DEFAULT_CHART_MODE)
+    keyboard = [
+        [InlineKeyboardButton(f"{'✅ ' if mode == current else ''}{label}", callback_data=f'chartmode_{mode}')]
+        for mode, label in CHART_MODES.items()
+    ]
+    await update.message.reply_text(
+        "🖼️ *Pilih Mode Chart:*\nHemat & Lite cocok untuk koneksi lambat",
+        parse_mode='Markdown',
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+async def chart_mode_selection_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler pilihan mode chart"""
+    query = update.callback_query
+    await query.answer()
+
+    mode = query.data.split('_', 1)[1]
+    if mode not in CHART_MODES:
+        return
+    context.user_data['chart_mode'] = mode
+    await query.edit_message_text(f"✅ Mode chart: {CHART_MODES[mode]}")
+
+# ========== HISTORY HANDLER ==========
+def format_history_page(symbol, market_type, rows, total, offset):
+    """Teks + tombol 1 halaman history analisa pair"""
+    market_label = "SPOT" if market_type == 'spot' else "FUTURES"
+    page = offset // HISTORY_PAGE_SIZE + 1
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+    msg = f"🗂️ *HISTORY {symbol}* ({market_label}) — hal {page}/{pages}\n━━━━━━━━━━━━━━━━━━\n"
+
+    emoji = {'BUY': '🟢', 'SELL': '🔴', 'TUNGGU': '⏸️'}
+    view_buttons = []
+    for i, row in enumerate(rows, offset + 1):
+        signal = json.loads(row['signal_json'] or '{}')
+        when = datetime.fromtimestamp(row['created_at']).strftime('%d/%m %H:%M')
+        label = ANALYSIS_PROFILES.get(row['profile'], {}).get('label', row['profile'])
+        msg += f"\n*{i}.* {when} | {label} | {emoji.get(row['direction'], '')} {row['direction']}\n"
+        if signal.get('tp'):
+            msg += f"   Entry ${signal['entry']:.4f} | TP1 ${signal['tp'][0]:.4f} | SL ${signal['sl']:.4f}\n"
+        else:
+            msg += f"   Harga ${signal.get('entry', 0):.4f}\n"
+        view_buttons.append(InlineKeyboardButton(f"🔎 {i}", callback_data=f"histview_{row['id']}"))
+
+    keyboard = [view_buttons] if view_buttons else []
+    nav = []
+    if offset > 0:
+        nav.append(InlineKeyboardButton("◀️ Baru", callback_data=f"hist_{market_type}_{offset - HISTORY_PAGE_SIZE}_{symbol}"))
+    if offset + HISTORY_PAGE_SIZE < total:
+        nav.append(InlineKeyboardButton("Lama ▶️", callback_data=f"hist_{market_type}_{offset + HISTORY_PAGE_SIZE}_{symbol}"))
+    if nav:
+        keyboard.append(nav)
+    return msg, InlineKeyboardMarkup(keyboard) if keyboard else None
+
+async def history_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler /history [PAIR] [spot|futures] — history analisa tersimpan (default: pair terakhir)"""
+    args = [a.lower() for a in context.args]
+    market_type = next((a for a in args if a in ('spot', 'futures')), None)
+    pair_args = [a for a in args if a not in ('spot', 'futures')]
+
+    if pair_args:
+        market_type = market_type or context.user_data.get('market_type', 'futures')
+        symbol = normalize_pair(pair_args[0], market_type)
+    elif context.user_data.get('last_analysis'):
+        symbol, last_market = context.user_data['last_analysis']
+        market_type = market_type or last_market
+    else:
+        await update.message.reply_text("🗂️ Pakai: /history BTC [spot|futures]")
+        return
+
+    rows, total = await asyncio.to_thread(RESULT_STORE.history, symbol, market_type, 0, HISTORY_PAGE_SIZE)
+    if not rows:
+        await update.message.reply_text(f"🗂️ Belum ada history untuk {symbol} ({market_type.upper()}).")
+        return
+    msg, markup = format_history_page(symbol, market_type, rows, total, 0)
+    await update.message.reply_text(msg, parse_mode='Markdown', reply_markup=markup)
+
+async def history_page_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler tombol paging history (hist_<market>_<offset>_<symbol>)"""
+    query = update.callback_query
+    await query.answer()
+
+    _, market_type, offset, symbol = query.data.split('_', 3)
+    offset = max(0, int(offset))
+    rows, total = await asyncio.to_thread(RESULT_STORE.history, symbol, market_type, offset, HISTORY_PAGE_SIZE)
+    msg, markup = format_history_page(symbol, market_type, rows, total, offset)
+    await query.edit_message_text(msg, parse_mode='Markdown', reply_markup=markup)
+
+async def history_view_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler tombol lihat 1 hasil tersimpan (histview_<id>)"""
+    query = update.callback_query
+    await query.answer()
+
+    stored = await asyncio.to_thread(RESULT_STORE.get, int(query.data.split('_', 1)[1]))
+    if not stored:
+        await query.message.reply_text("❌ Hasil analisa sudah tidak tersedia.")
+        return
+    await send_stored_result(context.bot, query.message.chat_id, stored,
+                             chart_mode=context.user_data.get('chart_mode', DEFAULT_CHART_MODE))
+
 # ========== CANCEL HANDLER ==========
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handler untuk /cancel"""
@@ -1043,7 +1440,293 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("❌ Dibatalkan.")
     await start(update, context)
 
+# ========== HOT-PAIR WARMER ==========
+async def warm_pair(symbol, market_type, profile, limiter):
+    """Hitung ulang candle + indikator (+ chart) 1 hot pair kalau candle entry sudah berganti"""
+    if WARM_CACHE.get_fresh(symbol, market_type, profile):
+        return
+    profile_cfg = ANALYSIS_PROFILES[profile]
+    timeframes = [tf for tf, _ in profile_cfg['timeframes']]
+    async with limiter:
+        ohlcv_frames = await asyncio.to_thread(
+            get_multi_timeframe_data, symbol, market_type, timeframes, 100, BACKGROUND
+        )
+        if not ohlcv_frames or any(len(ohlcv_frames[tf]) == 0 for tf in timeframes):
+            return
+        frames = await build_frames(ohlcv_frames, profile_cfg)
+        chart_path = None
+        if WARM_CHARTS:
+            chart_path = await asyncio.to_thread(create_multi_chart, frames, symbol, market_type, profile, 'warm')
+    WARM_CACHE.put(symbol, market_type, profile, frames, timeframes[-1], chart_path)
+
+async def hot_pair_warmer():
+    """Background: jaga hot pair tetap fresh, refresh setiap candle entry close"""
+    limiter = asyncio.Semaphore(WARM_CONCURRENCY)
+    entry_tfs = {cfg['timeframes'][-1][0] for cfg in ANALYSIS_PROFILES.values()}
+    print(f"🔥 Hot-pair warmer aktif (refresh tiap close {', '.join(sorted(entry_tfs))}, chart {'on' if WARM_CHARTS else 'off'})")
+    while True:
+        try:
+            snapshots = {}
+            for market_type in ('spot', 'futures'):
+                try:
+                    snapshots[market_type] = await asyncio.to_thread(get_ticker_snapshot, market_type, BACKGROUND)
+                except Exception as e:
+                    print(f"⚠️ Warmer: snapshot {market_type} gagal: {e}")
+
+            hot = pick_hot_pairs(snapshots, request_history(STATE), DEFAULT_PROFILE)
+            started = time.perf_counter()
+            await asyncio.gather(*[warm_pair(*key, limiter) for key in hot])
+            WARM_CACHE.prune(set(hot))
+            print(f"🔥 Warm cache: {len(hot)} hot pair, {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            print(f"⚠️ Warmer error: {e}")
+
+        # Tidur sampai candle entry terdekat close
+        await asyncio.sleep(min(seconds_until_close(tf) for tf in entry_tfs))
+
+# ========== INLINE QUERY (CACHE SAJA) ==========
+def cached_inline_frames(symbol, market_type):
+    """
+    [(timeframe, IndicatorSnapshot)] 15m + 5m tanpa network:
+    warm cache dulu, lalu buffer candle lokal / bersama (state backend). Kosong kalau belum pernah di-fetch
+    """
+    for profile in ANALYSIS_PROFILES:
+        warm = WARM_CACHE.get_fresh(symbol, market_type, profile)
+        if warm:
+            by_tf = {frame['tf']: frame['ind'] for frame in warm['frames']}
+            if all(tf in by_tf for tf in INLINE_TIMEFRAMES):
+                return [(tf, by_tf[tf]) for tf in INLINE_TIMEFRAMES]
+
+    base_tf = pick_base_timeframe(INLINE_TIMEFRAMES)
+    if CANDLE_STORE.get(symbol, market_type, base_tf) is None:
+        shared, _ = loads_array(STATE.get(f"candles:{market_type}:{symbol}:{base_tf}"))
+        if shared is None:
+            return []
+        CANDLE_STORE.set(symbol, market_type, base_tf, shared)
+
+    frames = []
+    for tf in INLINE_TIMEFRAMES:
+        candles = CANDLE_STORE.get_timeframe(symbol, market_type, base_tf, tf)
+        ind = INLINE_QUOTES.get(symbol, market_type, tf, candles)
+        if ind is not None:
+            frames.append((tf, ind))
+    return frames
+
+async def inline_index_updater():
+    """Background: index pair + snapshot ticker untuk inline query (handler tidak pernah fetch sendiri)"""
+    while True:
+        for market_type in ('spot', 'futures'):
+            try:
+                pairs = await asyncio.to_thread(get_all_pairs, market_type, BACKGROUND)
+                INLINE_INDEX.build(market_type, pairs)
+                snapshot = await asyncio.to_thread(get_ticker_snapshot, market_type, BACKGROUND)
+                INLINE_INDEX.update_tickers(market_type, snapshot)
+            except Exception as e:
+                print(f"⚠️ Inline index {market_type} gagal: {e}")
+        await asyncio.sleep(INLINE_REFRESH)
+
+async def inline_query_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler inline query — harga, trend 15m/5m, RSI, MACD, Fib terdekat dari cache (tanpa exchange / LLM)"""
+    query = update.inline_query
+    started = time.perf_counter()
+    results = []
+    for symbol, market_type in INLINE_INDEX.search(query.query):
+        ticker, age = INLINE_INDEX.ticker(symbol, market_type)
+        quote = format_inline_quote(symbol, market_type, ticker, age, cached_inline_frames(symbol, market_type))
+        results.append(InlineQueryResultArticle(
+            id=f"{market_type}:{symbol}"[:64],
+            title=quote['title'],
+            description=quote['description'],
+            input_message_content=InputTextMessageContent(quote['text'], parse_mode='Markdown'),
+        ))
+    elapsed = (time.perf_counter() - started) * 1000
+    if elapsed > 200:
+        print(f"⚠️ Inline query '{query.query}' lambat: {elapsed:.0f} ms")
+    await query.answer(results, cache_time=INLINE_CACHE_TIME)
+
+# ========== TRACKER HASIL SINYAL ==========
+def track_signals_once():
+    """1 putaran tracker: ambil sinyal baru dari result store, cek candle pair yang punya sinyal terbuka"""
+    if not _tracker_loaded['done']:
+        # Leader baru: lanjutkan state leader sebelumnya (sinyal terbuka + statistik) supaya tidak hitung ganda
+        previous = loads_json(STATE.get('signals:tracker'))
+        if previous:
+            SIGNAL_TRACKER.load(previous)
+        _tracker_loaded['done'] = True
+
+    since = SIGNAL_TRACKER.last_seen or time.time() - SIGNAL_TRACKER.max_age
+    new = sum(SIGNAL_TRACKER.add(row) for row in RESULT_STORE.signals(since))
+
+    closed = []
+    now_ms = time.time() * 1000
+    for symbol, market_type, tf, since_ms in SIGNAL_TRACKER.open_pairs():
+        needed = min(int((now_ms - since_ms) // timeframe_to_ms(tf)) + 2, MAX_FETCH_LIMIT)
+        candles = refresh_base_candles(symbol, market_type, tf, needed, BACKGROUND)
+        if candles is not None:
+            closed += SIGNAL_TRACKER.on_candles(symbol, market_type, candles)
+    closed += SIGNAL_TRACKER.expire()
+
+    STATE.set('signals:tracker', dumps_json(SIGNAL_TRACKER.to_dict()))
+    STATE.set('signals:stats', dumps_json(SIGNAL_TRACKER.stats))
+    if new or closed:
+        print(f"🎯 Signal tracker: +{new} sinyal, {len(closed)} selesai, {len(SIGNAL_TRACKER.open)} terbuka")
+
+async def signal_tracker_updater():
+    """Background: cek TP/SL sinyal terbuka tiap menit (hanya 1 worker = leader)"""
+    print(f"🎯 Signal tracker aktif (refresh {TRACKER_REFRESH}s)")
+    while True:
+        try:
+            if acquire_lease(STATE, 'tracker:leader', ttl=TRACKER_REFRESH * 3):
+                await asyncio.to_thread(track_signals_once)
+            else:
+                # Bukan leader lagi: state lokal basi, muat ulang kalau nanti jadi leader
+                _tracker_loaded['done'] = False
+        except Exception as e:
+            print(f"⚠️ Signal tracker error: {e}")
+        await asyncio.sleep(TRACKER_REFRESH)
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler /stats [PAIR] [spot|futures] — hit-rate TP/SL sinyal (statistik incremental dari tracker)"""
+    stats = loads_json(STATE.get('signals:stats')) or {}
+    args = [a.lower() for a in context.args]
+    market_type = next((a for a in args if a in ('spot', 'futures')), None)
+    pair_args = [a for a in args if a not in ('spot', 'futures')]
+    if pair_args:
+        market_type = market_type or context.user_data.get('market_type', 'futures')
+        msg = format_stats(stats, normalize_pair(pair_args[0], market_type), market_type)
+    else:
+        msg = format_stats(stats)
+    await update.message.reply_text(msg, parse_mode='Markdown')
+
+async def prof_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler /prof [N] (admin) — profil N analisa berikutnya, tanpa argumen: status + laporan terbaru"""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        return
+    if context.args:
+        if not context.args[0].isdigit():
+            await update.message.reply_text(f"Format: /prof N (0-{PROFILE_MAX_RUNS}), /prof 0 untuk batal")
+            return
+        armed = PROFILE_ARM.arm(int(context.args[0]))
+        msg = f"🔬 Profil {armed} analisa berikutnya" if armed else "🔬 Profiling dimatikan"
+    else:
+        msg = f"🔬 Sisa jatah profil: {PROFILE_ARM.remaining}"
+    reports = recent_profiles()
+    msg += f"\n📁 {PROFILE_DIR}"
+    if reports:
+        msg += "\n" + "\n".join(f"• {name}" for name in reports)
+    await update.message.reply_text(msg)
+
+# ========== MARKET BREADTH ==========
+async def breadth_updater():
+    """Background: update breadth tiap menit (roll matriks saat candle close, bootstrap symbol baru bertahap)"""
+    print(f"🌐 Breadth updater aktif ({BREADTH.timeframe}, refresh {BREADTH_REFRESH}s)")
+    while True:
+        try:
+            # Hanya 1 worker yang menghitung; lainnya baca hasil dari state backend
+            if acquire_lease(STATE, 'breadth:leader', ttl=BREADTH_REFRESH * 3):
+                snapshot = await asyncio.to_thread(get_ticker_snapshot, 'spot', BACKGROUND)
+                BREADTH.set_universe(liquid_universe(snapshot))
+                BREADTH.roll(snapshot)
+                for symbol in BREADTH.pending_bootstrap()[:BREADTH_BOOTSTRAP_BATCH]:
+                    ohlcv = await asyncio.to_thread(
+                        get_ohlcv_data, symbol, 'spot', BREADTH.timeframe, BREADTH_WINDOW + 1, None, BACKGROUND
+                    )
+                    if ohlcv:
+                        BREADTH.bootstrap(symbol, ohlcv)
+                metrics = await asyncio.to_thread(BREADTH.compute, snapshot)
+                STATE.set('breadth:latest', dumps_json(metrics), ttl=BREADTH_TTL)
+        except Exception as e:
+            print(f"⚠️ Breadth error: {e}")
+        await asyncio.sleep(BREADTH_REFRESH)
+
+async def market_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler /market — breadth market (hasil terakhir dari state backend, tanpa hitung ulang)"""
+    metrics = loads_json(STATE.get('breadth:latest'))
+    await update.message.reply_text(format_breadth_for_telegram(metrics), parse_mode='Markdown')
+
+# ========== DATA FUTURES ==========
+async def futures_data_updater():
+    """Background: refresh tabel futures (funding bulk + OI top volume + likuidasi) tiap FUTURES_REFRESH detik"""
+    print(f"🧾 Futures data updater aktif (refresh {FUTURES_REFRESH}s)")
+    while True:
+        try:
+            # Hanya 1 worker yang fetch; lainnya baca tabel dari state backend
+            if acquire_lease(STATE, 'futures:leader', ttl=FUTURES_REFRESH * 3):
+                FUTURES_DATA.start_liquidation_stream()
+                snapshot = await asyncio.to_thread(get_ticker_snapshot, 'futures', BACKGROUND)
+                ranking = sorted(snapshot, key=lambda s: snapshot[s]['quoteVolume'] or 0, reverse=True)
+                table = await asyncio.to_thread(FUTURES_DATA.refresh, ranking)
+                STATE.set('futures:table', table.to_bytes(), ttl=FUTURES_TTL)
+                STATE.set('futures:version', str(table.updated_at).encode(), ttl=FUTURES_TTL)
+        except Exception as e:
+            print(f"⚠️ Futures data error: {e}")
+        await asyncio.sleep(FUTURES_REFRESH)
+
+async def funding_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handler /funding — scanner funding / OI / likuidasi semua perpetual (dari cache)"""
+    await update.message.reply_text(format_funding_scanner(get_futures_table()), parse_mode='Markdown')
+
+# ========== CHECKPOINT STATE ==========
+async def save_checkpoint(application):
+    """Snapshot pair/ticker/candle/setting user ke file lokal (tulis di thread)"""
+    settings = user_settings(application.user_data)
+    try:
+        return await asyncio.to_thread(write_checkpoint, STATE, CANDLE_STORE, settings, CHECKPOINT_PATH)
+    except Exception as e:
+        print(f"⚠️ Checkpoint gagal ditulis: {type(e).__name__}: {e}")
+        return None
+
+async def checkpoint_updater(application):
+    """Background: checkpoint berkala (hanya proses bot, 1 file per host)"""
+    while True:
+        await asyncio.sleep(CHECKPOINT_INTERVAL)
+        await save_checkpoint(application)
+
+async def on_shutdown(application):
+    """post_shutdown: checkpoint terakhir supaya restart berikutnya langsung hangat + tutup koneksi news"""
+    await NEWS_SERVICE.aclose()
+    if CHECKPOINT_PATH:
+        size = await save_checkpoint(application)
+        if size:
+            print(f"💾 Checkpoint disimpan ({size / 1024:.0f} KB)")
+
 # ========== MAIN ==========
+async def on_startup(application):
+    """post_init: jalankan worker analisa (+ warmer) di proses bot (wajib kalau state backend memory)"""
+    # Restore cache sebelum task lain jalan: request pertama setelah restart tidak perlu fetch Binance
+    if CHECKPOINT_PATH:
+        snapshot = await asyncio.to_thread(read_checkpoint, CHECKPOINT_PATH)
+        if snapshot:
+            counts = restore_checkpoint(snapshot, STATE, CANDLE_STORE, application.user_data)
+            print(f"💾 Checkpoint dipulihkan ({time.time() - snapshot['saved_at']:.0f} detik lalu): "
+                  f"{counts['state']} cache, {counts['candles']} buffer candle, {counts['users']} user")
+        application.create_task(checkpoint_updater(application))
+    application.create_task(inline_index_updater())
+    if RUN_ANALYSIS_IN_BOT or STATE.name == 'memory':
+        application.create_task(analysis_dispatcher(application.bot))
+        application.create_task(breadth_updater())
+        application.create_task(futures_data_updater())
+        application.create_task(signal_tracker_updater())
+        if WARM_CACHE_ENABLED:
+            application.create_task(hot_pair_warmer())
+    else:
+        print("👷 Analisa dijalankan proses worker terpisah (python main.py worker)")
+
+async def run_worker():
+    """Proses worker analisa saja (tanpa menerima update), bisa dijalankan banyak instance"""
+    kwargs = {}
+    if TELEGRAM_BASE_URL:
+        kwargs = {'base_url': f"{TELEGRAM_BASE_URL}/bot", 'base_file_url': f"{TELEGRAM_BASE_URL}/file/bot"}
+    bot = ExtBot(TELEGRAM_TOKEN, rate_limiter=build_rate_limiter(), **kwargs)
+    async with bot:
+        tasks = [analysis_dispatcher(bot), breadth_updater(), futures_data_updater(), signal_tracker_updater()]
+        if WARM_CACHE_ENABLED:
+            tasks.append(hot_pair_warmer())
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            await NEWS_SERVICE.aclose()
+
 def main():
     """Jalankan bot"""
 
@@ -1055,24 +1738,80 @@ def main():
         print("  GROQ_API_KEY=...")
         print("  BINANCE_API_KEY=...")
         print("  BINANCE_SECRET_KEY=...")
-        print("\n💡 CRYPTOPANIC_API_KEY tidak diperlukan lagi (pakai CoinGecko gratis)")
+        print("\n💡 CRYPTOPANIC_API_KEY opsional (tanpa key: news dari CoinGecko saja)")
         return
 
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    # Mode worker: hanya proses antrian analisa (butuh state backend bersama, misal Redis)
+    if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+        if STATE.name == 'memory':
+            print("❌ Error: worker terpisah butuh STATE_BACKEND=redis")
+            return
+        print("👷 Worker analisa jalan! Tekan Ctrl+C untuk stop.")
+        try:
+            asyncio.run(run_worker())
+        except KeyboardInterrupt:
+            pass
+        return
+
+    # Rate limiter: throttle sesuai limit Telegram + retry otomatis saat RetryAfter
+    # concurrent_updates: update diproses paralel (analisa panjang tidak menahan menu user lain)
+    builder = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .rate_limiter(build_rate_limiter())
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if TELEGRAM_BASE_URL:
+        builder = builder.base_url(f"{TELEGRAM_BASE_URL}/bot").base_file_url(f"{TELEGRAM_BASE_URL}/file/bot")
+    application = builder.build()
 
     # Handlers
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("cancel", cancel))
+    application.add_handler(CommandHandler("profile", profile_command))
+    application.add_handler(CommandHandler("ai", ai_toggle_command))
+    application.add_handler(CommandHandler("chart", chart_mode_command))
+    application.add_handler(CommandHandler("history", history_command))
+    application.add_handler(CommandHandler("market", market_command))
+    application.add_handler(CommandHandler("funding", funding_command))
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("prof", prof_command))
     application.add_handler(CallbackQueryHandler(market_selection_handler, pattern='^market_'))
+    application.add_handler(CallbackQueryHandler(pair_browser_handler, pattern='^pairs_'))
+    application.add_handler(CallbackQueryHandler(pair_pick_handler, pattern='^pick_'))
+    application.add_handler(CallbackQueryHandler(profile_selection_handler, pattern='^profile_'))
+    application.add_handler(CallbackQueryHandler(chart_mode_selection_handler, pattern='^chartmode_'))
+    application.add_handler(CallbackQueryHandler(history_page_handler, pattern='^hist_'))
+    application.add_handler(CallbackQueryHandler(history_view_handler, pattern='^histview_'))
+    application.add_handler(InlineQueryHandler(inline_query_handler))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_pair_selection))
 
     print("🤖 Scalping Bot sudah jalan!")
-    print("📊 Dual Timeframe: 15m + 5m")
+    print(f"📊 Profil: {', '.join(ANALYSIS_PROFILES)} (default {DEFAULT_PROFILE})")
     print("📐 Fibonacci + BB + MACD + RSI")
-    print("📰 News: CoinGecko (Free API)")
-    print("🤖 AI: Groq (Llama 3.3)")
+    print("📰 News: CoinGecko (Free API) + CryptoPanic (opsional)")
+    print("🤖 AI: Groq (Llama 3.3) + fallback model lokal / rule-based")
+    print(f"⚡ Concurrent updates: {CONCURRENT_UPDATES} | Analisa paralel: {MAX_CONCURRENT_ANALYSES}/proses")
+    print(f"🗄️ State backend: {STATE.name}")
     print("💡 Tekan Ctrl+C untuk stop.")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+
+    if BOT_MODE == 'webhook':
+        if not WEBHOOK_URL:
+            print("❌ Error: BOT_MODE=webhook butuh WEBHOOK_URL")
+            return
+        print(f"🌐 Webhook: {WEBHOOK_URL}/{WEBHOOK_PATH} (listen {WEBHOOK_LISTEN}:{WEBHOOK_PORT})")
+        application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=ALLOWED_UPDATES,
+        )
+    else:
+        application.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 if __name__ == '__main__':
     main()
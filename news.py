@@ -1,173 +1,371 @@
 """
-CoinGecko News API Module
-- FREE, no API key required
-- Global trending & market data
+News Module (satu-satunya implementasi news bot)
+- Provider async: CoinGecko Trending, CoinGecko Global, CryptoPanic (opsional, butuh API key)
+- Semua provider di-fetch paralel, masing-masing dengan timeout sendiri
+  (source lambat tidak pernah menambah lebih dari timeout-nya ke analisa)
+- Cache snapshot per coin (TTL) + render prompt / Telegram di-memo per snapshot
+- Circuit breaker per host: source yang sedang down dilewati, snapshot lama dipakai kalau semua gagal
 """
 
-import requests
-from datetime import datetime
+import asyncio
+import os
+import time
+from functools import cached_property
+import httpx
+from resilience import get_breaker
 
-# ========== COINGECKO NEWS API ==========
-def get_crypto_news(symbol):
-    """
-    Ambil news dari CoinGecko - Gratis tanpa API key!
-    Menggunakan: trending coins + global market data
-    """
-    try:
-        coin = symbol.split('/')[0].lower()
-        
-        # 1. Get trending coins
-        trending_url = "https://api.coingecko.com/api/v3/search/trending"
-        response = requests.get(trending_url, timeout=5)
-        
-        news_list = []
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Cari coin yang diminta di trending
-            if 'coins' in data:
-                for item in data['coins'][:10]:
-                    coin_data = item.get('item', {})
-                    symbol_match = coin_data.get('symbol', '').lower()
-                    name_match = coin_data.get('name', '').lower()
-                    
-                    # Jika coin match dengan yang dicari
-                    if coin in symbol_match or coin in name_match:
-                        rank = coin_data.get('market_cap_rank', 'N/A')
-                        score = coin_data.get('score', 0)
-                        
-                        # Determine sentiment berdasarkan trending score
-                        if score >= 5:
-                            sentiment = 'bullish'
-                        elif score >= 3:
-                            sentiment = 'neutral'
-                        else:
-                            sentiment = 'bearish'
-                        
-                        news_list.append({
-                            'title': f"{coin_data.get('name')} is #trending on CoinGecko (Score: {score})",
-                            'sentiment': sentiment,
-                            'source': 'CoinGecko Trending',
-                            'rank': rank
-                        })
-                
-                # Jika coin tidak trending, ambil data umum trending
-                if not news_list:
-                    # Ambil top 3 trending untuk konteks market
-                    for idx, item in enumerate(data['coins'][:3], 1):
-                        coin_data = item.get('item', {})
-                        news_list.append({
-                            'title': f"#{idx} Trending: {coin_data.get('name')} ({coin_data.get('symbol')})",
-                            'sentiment': 'neutral',
-                            'source': 'CoinGecko Trending'
-                        })
-        
-        # 2. Get global market data untuk context
-        try:
-            global_url = "https://api.coingecko.com/api/v3/global"
-            global_response = requests.get(global_url, timeout=5)
-            
-            if global_response.status_code == 200:
-                global_data = global_response.json().get('data', {})
-                
-                # Market cap change
-                market_cap_change = global_data.get('market_cap_change_percentage_24h_usd', 0)
-                btc_dominance = global_data.get('market_cap_percentage', {}).get('btc', 0)
-                
-                # Sentiment berdasarkan market cap change
-                if market_cap_change > 2:
-                    market_sentiment = 'bullish'
-                    market_emoji = '📈'
-                elif market_cap_change < -2:
-                    market_sentiment = 'bearish'
-                    market_emoji = '📉'
+NEWS_CACHE_TTL = int(os.getenv('NEWS_CACHE_TTL', '300'))
+NEWS_TIMEOUT = float(os.getenv('NEWS_TIMEOUT', '4'))
+CRYPTOPANIC_API_KEY = os.getenv('CRYPTOPANIC_API_KEY')
+MAX_NEWS_ITEMS = 5
+
+SENTIMENT_PROMPT = {'bullish': "BULLISH ✅", 'bearish': "BEARISH ⚠️", 'neutral': "NETRAL ➡️"}
+SENTIMENT_TELEGRAM = {'bullish': "🟢 Bullish", 'bearish': "🔴 Bearish", 'neutral': "🟡 Netral"}
+
+
+# ========== PROVIDER ==========
+class NewsProvider:
+    """Base provider. fetch(client, coin) -> list item {'title', 'sentiment', 'source'}"""
+    name = 'base'
+    # Nama breaker (provider 1 host berbagi breaker)
+    host = 'base'
+    # Urutan tampil (kecil dulu)
+    order = 0
+    # Item berlaku untuk semua coin (konteks market), selalu ditampilkan
+    market_wide = False
+    # Provider dengan cache sendiri: (data, fetched_at) + ttl
+    ttl = 0
+    _cache = (None, 0.0)
+
+    def __init__(self, timeout=NEWS_TIMEOUT):
+        self.timeout = timeout
+
+    def is_cached(self):
+        """True kalau fetch berikutnya dilayani cache provider (tanpa network)"""
+        return self._cache[0] is not None and time.time() - self._cache[1] < self.ttl
+
+    async def fetch(self, client, coin):
+        raise NotImplementedError
+
+
+class CoinGeckoTrendingProvider(NewsProvider):
+    """Coin trending CoinGecko; data trending global di-cache 1x untuk semua coin"""
+    name = 'coingecko_trending'
+    host = 'coingecko'
+    order = 0
+    URL = "https://api.coingecko.com/api/v3/search/trending"
+
+    def __init__(self, timeout=NEWS_TIMEOUT, ttl=NEWS_CACHE_TTL):
+        super().__init__(timeout)
+        self.ttl = ttl
+        self._cache = (None, 0.0)
+
+    async def _trending(self, client):
+        if self.is_cached():
+            return self._cache[0]
+        response = await client.get(self.URL, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json().get('coins', [])
+        self._cache = (data, time.time())
+        return data
+
+    async def fetch(self, client, coin):
+        coins = await self._trending(client)
+        items = []
+
+        # Cari coin yang diminta di trending
+        for entry in coins[:10]:
+            coin_data = entry.get('item', {})
+            if coin in coin_data.get('symbol', '').lower() or coin in coin_data.get('name', '').lower():
+                score = coin_data.get('score', 0)
+                # Determine sentiment berdasarkan trending score
+                if score >= 5:
+                    sentiment = 'bullish'
+                elif score >= 3:
+                    sentiment = 'neutral'
                 else:
-                    market_sentiment = 'neutral'
-                    market_emoji = '➡️'
-                
-                news_list.append({
-                    'title': f"{market_emoji} Global Market Cap 24h: {market_cap_change:+.2f}% | BTC Dominance: {btc_dominance:.1f}%",
-                    'sentiment': market_sentiment,
-                    'source': 'CoinGecko Global'
+                    sentiment = 'bearish'
+                items.append({
+                    'title': f"{coin_data.get('name')} is trending on CoinGecko (Score: {score})",
+                    'sentiment': sentiment,
+                    'source': 'CoinGecko Trending',
+                    'rank': coin_data.get('market_cap_rank', 'N/A'),
                 })
-        except:
-            pass
-        
-        print(f"✅ CoinGecko: {len(news_list)} news items")
-        return news_list[:5]  # Limit 5 items
-        
-    except requests.exceptions.RequestException as e:
-        print(f"⚠️ CoinGecko API tidak dapat diakses: {type(e).__name__}")
-        return []
-    except Exception as e:
-        print(f"⚠️ Error fetching CoinGecko news: {e}")
-        return []
 
+        # Jika coin tidak trending, ambil top 3 trending untuk konteks market
+        if not items:
+            for idx, entry in enumerate(coins[:3], 1):
+                coin_data = entry.get('item', {})
+                items.append({
+                    'title': f"#{idx} Trending: {coin_data.get('name')} ({coin_data.get('symbol')})",
+                    'sentiment': 'neutral',
+                    'source': 'CoinGecko Trending',
+                })
+        return items
+
+
+class CoinGeckoGlobalProvider(NewsProvider):
+    """Market cap global 24h + dominasi BTC (sama untuk semua coin, di-cache)"""
+    name = 'coingecko_global'
+    host = 'coingecko'
+    order = 2
+    market_wide = True
+    URL = "https://api.coingecko.com/api/v3/global"
+
+    def __init__(self, timeout=NEWS_TIMEOUT, ttl=NEWS_CACHE_TTL):
+        super().__init__(timeout)
+        self.ttl = ttl
+        self._cache = (None, 0.0)
+
+    async def fetch(self, client, coin):
+        if self.is_cached():
+            return [self._cache[0]]
+
+        response = await client.get(self.URL, timeout=self.timeout)
+        response.raise_for_status()
+        global_data = response.json().get('data', {})
+        market_cap_change = global_data.get('market_cap_change_percentage_24h_usd', 0)
+        btc_dominance = global_data.get('market_cap_percentage', {}).get('btc', 0)
+
+        # Sentiment berdasarkan market cap change
+        if market_cap_change > 2:
+            sentiment, emoji = 'bullish', '📈'
+        elif market_cap_change < -2:
+            sentiment, emoji = 'bearish', '📉'
+        else:
+            sentiment, emoji = 'neutral', '➡️'
+
+        item = {
+            'title': f"{emoji} Global Market Cap 24h: {market_cap_change:+.2f}% | BTC Dominance: {btc_dominance:.1f}%",
+            'sentiment': sentiment,
+            'source': 'CoinGecko Global',
+        }
+        self._cache = (item, time.time())
+        return [item]
+
+
+class CryptoPanicProvider(NewsProvider):
+    """Headline per coin dari CryptoPanic (sentiment dari vote komunitas)"""
+    name = 'cryptopanic'
+    host = 'cryptopanic'
+    order = 1
+    URL = "https://cryptopanic.com/api/v1/posts/"
+
+    def __init__(self, api_key, timeout=NEWS_TIMEOUT, limit=2):
+        super().__init__(timeout)
+        self.api_key = api_key
+        self.limit = limit
+
+    async def fetch(self, client, coin):
+        response = await client.get(self.URL, timeout=self.timeout, params={
+            'auth_token': self.api_key, 'currencies': coin.upper(), 'public': 'true', 'kind': 'news',
+        })
+        response.raise_for_status()
+        items = []
+        for post in response.json().get('results', [])[:self.limit]:
+            votes = post.get('votes', {})
+            bullish, bearish = votes.get('positive', 0), votes.get('negative', 0)
+            sentiment = 'bullish' if bullish > bearish else 'bearish' if bearish > bullish else 'neutral'
+            items.append({'title': post.get('title', 'No title'), 'sentiment': sentiment, 'source': 'CryptoPanic'})
+        return items
+
+
+def default_providers():
+    providers = [CoinGeckoTrendingProvider(), CoinGeckoGlobalProvider()]
+    if CRYPTOPANIC_API_KEY:
+        providers.append(CryptoPanicProvider(CRYPTOPANIC_API_KEY))
+    return providers
+
+
+# ========== FORMAT ==========
 def format_news_for_prompt(news_list):
     """Format news untuk AI prompt"""
     if not news_list:
         return "⚠️ News tidak tersedia saat ini. Fokus pada analisa teknikal saja."
-    
+
     formatted = ""
     for i, news in enumerate(news_list, 1):
-        sentiment = news.get('sentiment', 'neutral')
-        
-        if sentiment == 'bullish':
-            emoji = "BULLISH ✅"
-        elif sentiment == 'bearish':
-            emoji = "BEARISH ⚠️"
-        else:
-            emoji = "NETRAL ➡️"
-        
-        title = news.get('title', 'No title')
-        formatted += f"{i}. [{emoji}] {title}\n"
-    
+        label = SENTIMENT_PROMPT.get(news.get('sentiment', 'neutral'), SENTIMENT_PROMPT['neutral'])
+        formatted += f"{i}. [{label}] {news.get('title', 'No title')}\n"
     return formatted
 
+
 def format_news_for_telegram(news_list):
     """Format news untuk Telegram"""
     if not news_list:
         return "📰 *NEWS:*\n⚠️ News tidak tersedia saat ini.\nAnalisa fokus pada teknikal."
-    
-    msg = "📰 *MARKET NEWS (CoinGecko):*\n"
+
+    # Nama source dari item yang benar-benar tampil ('CoinGecko Trending' -> 'CoinGecko')
+    sources = list(dict.fromkeys(news.get('source', 'News').split()[0] for news in news_list))
+    msg = f"📰 *MARKET NEWS ({' + '.join(sources)}):*\n"
     for i, news in enumerate(news_list, 1):
-        sentiment = news.get('sentiment', 'neutral')
-        
-        if sentiment == 'bullish':
-            emoji = "🟢 Bullish"
-        elif sentiment == 'bearish':
-            emoji = "🔴 Bearish"
-        else:
-            emoji = "🟡 Netral"
-        
-        title = news.get('title', 'No title')
-        
-        msg += f"\n{i}. {emoji}\n"
-        msg += f"   {title}\n"
-    
+        label = SENTIMENT_TELEGRAM.get(news.get('sentiment', 'neutral'), SENTIMENT_TELEGRAM['neutral'])
+        msg += f"\n{i}. {label}\n"
+        msg += f"   {news.get('title', 'No title')}\n"
     return msg
 
+
+# ========== SNAPSHOT ==========
+class NewsSnapshot:
+    """Hasil news 1 coin pada 1 waktu; render prompt / Telegram dihitung sekali"""
+
+    def __init__(self, coin, items, fetched_at=None):
+        self.coin = coin
+        self.items = items
+        self.fetched_at = fetched_at or time.time()
+
+    @cached_property
+    def sentiment(self):
+        """Sentimen gabungan coin: bullish / bearish / neutral (mayoritas item)"""
+        score = sum({'bullish': 1, 'bearish': -1}.get(item.get('sentiment'), 0) for item in self.items)
+        return 'bullish' if score > 0 else 'bearish' if score < 0 else 'neutral'
+
+    @cached_property
+    def prompt_text(self):
+        if not self.items:
+            return format_news_for_prompt(self.items)
+        return f"Sentimen {self.coin.upper()}: {SENTIMENT_PROMPT[self.sentiment]}\n" + format_news_for_prompt(self.items)
+
+    @cached_property
+    def telegram_text(self):
+        return format_news_for_telegram(self.items)
+
+
+# ========== SERVICE ==========
+class NewsService:
+    """Fetch semua provider paralel + cache snapshot per coin + gabung request yang sedang jalan"""
+
+    def __init__(self, providers=None, ttl=NEWS_CACHE_TTL):
+        self.providers = sorted(providers or default_providers(), key=lambda p: p.order)
+        self.ttl = ttl
+        self.cache = {}
+        self.inflight = {}
+        self._client = None
+        self._client_loop = None
+
+    def _http(self):
+        """1 AsyncClient per event loop (koneksi keep-alive dipakai ulang)"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(headers={'accept': 'application/json'}, follow_redirects=True)
+            self._client_loop = loop
+        return self._client
+
+    async def _fetch_provider(self, provider, client, coin):
+        if provider.is_cached():
+            # Cache provider tidak menyentuh network: bukan bukti host sehat, breaker tidak di-update
+            return await provider.fetch(client, coin)
+        breaker = get_breaker(provider.host)
+        if not breaker.allow():
+            return []
+        try:
+            items = await asyncio.wait_for(provider.fetch(client, coin), timeout=provider.timeout)
+            breaker.record_success()
+            return items
+        except asyncio.TimeoutError:
+            print(f"⚠️ News {provider.name}: timeout {provider.timeout:.0f}s")
+        except Exception as e:
+            print(f"⚠️ News {provider.name} tidak dapat diakses: {type(e).__name__}")
+        breaker.record_failure()
+        return []
+
+    async def _refresh(self, coin):
+        client = self._http()
+        results = await asyncio.gather(*[self._fetch_provider(p, client, coin) for p in self.providers])
+
+        # Item market-wide selalu ikut, sisanya diisi provider per coin sesuai urutan
+        specific = [item for p, group in zip(self.providers, results) if not p.market_wide for item in group]
+        market_wide = [item for p, group in zip(self.providers, results) if p.market_wide for item in group]
+        items = specific[:MAX_NEWS_ITEMS - len(market_wide)] + market_wide
+        if not items and coin in self.cache:
+            # Semua source gagal / breaker OPEN: pakai snapshot lama daripada kosong
+            print(f"⚠️ News {coin.upper()}: source tidak tersedia, pakai cache lama")
+            return self.cache[coin]
+        snapshot = NewsSnapshot(coin, items)
+        if items:
+            self.cache[coin] = snapshot
+        print(f"✅ News {coin.upper()}: {len(items)} item")
+        return snapshot
+
+    async def aclose(self):
+        """Tutup AsyncClient bersama (saat shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = self._client_loop = None
+
+    async def get(self, symbol):
+        """Snapshot news untuk symbol (cache TTL per coin)"""
+        coin = symbol.split('/')[0].lower()
+        cached = self.cache.get(coin)
+        if cached and time.time() - cached.fetched_at < self.ttl:
+            return cached
+
+        task = self.inflight.get(coin)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(self._refresh(coin))
+            self.inflight[coin] = task
+            task.add_done_callback(lambda _: self.inflight.pop(coin, None))
+        # shield: caller yang di-cancel (misal fetch data gagal) tidak ikut membatalkan fetch bersama
+        return await asyncio.shield(task)
+
+
+NEWS_SERVICE = NewsService()
+
+
+async def get_news_snapshot(symbol):
+    """Entry point async: NewsSnapshot (items, sentiment, prompt_text, telegram_text)"""
+    return await NEWS_SERVICE.get(symbol)
+
+
+def get_crypto_news(symbol):
+    """Versi sync (script / test): list item news"""
+    return asyncio.run(get_news_snapshot(symbol)).items
+
+
 # ========== TEST FUNCTION ==========
 if __name__ == '__main__':
-    """Test CoinGecko News API"""
-    print("🧪 Testing CoinGecko News API\n")
-    print("="*60)
-    
-    test_coins = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
-    
-    for symbol in test_coins:
-        print(f"\n📊 Testing {symbol}")
-        print("-"*60)
-        
-        news = get_crypto_news(symbol)
-        
-        if news:
-            print(f"✅ Found {len(news)} news items\n")
-            print(format_news_for_telegram(news))
-        else:
-            print("❌ No news found")
-        
-        print("="*60)
-    
+    """Test news: fetch paralel, cache & provider lambat"""
+
+    class SlowProvider(NewsProvider):
+        name = 'slow'
+        host = 'slow'
+        order = 1
+
+        async def fetch(self, client, coin):
+            await asyncio.sleep(10)
+            return [{'title': 'tidak pernah sampai', 'sentiment': 'neutral'}]
+
+    class DelayedProvider(NewsProvider):
+        name = 'delayed'
+        host = 'delayed'
+
+        async def fetch(self, client, coin):
+            await asyncio.sleep(0.2)
+            return [{'title': f'{coin.upper()} listing baru', 'sentiment': 'bullish'}]
+
+    async def run():
+        service = NewsService(default_providers() + [SlowProvider(timeout=1)])
+        for symbol in ['BTC/USDT', 'ETH/USDT', 'BTC/USDT:USDT']:
+            print(f"\n📊 Testing {symbol}")
+            print("-" * 60)
+            started = time.perf_counter()
+            snapshot = await service.get(symbol)
+            print(f"{time.perf_counter() - started:.2f}s | sentimen {snapshot.sentiment}")
+            print(snapshot.telegram_text)
+
+        # 2 request coin sama berbagi 1 fetch; request pertama di-cancel -> yang kedua tetap dapat hasil
+        print("\n📊 Testing cancel 1 dari 2 request bersamaan")
+        print("-" * 60)
+        service = NewsService([DelayedProvider()])
+        first = asyncio.create_task(service.get('SOL/USDT'))
+        second = asyncio.create_task(service.get('SOL/USDT'))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        snapshot = await second
+        assert first.cancelled() and snapshot.items, "fetch bersama ikut ter-cancel"
+        print(f"Request kedua tetap dapat {len(snapshot.items)} item")
+
+    print("🧪 Testing News Module\n")
+    print("=" * 60)
+    asyncio.run(run())
     print("\n✅ Test completed!")
@@ -0,0 +1,363 @@
+"""
+Order Book Module
+- Book L2 lokal per pair: snapshot REST 1x + diff update WebSocket Binance (@depth@100ms)
+- Disimpan sebagai numpy array terurut (harga & qty), update di-merge vectorized
+- Liquidity wall + support/resistance berbobot depth dihitung on demand (tanpa REST per request)
+- Diff bisa direkam ke JSONL dan di-replay offline (test tanpa network)
+"""
+
+import asyncio
+import json
+import os
+import time
+import numpy as np
+
+ORDERBOOK_MAX_LEVELS = 1000
+ORDERBOOK_RANGE_PCT = float(os.getenv('ORDERBOOK_RANGE_PCT', '0.02'))  # analisa depth +-2% dari mid
+ORDERBOOK_BINS = 40
+ORDERBOOK_WALL_MULTIPLE = 5.0        # wall = notional level >= 5x median level
+ORDERBOOK_IDLE_SECONDS = 900         # stream berhenti kalau pair tidak diminta 15 menit
+ORDERBOOK_RECORD_DIR = os.getenv('ORDERBOOK_RECORD_DIR')  # isi untuk rekam diff (replay offline)
+
+SPOT_WS_URL = "wss://stream.binance.com:9443/ws"
+FUTURES_WS_URL = "wss://fstream.binance.com/ws"
+
+
+class OrderBookGap(Exception):
+    """Urutan update id putus -> book harus sync ulang dari snapshot"""
+
+
+def _levels(rows):
+    """List [[price, qty], ...] (string / float) -> (prices, qtys) float64"""
+    data = np.asarray(rows, dtype=float).reshape(-1, 2) if len(rows) else np.empty((0, 2))
+    return data[:, 0], data[:, 1]
+
+
+def _merge(prices, qtys, up_prices, up_qtys, descending):
+    """Gabung update ke 1 sisi book: update menimpa level lama, qty 0 = hapus level"""
+    all_prices = np.concatenate([up_prices, prices])
+    all_qtys = np.concatenate([up_qtys, qtys])
+    # return_index = kemunculan pertama -> nilai update menang
+    unique, first = np.unique(all_prices, return_index=True)
+    merged = all_qtys[first]
+    keep = merged > 0
+    unique, merged = unique[keep], merged[keep]
+    if descending:
+        unique, merged = unique[::-1], merged[::-1]
+    return unique[:ORDERBOOK_MAX_LEVELS], merged[:ORDERBOOK_MAX_LEVELS]
+
+
+# ========== BOOK ==========
+class OrderBook:
+    """Book L2 1 pair. bids: harga turun, asks: harga naik"""
+
+    def __init__(self, symbol, market_type='spot'):
+        self.symbol = symbol
+        self.market_type = market_type
+        self.bid_prices = self.bid_qtys = np.empty(0)
+        self.ask_prices = self.ask_qtys = np.empty(0)
+        self.last_update_id = None
+        self.synced = False
+        self.updated_at = 0.0
+
+    def load_snapshot(self, bids, asks, last_update_id):
+        bid_p, bid_q = _levels(bids)
+        ask_p, ask_q = _levels(asks)
+        self.bid_prices, self.bid_qtys = _merge(np.empty(0), np.empty(0), bid_p, bid_q, descending=True)
+        self.ask_prices, self.ask_qtys = _merge(np.empty(0), np.empty(0), ask_p, ask_q, descending=False)
+        self.last_update_id = int(last_update_id)
+        self.synced = False
+        self.updated_at = time.time()
+
+    def apply_diff(self, event):
+        """
+        Terapkan 1 event depthUpdate (aturan sync Binance spot / futures).
+        Return False kalau event lama (dibuang); raise OrderBookGap kalau ada update yang hilang
+        """
+        first, final = int(event['U']), int(event['u'])
+        if self.last_update_id is None or final < self.last_update_id:
+            return False
+        if self.market_type == 'futures':
+            if not self.synced:
+                if not (first <= self.last_update_id <= final):
+                    if first > self.last_update_id:
+                        raise OrderBookGap(f"{self.symbol}: event pertama U={first} > snapshot {self.last_update_id}")
+                    return False
+            elif int(event.get('pu', -1)) != self.last_update_id:
+                raise OrderBookGap(f"{self.symbol}: pu={event.get('pu')} != {self.last_update_id}")
+        else:
+            if final <= self.last_update_id:
+                return False
+            if not self.synced:
+                if first > self.last_update_id + 1:
+                    raise OrderBookGap(f"{self.symbol}: event pertama U={first} > snapshot+1")
+            elif first != self.last_update_id + 1:
+                raise OrderBookGap(f"{self.symbol}: U={first} != {self.last_update_id + 1}")
+
+        if event['b']:
+            self.bid_prices, self.bid_qtys = _merge(self.bid_prices, self.bid_qtys, *_levels(event['b']), True)
+        if event['a']:
+            self.ask_prices, self.ask_qtys = _merge(self.ask_prices, self.ask_qtys, *_levels(event['a']), False)
+        self.last_update_id = final
+        self.synced = True
+        self.updated_at = time.time()
+        return True
+
+    @property
+    def mid(self):
+        if not len(self.bid_prices) or not len(self.ask_prices):
+            return None
+        return (self.bid_prices[0] + self.ask_prices[0]) / 2
+
+
+# ========== ANALISA DEPTH ==========
+def _strongest_zone(prices, notional, bins):
+    """Bin notional per rentang harga, ambil bin terkuat -> harga rata-rata berbobot notional di bin itu"""
+    counts, edges = np.histogram(prices, bins=bins, weights=notional)
+    best = int(np.argmax(counts))
+    mask = (prices >= edges[best]) & (prices <= edges[best + 1])
+    level = float(np.average(prices[mask], weights=notional[mask]))
+    return level, float(counts[best])
+
+
+def _walls(prices, notional, multiple=ORDERBOOK_WALL_MULTIPLE, top=3):
+    """Level dengan notional >= multiple x median (terbesar dulu)"""
+    if not len(notional):
+        return []
+    threshold = np.median(notional) * multiple
+    idx = np.flatnonzero(notional >= threshold)
+    idx = idx[np.argsort(notional[idx])[::-1][:top]]
+    return [(float(prices[i]), float(notional[i])) for i in idx]
+
+
+def depth_levels(book, range_pct=ORDERBOOK_RANGE_PCT, bins=ORDERBOOK_BINS):
+    """
+    Support / resistance berbobot depth + wall + imbalance dalam +-range_pct dari mid.
+    Return dict atau None kalau book kosong
+    """
+    mid = book.mid
+    if mid is None:
+        return None
+
+    bid_mask = book.bid_prices >= mid * (1 - range_pct)
+    ask_mask = book.ask_prices <= mid * (1 + range_pct)
+    bid_p, ask_p = book.bid_prices[bid_mask], book.ask_prices[ask_mask]
+    bid_n = bid_p * book.bid_qtys[bid_mask]
+    ask_n = ask_p * book.ask_qtys[ask_mask]
+    if not len(bid_p) or not len(ask_p):
+        return None
+
+    support, support_notional = _strongest_zone(bid_p, bid_n, bins)
+    resistance, resistance_notional = _strongest_zone(ask_p, ask_n, bins)
+    bid_depth, ask_depth = float(bid_n.sum()), float(ask_n.sum())
+    return {
+        'mid': float(mid),
+        'spread_pct': float((book.ask_prices[0] - book.bid_prices[0]) / mid * 100),
+        'support': support,
+        'support_notional': support_notional,
+        'resistance': resistance,
+        'resistance_notional': resistance_notional,
+        'bid_walls': _walls(bid_p, bid_n),
+        'ask_walls': _walls(ask_p, ask_n),
+        'bid_depth': bid_depth,
+        'ask_depth': ask_depth,
+        'imbalance': (bid_depth - ask_depth) / (bid_depth + ask_depth),
+        'age': time.time() - book.updated_at,
+    }
+
+
+# ========== REKAM & REPLAY ==========
+class DiffRecorder:
+    """Rekam snapshot + diff ke JSONL (1 file per pair per sesi)"""
+
+    def __init__(self, directory, symbol, market_type):
+        os.makedirs(directory, exist_ok=True)
+        name = f"{symbol.replace('/', '_').replace(':', '_')}_{market_type}_{int(time.time())}.jsonl"
+        self.path = os.path.join(directory, name)
+        self.file = open(self.path, 'a')
+
+    def snapshot(self, bids, asks, last_update_id):
+        self._write({'type': 'snapshot', 'lastUpdateId': last_update_id, 'bids': bids, 'asks': asks})
+
+    def diff(self, event):
+        self._write({'type': 'diff', **event})
+
+    def _write(self, record):
+        self.file.write(json.dumps(record, separators=(',', ':')) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def replay(path, symbol='REPLAY', market_type='spot'):
+    """Bangun ulang book dari rekaman JSONL (offline). Return (book, jumlah diff diterapkan)"""
+    book = OrderBook(symbol, market_type)
+    applied = 0
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record['type'] == 'snapshot':
+                book.load_snapshot(record['bids'], record['asks'], record['lastUpdateId'])
+            elif book.apply_diff(record):
+                applied += 1
+    return book, applied
+
+
+# ========== STREAMER ==========
+class OrderBookManager:
+    """
+    Jaga book lokal untuk pair yang diminta: 1 task WebSocket per pair, sync ulang otomatis kalau gap.
+    snapshot_fetcher(symbol, market_type) -> (bids, asks, last_update_id), dipanggil di thread
+    """
+
+    def __init__(self, snapshot_fetcher, record_dir=ORDERBOOK_RECORD_DIR):
+        self.snapshot_fetcher = snapshot_fetcher
+        self.record_dir = record_dir
+        self.books = {}
+        self.tasks = {}
+        self.last_used = {}
+        try:
+            import websockets  # noqa: F401
+            self.available = True
+        except ImportError:
+            print("⚠️ Paket websockets tidak ada, order book lokal nonaktif")
+            self.available = False
+
+    def ensure(self, symbol, market_type):
+        """Mulai stream pair kalau belum jalan (dipanggil dari event loop)"""
+        key = (symbol, market_type)
+        self.prune()
+        self.last_used[key] = time.time()
+        if not self.available:
+            return
+        task = self.tasks.get(key)
+        if task is None or task.done():
+            self.tasks[key] = asyncio.create_task(self._run(symbol, market_type))
+
+    async def levels(self, symbol, market_type, wait=1.5):
+        """Level depth pair (tunggu sebentar kalau stream baru dimulai). None kalau belum siap"""
+        self.ensure(symbol, market_type)
+        deadline = time.monotonic() + wait
+        while True:
+            book = self.books.get((symbol, market_type))
+            if book is not None and book.synced:
+                return depth_levels(book)
+            if time.monotonic() >= deadline or not self.available:
+                return None
+            await asyncio.sleep(0.1)
+
+    def prune(self):
+        """Hentikan stream pair yang lama tidak diminta"""
+        now = time.time()
+        for key, used in list(self.last_used.items()):
+            if now - used > ORDERBOOK_IDLE_SECONDS:
+                task = self.tasks.pop(key, None)
+                if task:
+                    task.cancel()
+                self.books.pop(key, None)
+                self.last_used.pop(key, None)
+
+    async def _run(self, symbol, market_type):
+        import websockets
+
+        stream = f"{symbol.split(':')[0].replace('/', '').lower()}@depth@100ms"
+        url = f"{SPOT_WS_URL if market_type == 'spot' else FUTURES_WS_URL}/{stream}"
+        key = (symbol, market_type)
+        recorder = DiffRecorder(self.record_dir, symbol, market_type) if self.record_dir else None
+        try:
+            while key in self.last_used:
+                try:
+                    async with websockets.connect(url, ping_interval=20, max_queue=4096) as ws:
+                        book = OrderBook(symbol, market_type)
+                        # Snapshot diambil setelah stream terbuka; event yang masuk dulu di-buffer
+                        snapshot_task = asyncio.create_task(
+                            asyncio.to_thread(self.snapshot_fetcher, symbol, market_type)
+                        )
+                        buffered = []
+                        async for raw in ws:
+                            event = json.loads(raw)
+                            if book.last_update_id is None:
+                                buffered.append(event)
+                                if not snapshot_task.done():
+                                    continue
+                                bids, asks, last_update_id = snapshot_task.result()
+                                book.load_snapshot(bids, asks, last_update_id)
+                                if recorder:
+                                    recorder.snapshot(bids, asks, last_update_id)
+                                pending, buffered = buffered, []
+                            else:
+                                pending = [event]
+                            for item in pending:
+                                if recorder:
+                                    recorder.diff(item)
+                                book.apply_diff(item)
+                            if book.synced:
+                                self.books[key] = book
+                except OrderBookGap as e:
+                    print(f"⚠️ Order book {e}, sync ulang")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Order book {symbol} stream error: {type(e).__name__}: {e}")
+                    await asyncio.sleep(3)
+                self.books.pop(key, None)
+        finally:
+            if recorder:
+                recorder.close()
+
+
+def format_orderbook_levels(levels):
+    """Bagian order book untuk ringkasan teknikal Telegram"""
+    if not levels:
+        return ""
+    msg = (
+        f"📚 *ORDER BOOK (±{ORDERBOOK_RANGE_PCT * 100:.0f}%):*\n"
+        f"• Support depth: ${levels['support']:.4f} (${levels['support_notional'] / 1000:,.0f}K)\n"
+        f"• Resistance depth: ${levels['resistance']:.4f} (${levels['resistance_notional'] / 1000:,.0f}K)\n"
+        f"• Imbalance bid/ask: {levels['imbalance'] * 100:+.0f}%\n"
+    )
+    walls = [f"🟢 ${p:.4f}" for p, _ in levels['bid_walls'][:2]] + [f"🔴 ${p:.4f}" for p, _ in levels['ask_walls'][:2]]
+    if walls:
+        msg += f"• Wall: {' | '.join(walls)}\n"
+    return msg
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Rekam diff sintetis lalu replay offline + benchmark merge"""
+    import tempfile
+
+    rng = np.random.default_rng(3)
+    mid = 100.0
+    bids = [[round(mid - 0.01 * i, 2), float(rng.uniform(1, 5))] for i in range(1, 501)]
+    asks = [[round(mid + 0.01 * i, 2), float(rng.uniform(1, 5))] for i in range(1, 501)]
+    bids[120][1] = 400.0  # wall bid di 98.79
+
+    directory = tempfile.mkdtemp()
+    recorder = DiffRecorder(directory, 'TEST/USDT', 'spot')
+    recorder.snapshot(bids, asks, 1000)
+    update_id = 1000
+    for _ in range(2000):
+        side = 'b' if rng.random() < 0.5 else 'a'
+        sign = -1 if side == 'b' else 1
+        # Level 121 (wall) tidak disentuh; 20% update = hapus level
+        ticks = [t for t in rng.integers(1, 500, 5) if t != 121]
+        levels = [[round(mid + sign * 0.01 * t, 2), 0.0 if rng.random() < 0.2 else float(rng.uniform(1, 5))]
+                  for t in ticks]
+        recorder.diff({'e': 'depthUpdate', 'U': update_id + 1, 'u': update_id + 3,
+                       'b': levels if side == 'b' else [], 'a': levels if side == 'a' else []})
+        update_id += 3
+    recorder.close()
+
+    started = time.perf_counter()
+    book, applied = replay(recorder.path, 'TEST/USDT')
+    elapsed = time.perf_counter() - started
+    print(f"🧪 Replay: {applied} diff dalam {elapsed * 1000:.1f} ms ({elapsed / applied * 1e6:.0f} µs/diff)")
+    print(f"Bid {len(book.bid_prices)} level, ask {len(book.ask_prices)} level, last id {book.last_update_id}")
+
+    depth_levels(book)
+    started = time.perf_counter()
+    levels = depth_levels(book)
+    print(f"depth_levels: {(time.perf_counter() - started) * 1000:.2f} ms")
+    print(format_orderbook_levels(levels))
@@ -0,0 +1,155 @@
+"""
+Pair Browser Module
+- Daftar pair sebagai inline keyboard berhalaman (pengganti ReplyKeyboard raksasa 400+ tombol)
+- Urutan A-Z atau volume 24h + filter huruf awal base asset
+- Semua halaman (teks + markup) dihitung 1x per refresh cache pair, dipakai semua user
+- Callback: pairs_{market}_{sort}_{huruf}_{halaman} (navigasi), pick_{market}_{symbol} (analisa)
+"""
+
+import time
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+
+PAGE_COLUMNS = 3
+PAGE_ROWS = 8
+PAGE_SIZE = PAGE_COLUMNS * PAGE_ROWS
+LETTER_COLUMNS = 6
+ALL_LETTERS = '*'
+SORT_LABELS = {'a': "🔤 A-Z", 'v': "💎 Volume"}
+
+
+def base_asset(symbol):
+    """BTC/USDT:USDT -> BTC"""
+    return symbol.split('/')[0]
+
+
+def first_letter(symbol):
+    """Huruf awal base asset (angka dikelompokkan jadi '#')"""
+    char = base_asset(symbol)[:1].upper()
+    return char if char.isalpha() else '#'
+
+
+def _rows(buttons, columns):
+    return [buttons[i:i + columns] for i in range(0, len(buttons), columns)]
+
+
+# ========== BROWSER ==========
+class PairBrowser:
+    """Halaman pair siap kirim per market: pages[(sort, huruf)] = [(teks, markup), ...]"""
+
+    def __init__(self, max_age=600):
+        self.max_age = max_age
+        self.markets = {}
+
+    def needs_rebuild(self, market_type, pairs):
+        built = self.markets.get(market_type)
+        return built is None or built['pairs'] != pairs or time.time() - built['built_at'] > self.max_age
+
+    def build(self, market_type, pairs, tickers=None):
+        """Hitung semua halaman (A-Z / volume x semua huruf). tickers: snapshot {symbol: {'quoteVolume'}}"""
+        started = time.perf_counter()
+        tickers = tickers or {}
+        orders = {
+            'a': sorted(pairs, key=base_asset),
+            'v': sorted(pairs, key=lambda s: -((tickers.get(s) or {}).get('quoteVolume') or 0)),
+        }
+        letters = sorted({first_letter(s) for s in pairs})
+
+        pages = {}
+        for sort, ordered in orders.items():
+            pages[(sort, ALL_LETTERS)] = self._build_pages(market_type, sort, ALL_LETTERS, ordered)
+            for letter in letters:
+                subset = [s for s in ordered if first_letter(s) == letter]
+                pages[(sort, letter)] = self._build_pages(market_type, sort, letter, subset)
+
+        self.markets[market_type] = {
+            'pairs': list(pairs),
+            'built_at': time.time(),
+            'pages': pages,
+            'letters': {sort: self._build_letters(market_type, sort, letters) for sort in orders},
+        }
+        print(f"✅ Pair browser {market_type.upper()}: {sum(len(p) for p in pages.values())} halaman "
+              f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+    def _build_pages(self, market_type, sort, letter, ordered):
+        market_label = "SPOT" if market_type == 'spot' else "FUTURES"
+        total_pages = max(1, -(-len(ordered) // PAGE_SIZE))
+        filter_desc = "" if letter == ALL_LETTERS else f" | Huruf *{letter}*"
+        pages = []
+        for page in range(total_pages):
+            chunk = ordered[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]
+            buttons = [InlineKeyboardButton(base_asset(s), callback_data=f"pick_{market_type}_{s}") for s in chunk]
+            keyboard = _rows(buttons, PAGE_COLUMNS)
+
+            prefix = f"pairs_{market_type}_{sort}_{letter}_"
+            nav = [InlineKeyboardButton("◀️", callback_data=f"{prefix}{page - 1}")] if page > 0 else []
+            nav.append(InlineKeyboardButton(f"{page + 1}/{total_pages}", callback_data=f"{prefix}{page}"))
+            if page < total_pages - 1:
+                nav.append(InlineKeyboardButton("▶️", callback_data=f"{prefix}{page + 1}"))
+            keyboard.append(nav)
+
+            other = 'v' if sort == 'a' else 'a'
+            keyboard.append([
+                InlineKeyboardButton(SORT_LABELS[other], callback_data=f"pairs_{market_type}_{other}_{letter}_0"),
+                InlineKeyboardButton("🔎 Huruf", callback_data=f"pairs_{market_type}_{sort}_{letter}_L"),
+                InlineKeyboardButton("♻️ Semua", callback_data=f"pairs_{market_type}_{sort}_{ALL_LETTERS}_0"),
+            ])
+            text = (
+                f"📊 *{market_label} PAIRS* ({len(ordered)} pair)\n"
+                f"Urutan: {SORT_LABELS[sort]}{filter_desc} | Hal {page + 1}/{total_pages}\n"
+                f"Pilih pair untuk analisa 👇"
+            )
+            pages.append((text, InlineKeyboardMarkup(keyboard)))
+        return pages
+
+    def _build_letters(self, market_type, sort, letters):
+        buttons = [InlineKeyboardButton(l, callback_data=f"pairs_{market_type}_{sort}_{l}_0") for l in letters]
+        keyboard = _rows(buttons, LETTER_COLUMNS)
+        keyboard.append([InlineKeyboardButton("♻️ Semua", callback_data=f"pairs_{market_type}_{sort}_{ALL_LETTERS}_0")])
+        return "🔎 *Filter huruf awal coin:*", InlineKeyboardMarkup(keyboard)
+
+    def page(self, market_type, sort='a', letter=ALL_LETTERS, page=0):
+        """(teks, markup) 1 halaman; page 'L' = pilihan huruf. None kalau market belum dibangun"""
+        built = self.markets.get(market_type)
+        if built is None:
+            return None
+        if page == 'L':
+            return built['letters'].get(sort)
+        pages = built['pages'].get((sort, letter)) or built['pages'][(sort, ALL_LETTERS)]
+        return pages[min(max(int(page), 0), len(pages) - 1)]
+
+
+def parse_callback(data):
+    """pairs_{market}_{sort}_{huruf}_{halaman} -> (market, sort, huruf, halaman)"""
+    _, market_type, sort, letter, page = data.split('_', 4)
+    return market_type, sort, letter, page if page == 'L' else int(page)
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test build halaman untuk 450 pair futures + ukuran payload"""
+    import json
+    import random
+
+    random.seed(3)
+    names = {''.join(random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ') for _ in range(random.randint(2, 6))) for _ in range(450)}
+    pairs = sorted(f"{n}/USDT:USDT" for n in names) + ['1000PEPE/USDT:USDT']
+    tickers = {s: {'quoteVolume': random.random() * 1e9} for s in pairs}
+
+    print("🧪 Testing Pair Browser\n")
+    print("=" * 60)
+    browser = PairBrowser()
+    browser.build('futures', pairs, tickers)
+
+    text, markup = browser.page('futures', 'v', ALL_LETTERS, 0)
+    payload = json.dumps(markup.to_dict())
+    old_payload = json.dumps({'keyboard': [[{'text': p} for p in pairs[i:i + 2]] for i in range(0, len(pairs), 2)]})
+    print(text)
+    print(f"Payload 1 halaman: {len(payload)} byte (keyboard lama: {len(old_payload)} byte)")
+    print(f"Callback terpanjang: {max(len(b.callback_data) for row in markup.inline_keyboard for b in row)} byte (maks 64)")
+
+    started = time.perf_counter()
+    for _ in range(10000):
+        browser.page('futures', *parse_callback('pairs_futures_a_B_1')[1:])
+    print(f"Lookup halaman: {(time.perf_counter() - started) / 10000 * 1e6:.1f} µs")
+    print(browser.page('futures', 'a', '#', 0)[0])
+    print("\n✅ Test completed!")
@@ -0,0 +1,260 @@
+"""
+Profiling Module
+- Profil on-demand analisa live: N analisa berikutnya dijalankan di bawah sampling profiler + tracemalloc
+- Sampler: thread terpisah membaca sys._current_frames() tiap PROFILE_INTERVAL (semua thread: event loop,
+  thread chart / indikator / fetch) -> stack format collapsed (flamegraph.pl, speedscope, inferno)
+- tracemalloc: selisih alokasi awal -> akhir per baris + peak memory, ditulis ke laporan teks
+- Nonaktif: cuma cek 1 counter per request (tanpa thread / tracing)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from itertools import count
+
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'data/profiles')
+PROFILE_NEXT = int(os.getenv('PROFILE_NEXT', '0'))                 # profil N analisa pertama setelah start
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))  # detik antar sample stack
+PROFILE_TRACE_FRAMES = 15                                         # kedalaman traceback tracemalloc
+PROFILE_TOP = 25                                                  # baris top list di laporan
+PROFILE_MAX_RUNS = 20                                             # batas /prof N
+# Frame terdalam ini = thread sedang menunggu (pool kosong, selector event loop): sample dibuang
+IDLE_LEAVES = {'wait', 'select', 'poll', '_worker', 'get', 'accept', 'recv_into', '_wait_for_tstate_lock'}
+
+
+# ========== SAMPLING PROFILER ==========
+def _frame_label(frame):
+    code = frame.f_code
+    # ';' pemisah frame di format collapsed, jadi tidak boleh ada di label
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+
+
+class StackSampler:
+    """Sampling semua thread lewat sys._current_frames(), hasil Counter stack collapsed -> jumlah sample"""
+
+    def __init__(self, interval=PROFILE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or frame.f_code.co_name in IDLE_LEAVES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[';'.join(reversed(labels))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='prof-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def self_time(self):
+        """Counter frame terdalam (self time) -> jumlah sample"""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves
+
+
+# ========== SESI PROFIL ==========
+_SESSION_SEQ = count(1)
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+class ProfileSession:
+    """
+    Context manager 1 analisa: sampler + tracemalloc, tulis <label>.collapsed & <label>.txt ke PROFILE_DIR.
+    Sampler membaca semua thread (tiap stack diawali nama thread); dispatcher menjalankan job profil
+    eksklusif supaya analisa lain tidak ikut tercampur. tracemalloc dipakai bersama (refcount).
+    Dari coroutine pakai `async with`: snapshot tracemalloc & tulis file jalan di thread, event loop tidak tertahan
+    """
+
+    def __init__(self, label, out_dir=PROFILE_DIR, interval=PROFILE_INTERVAL):
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        # pid + urutan sesi: sesi pair/profil sama di detik yang sama (atau worker lain) tidak saling timpa
+        self.name = f"{stamp}_{os.getpid()}-{next(_SESSION_SEQ)}_{label.replace('/', '_').replace(':', '_')}"
+        self.out_dir = out_dir
+        self.sampler = StackSampler(interval)
+        self.paths = None
+
+    def _start(self):
+        global _tracing_users
+        with _tracing_lock:
+            if _tracing_users == 0:
+                tracemalloc.start(PROFILE_TRACE_FRAMES)
+            _tracing_users += 1
+            tracemalloc.reset_peak()
+        self._alloc_start = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self.sampler.start()
+        return self
+
+    def _finish(self):
+        global _tracing_users
+        stacks = self.sampler.stop()
+        wall = time.perf_counter() - self._started
+        alloc_end = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        with _tracing_lock:
+            _tracing_users -= 1
+            if _tracing_users == 0:
+                tracemalloc.stop()
+        try:
+            self.paths = self._write(stacks, wall, alloc_end, peak)
+            print(f"🔬 Profil {self.name}: {wall:.2f}s, {self.sampler.samples} sample -> {self.paths[0]}")
+        except Exception as e:
+            print(f"⚠️ Profil {self.name} gagal ditulis: {type(e).__name__}: {e}")
+
+    def __enter__(self):
+        return self._start()
+
+    def __exit__(self, *exc):
+        self._finish()
+        return False
+
+    async def __aenter__(self):
+        return await asyncio.to_thread(self._start)
+
+    async def __aexit__(self, *exc):
+        await asyncio.to_thread(self._finish)
+        return False
+
+    def _write(self, stacks, wall, alloc_end, peak):
+        os.makedirs(self.out_dir, exist_ok=True)
+        collapsed_path = os.path.join(self.out_dir, f"{self.name}.collapsed")
+        with open(collapsed_path, 'w') as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                  tracemalloc.Filter(False, '<frozen importlib._bootstrap*>')]
+        diff = alloc_end.filter_traces(ignore).compare_to(self._alloc_start.filter_traces(ignore), 'lineno')
+        total = sum(stacks.values()) or 1
+        lines = [
+            f"Profil {self.name}",
+            f"Wall time: {wall:.3f}s | sample: {self.sampler.samples} tiap {self.sampler.interval * 1000:.0f}ms "
+            f"| stack aktif: {total}",
+            f"Peak memory (traced): {peak / 1024 / 1024:.1f} MB",
+            "",
+            f"== Self time (frame terdalam) top {PROFILE_TOP} ==",
+        ]
+        lines += [f"{count / total * 100:6.1f}%  {count:6d}  {frame}"
+                  for frame, count in self.sampler.self_time().most_common(PROFILE_TOP)]
+        lines += ["", f"== Alokasi (selisih awal -> akhir) top {PROFILE_TOP} =="]
+        lines += [f"{stat.size_diff / 1024:+10.1f} KB  {stat.count_diff:+7d} blok  {stat.traceback[0]}"
+                  for stat in sorted(diff, key=lambda s: abs(s.size_diff), reverse=True)[:PROFILE_TOP]]
+
+        report_path = os.path.join(self.out_dir, f"{self.name}.txt")
+        with open(report_path, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        return collapsed_path, report_path
+
+
+# ========== ARMING (ADMIN / ENV) ==========
+class ProfileArm:
+    """Jatah profil N request berikutnya (di proses bot, yang menerima request). Thread-safe"""
+
+    def __init__(self, count=PROFILE_NEXT):
+        self.remaining = max(0, count)
+        self._lock = threading.Lock()
+
+    def arm(self, count):
+        with self._lock:
+            self.remaining = max(0, min(count, PROFILE_MAX_RUNS))
+            return self.remaining
+
+    def take(self):
+        """True kalau request ini diprofil (jatah berkurang 1). Nonaktif: 1 perbandingan int"""
+        if not self.remaining:
+            return False
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def recent_profiles(out_dir=PROFILE_DIR, limit=5):
+    """Nama laporan profil terbaru (untuk /prof)"""
+    if not os.path.isdir(out_dir):
+        return []
+    reports = sorted(name for name in os.listdir(out_dir) if name.endswith('.txt'))
+    return reports[-limit:][::-1]
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test: profil beban numpy + alokasi di thread lain, cek overhead saat nonaktif"""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+    import numpy as np
+
+    def heavy_indicators(n):
+        data = np.random.default_rng(1).normal(size=(n, 6))
+        return [np.convolve(data[:, 4], np.ones(20) / 20, mode='valid') for _ in range(200)]
+
+    def heavy_format(n):
+        return "\n".join(f"{i}: {i * 1.2345:.4f}" for i in range(n))
+
+    print("🧪 Testing Profiling Module\n")
+    print("=" * 60)
+    arm = ProfileArm(0)
+    started = time.perf_counter()
+    for _ in range(1000000):
+        arm.take()
+    print(f"Overhead nonaktif: {(time.perf_counter() - started) * 1000:.0f} ns / request")
+
+    arm.arm(1)
+    print(f"Armed: take() -> {arm.take()}, lalu {arm.take()}")
+    out_dir = tempfile.mkdtemp()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with ProfileSession('BTC/USDT_spot', out_dir) as session:
+            keep = pool.submit(heavy_indicators, 20000).result()
+            text = pool.submit(heavy_format, 200000).result()
+    collapsed, report = session.paths
+    with open(collapsed) as f:
+        print(f"Collapsed: {sum(1 for _ in f)} stack unik")
+    with open(report) as f:
+        print("".join(f.readlines()[:12]))
+    print(f"tracemalloc aktif setelah sesi: {tracemalloc.is_tracing()}")
+
+    async def loop_lag():
+        """Jeda terbesar event loop selama sesi async (snapshot & tulis laporan di thread)"""
+        worst, stop = 0.0, asyncio.Event()
+
+        async def ticker():
+            nonlocal worst
+            while not stop.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.001)
+                worst = max(worst, time.perf_counter() - started)
+
+        tick = asyncio.create_task(ticker())
+        async with ProfileSession('ETH/USDT_spot', out_dir):
+            await asyncio.to_thread(heavy_indicators, 20000)
+        stop.set()
+        await tick
+        return worst
+
+    print(f"Async: jeda event loop maks {asyncio.run(loop_lag()) * 1000:.0f} ms")
+    print(f"Laporan terbaru: {recent_profiles(out_dir)}")
+    print("\n✅ Test completed!")
@@ -0,0 +1,279 @@
+"""
+Prompt Builder Module
+- System/instruction prefix statis per profil (di-cache, identik tiap request)
+- Data indikator di-encode ringkas: 1 baris per timeframe
+- Token budget per request (news & detail timeframe konteks dipangkas kalau lewat)
+"""
+
+import math
+import os
+from functools import lru_cache
+from indicators import FIB_KEYS, IndicatorSnapshot
+
+# Estimasi kasar tokenizer Llama untuk teks campuran Indonesia + angka
+CHARS_PER_TOKEN = 3.5
+PROMPT_TOKEN_BUDGET = int(os.getenv('PROMPT_TOKEN_BUDGET', '900'))
+MAX_COMPLETION_TOKENS = int(os.getenv('GROQ_MAX_COMPLETION_TOKENS', '1200'))
+
+TREND_CODES = {1: 'UP', -1: 'DOWN', 0: 'SIDE'}
+
+
+def estimate_tokens(text):
+    """Estimasi jumlah token dari panjang teks"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def fmt_price(value):
+    """Format harga dengan jumlah desimal sesuai besarnya (hemat token, tanpa notasi e)"""
+    value = float(value)
+    if value == 0:
+        return "0"
+    decimals = min(8, max(2, 4 - math.floor(math.log10(abs(value)))))
+    return f"{value:.{decimals}f}"
+
+
+def fmt_num(value):
+    """Format angka kecil (MACD) dengan 4 digit signifikan"""
+    return f"{float(value):.4g}"
+
+
+# ========== SYSTEM PROMPT (STATIS) ==========
+@lru_cache(maxsize=None)
+def build_system_prompt(style, entry_tf):
+    """System prompt + instruksi + legenda data. Sama persis untuk profil yang sama"""
+    return (
+        f"Kamu trader profesional ahli {style.lower()} crypto. Analisa AKURAT, SPESIFIK, ACTIONABLE; "
+        f"selalu kombinasikan teknikal dengan sentiment news. Bahasa Indonesia, to the point, "
+        f"angka spesifik (jangan asal angka).\n\n"
+        f"Format data (1 baris per timeframe, timeframe terbesar dulu):\n"
+        f"TF ROLE|P=harga|T=trend UP/DOWN/SIDE|RSI|MA=MA20/MA50|MACD=line/signal/hist|"
+        f"BB=upper/mid/lower|SR=support/resistance|SW=swing dominan low-high/arah|FIB=.382/.5/.618/.786|"
+        f"EXT=1.272/1.618|NF=fib terdekat\n\n"
+        f"Jawab dengan format:\n"
+        f"1. 📊 *KONDISI PASAR* — kondisi tiap timeframe, trend & momentum selaras?\n"
+        f"2. 📰 *DAMPAK NEWS* — mendukung atau menghambat entry?\n"
+        f"3. 🎯 *FIBONACCI* — harga di level Fib mana, S/R Fib terdekat, potensi bounce/breakdown\n"
+        f"4. 📈 *SINYAL {style.upper()}* — BUY / SELL / TUNGGU + alasan\n"
+        f"5. 💰 *ENTRY / EXIT PLAN* (format tree):\n"
+        f"🎯 *ENTRY POINT*\n├─ Price: $X\n├─ Kondisi: ...\n└─ Timeframe: {entry_tf}\n"
+        f"🟢 *TAKE PROFIT*\n├─ TP1: $X (alasan)\n├─ TP2: $X (alasan)\n└─ TP3: $X (alasan)\n"
+        f"🔴 *STOP LOSS*\n└─ SL: $X (alasan)\n"
+        f"📊 *RISK/REWARD*\n└─ Ratio: 1:X (perhitungan)\n"
+        f"6. ⚠️ *RISIKO* — risiko utama & kondisi yang harus diwaspadai\n"
+        f"Jelaskan MENGAPA tiap level dipilih (Fib/support/resistance)."
+    )
+
+
+# ========== ENCODE DATA INDIKATOR ==========
+def encode_frame(frame, detail='full'):
+    """Encode indikator 1 timeframe jadi 1 baris ringkas"""
+    ind = frame['ind']
+    parts = [
+        f"{frame['tf']} {frame['role']}",
+        f"P={fmt_price(ind.current_price)}",
+        f"T={TREND_CODES[ind.trend_dir]}",
+        f"RSI={ind.rsi:.1f}",
+        f"MACD={fmt_num(ind.macd_line)}/{fmt_num(ind.macd_signal)}/{fmt_num(ind.macd_hist)}",
+        f"SR={fmt_price(ind.support)}/{fmt_price(ind.resistance)}",
+    ]
+    if detail == 'full':
+        nearest_key, nearest_price = ind.nearest_fib
+        parts += [
+            f"MA={fmt_price(ind.ma20)}/{fmt_price(ind.ma50)}",
+            f"BB={fmt_price(ind.bb_upper)}/{fmt_price(ind.bb_mid)}/{fmt_price(ind.bb_lower)}",
+            f"SW={fmt_price(ind.swing_low)}-{fmt_price(ind.swing_high)}/{TREND_CODES[ind.swing_dir]}",
+            "FIB=" + "/".join(fmt_price(ind.fib(k)) for k in ('0.382', '0.500', '0.618', '0.786')),
+            f"EXT={fmt_price(ind.fib('1.272'))}/{fmt_price(ind.fib('1.618'))}",
+            f"NF={nearest_key}@{fmt_price(nearest_price)}",
+        ]
+    # Level order book (hanya timeframe entry, kalau book lokal tersedia)
+    book = ind.orderbook
+    if book:
+        parts.append(f"OB={fmt_price(book['support'])}/{fmt_price(book['resistance'])}/IMB{book['imbalance'] * 100:+.0f}%")
+    # Data futures (funding / open interest / likuidasi 1 jam) dari cache kolumnar
+    futures = ind.futures
+    if futures:
+        if futures.get('funding_rate') is not None:
+            parts.append(f"FR={futures['funding_rate'] * 100:+.4f}%")
+        if futures.get('open_interest') is not None:
+            change = f"({futures['oi_change_pct']:+.1f}%)" if futures.get('oi_change_pct') is not None else ""
+            parts.append(f"OI={futures['open_interest'] / 1e6:.1f}M{change}")
+        if futures.get('liq_long_1h') or futures.get('liq_short_1h'):
+            parts.append(f"LIQ1H=L{(futures['liq_long_1h'] or 0) / 1e6:.2f}M/S{(futures['liq_short_1h'] or 0) / 1e6:.2f}M")
+    return "|".join(parts)
+
+
+def build_user_prompt(symbol, market_label, style, frames, news_lines, short_frames=0, market_line=None):
+    """Pesan user: header + 1 baris per timeframe + breadth market + news"""
+    lines = [f"{symbol} {market_label} {style.upper()}"]
+    for i, frame in enumerate(frames):
+        # Timeframe konteks (paling atas) yang pertama diringkas kalau budget kurang
+        lines.append(encode_frame(frame, 'short' if i < short_frames else 'full'))
+    if market_line:
+        lines.append(f"MKT|{market_line}")
+    lines.append("NEWS:")
+    lines += news_lines if news_lines else ["-"]
+    return "\n".join(lines)
+
+
+def build_prompt(symbol, market_label, style, frames, news_text, budget=PROMPT_TOKEN_BUDGET, market_line=None):
+    """
+    Bangun (system, user, est_tokens) dalam batas budget token.
+    Urutan pangkas: item news dari bawah -> detail timeframe konteks -> news habis.
+    """
+    system = build_system_prompt(style, frames[-1]['tf'])
+    system_tokens = estimate_tokens(system)
+    news_lines = [line.strip() for line in news_text.splitlines() if line.strip()]
+
+    short_frames = 0
+    while True:
+        user = build_user_prompt(symbol, market_label, style, frames, news_lines, short_frames, market_line)
+        total = system_tokens + estimate_tokens(user)
+        if total <= budget:
+            break
+        if len(news_lines) > 1:
+            news_lines = news_lines[:-1]
+        elif short_frames < len(frames) - 1:
+            short_frames += 1
+        elif news_lines:
+            news_lines = []
+        else:
+            break  # Sudah minimal, kirim apa adanya
+
+    return system, user, total
+
+
+# ========== BENCHMARK FIXTURE ==========
+def _fixture_frames():
+    """Indikator contoh (BTC) untuk benchmark ukuran prompt"""
+    def ind(price, trend_dir, rsi):
+        low, high = price * 0.98, price * 1.01
+        return IndicatorSnapshot(
+            trend_dir=trend_dir, swing_dir=1, current_price=price, rsi=rsi,
+            ma20=price * 0.999, ma50=price * 0.997,
+            macd_line=12.345678, macd_signal=10.123456, macd_hist=2.222222,
+            bb_upper=price * 1.006, bb_mid=price, bb_lower=price * 0.994,
+            support=low, resistance=high, swing_low=low, swing_high=high, price_change=0.0, volume=0.0,
+        )
+    return [
+        {'tf': '15m', 'role': 'Trend', 'ind': ind(67321.45, 1, 61.2)},
+        {'tf': '5m', 'role': 'Entry', 'ind': ind(67321.45, 0, 48.7)},
+    ]
+
+
+def _legacy_prompt(symbol, market_label, style, frames, news_text):
+    """Prompt format lama (system + user), disusun ulang persis dari template lama untuk benchmark"""
+    style = style.upper()
+    tf_list = " dan ".join(frame['tf'] for frame in frames)
+    entry_tf = frames[-1]['tf']
+    units = {'m': 'Menit', 'h': 'Jam', 'd': 'Hari'}
+    blocks = []
+    for frame in frames:
+        ind = frame['ind']
+        fib = dict(zip(FIB_KEYS, ind.fib_prices))
+        nearest_key, nearest_price = ind.nearest_fib
+        blocks.append(
+            f"===== DATA TIMEFRAME {frame['tf'][:-1]} {units[frame['tf'][-1]].upper()} ({frame['role'].upper()}) =====\n"
+            f"- Harga: ${ind.current_price:.4f}\n"
+            f"- Trend: {ind.trend}\n"
+            f"- RSI: {ind.rsi:.1f}\n"
+            f"- MA20: ${ind.ma20:.4f}\n"
+            f"- MA50: ${ind.ma50:.4f}\n"
+            f"- MACD Line: {ind.macd_line:.6f} | Signal: {ind.macd_signal:.6f} | Histogram: {ind.macd_hist:.6f}\n"
+            f"- Bollinger Bands: Upper ${ind.bb_upper:.4f} | Mid ${ind.bb_mid:.4f} | Lower ${ind.bb_lower:.4f}\n"
+            f"- Support: ${ind.support:.4f} | Resistance: ${ind.resistance:.4f}\n"
+            f"- Fibonacci Level Terdekat: {nearest_key} di ${nearest_price:.4f}\n"
+            f"- Swing High: ${ind.swing_high:.4f} | Swing Low: ${ind.swing_low:.4f}\n"
+            f"- Fib Levels: 0.382=${fib['0.382']:.4f} | 0.500=${fib['0.500']:.4f} | 0.618=${fib['0.618']:.4f} | 0.786=${fib['0.786']:.4f}\n"
+            f"- Fib Extension: 1.272=${fib['1.272']:.4f} | 1.618=${fib['1.618']:.4f}\n"
+        )
+    data_blocks = "\n".join(blocks)
+
+    system = (f"Kamu adalah trader profesional yang ahli {style.lower()} crypto. Berikan analisa teknikal yang "
+              f"AKURAT, SPESIFIK, dan ACTIONABLE. Selalu kombinasikan analisa teknikal dengan sentiment news.")
+    user = f"""
+Kamu adalah trader profesional yang ahli dalam {style} crypto.
+Analisa secara LENGKAP dan DETAIL pair {symbol} ({market_label}) untuk strategi {style}.
+
+{data_blocks}
+===== NEWS TERBARU =====
+{news_text}
+
+===== INSTRUKSI ANALISA =====
+Berikan analisa {style} yang LENGKAP dalam format berikut:
+
+1. 📊 KONDISI PASAR SEKARANG
+   - Jelaskan kondisi dari {tf_list}
+   - Apakah trend dan momentum selaras?
+
+2. 📰 DAMPAK NEWS
+   - Bagaimana news di atas mempengaruhi harga?
+   - Apakah news mendukung atau menghambat entry?
+
+3. 🎯 FIBONACCI ANALISA
+   - Harga sekarang di level Fib mana?
+   - Level support/resistance Fib terdekat?
+   - Potensi bounce atau breakdown di mana?
+
+4. 📈 SINYAL {style}
+   - BUY / SELL / TUNGGU?
+   - Jelaskan alasannya berdasarkan semua data di atas.
+
+5. 💰 ENTRY / EXIT PLAN
+   Format seperti ini (gunakan emoji dan spasi yang jelas):
+   
+   🎯 *ENTRY POINT*
+   ├─ Price: $XX.XXXX
+   ├─ Kondisi: [jelaskan kondisi entry]
+   └─ Timeframe: {entry_tf}
+   
+   🟢 *TAKE PROFIT*
+   ├─ TP1: $XX.XXXX (Fib X.XXX atau resistance)
+   ├─ TP2: $XX.XXXX (Fib X.XXX atau extension)
+   └─ TP3: $XX.XXXX (target maksimal)
+   
+   🔴 *STOP LOSS*
+   └─ SL: $XX.XXXX (di bawah/atas Fib/Support)
+   
+   📊 *RISK/REWARD*
+   └─ Ratio: 1:X (dijelaskan perhitungannya)
+
+6. ⚠️ RISIKO
+   - Apa risiko utama dari trade ini?
+   - Kondisi apa yang harus diwaspadai?
+
+PENTING: 
+- Untuk bagian ENTRY/EXIT PLAN, gunakan format TREE (├─ dan └─) seperti contoh di atas
+- Gunakan *bold* untuk judul setiap bagian (ENTRY POINT, TAKE PROFIT, dll)
+- Berikan angka SPESIFIK untuk setiap price level
+- Jelaskan MENGAPA level tersebut dipilih (Fib berapa, support/resistance, dll)
+
+Gunakan bahasa Indonesia yang JELAS dan TO THE POINT.
+Jawab dengan SANGAT SPESIFIK, jangan asal-asalan angka.
+"""
+    return system, user
+
+
+if __name__ == '__main__':
+    """Benchmark ukuran prompt: format lama vs compact"""
+    frames = _fixture_frames()
+    news_text = (
+        "1. [NETRAL ➡️] #1 Trending: Pepe (PEPE)\n"
+        "2. [NETRAL ➡️] #2 Trending: Bitcoin (BTC)\n"
+        "3. [NETRAL ➡️] #3 Trending: Solana (SOL)\n"
+        "4. [BULLISH ✅] 📈 Global Market Cap 24h: +2.31% | BTC Dominance: 54.2%\n"
+    )
+
+    legacy_system, legacy_user = _legacy_prompt('BTC/USDT', 'SPOT', 'Scalping', frames, news_text)
+    legacy_tokens = estimate_tokens(legacy_system + legacy_user)
+    system, user, total = build_prompt('BTC/USDT', 'SPOT', 'Scalping', frames, news_text)
+
+    print("🧪 Prompt Benchmark (fixture BTC/USDT 15m + 5m)\n")
+    print("=" * 60)
+    print(f"Format lama  : ~{legacy_tokens} token input, completion cap 2500")
+    print(f"Compact      : ~{total} token input "
+          f"(system {estimate_tokens(system)} statis + user {estimate_tokens(user)}), "
+          f"completion cap {MAX_COMPLETION_TOKENS}")
+    print(f"Hemat        : {(1 - total / legacy_tokens) * 100:.0f}% token input")
+    print("=" * 60)
+    print(user)
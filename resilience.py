@@ -0,0 +1,152 @@
+"""
+Resilience Module
+- Deadline per request analisa: waktu absolut (epoch) yang ikut job di antrian, tiap tahap pakai sisa waktunya
+- Circuit breaker per dependency (binance_spot, binance_futures, coingecko, groq, local):
+  gagal beruntun -> OPEN (langsung gagal tanpa network) -> HALF_OPEN (1 percobaan) -> CLOSED
+- Registry breaker dibagi semua modul dalam 1 proses (status untuk log / admin)
+"""
+
+import os
+import threading
+import time
+
+ANALYSIS_DEADLINE = float(os.getenv('ANALYSIS_DEADLINE', '45'))        # detik, klik -> hasil lengkap
+BREAKER_FAILURES = int(os.getenv('BREAKER_FAILURES', '4'))             # gagal beruntun sebelum OPEN
+BREAKER_RESET = float(os.getenv('BREAKER_RESET', '30'))                 # detik OPEN sebelum dicoba lagi
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Dependency sedang OPEN: call ditolak tanpa network"""
+
+
+# ========== DEADLINE ==========
+class Deadline:
+    """Batas waktu 1 request. at = epoch detik (bisa diserialisasi di payload job)"""
+
+    def __init__(self, seconds=ANALYSIS_DEADLINE, at=None):
+        self.at = at if at is not None else time.time() + seconds
+
+    def remaining(self, cap=None):
+        """Sisa detik (>= 0), dibatasi `cap` kalau ada"""
+        left = max(0.0, self.at - time.time())
+        return min(left, cap) if cap is not None else left
+
+    @property
+    def expired(self):
+        return time.time() >= self.at
+
+
+# ========== CIRCUIT BREAKER ==========
+class CircuitBreaker:
+    """Breaker 1 dependency, thread-safe (dipakai dari thread ccxt & event loop)"""
+
+    def __init__(self, name, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET):
+        self.name = name
+        self.max_failures = failures
+        self.reset_after = reset_after
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.probe_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Boleh kirim request? OPEN -> False sampai reset_after lewat, lalu 1 probe (HALF_OPEN)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() - self.opened_at >= self.reset_after:
+                self.state = HALF_OPEN
+                self.probing = False
+            # Probe yang tidak pernah melapor (caller crash) dianggap hilang setelah reset_after
+            if self.state == HALF_OPEN and (not self.probing or time.time() - self.probe_at >= self.reset_after):
+                self.probing = True
+                self.probe_at = time.time()
+                return True
+            return False
+
+    def check(self):
+        """Seperti allow() tapi raise CircuitOpen"""
+        if not self.allow():
+            raise CircuitOpen(f"{self.name} sedang bermasalah, dicoba lagi dalam {self.retry_in():.0f} detik")
+
+    def retry_in(self):
+        return max(0.0, self.opened_at + self.reset_after - time.time()) if self.state != CLOSED else 0.0
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                print(f"✅ Breaker {self.name}: pulih (CLOSED)")
+            self.state = CLOSED
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.max_failures):
+                self.state = OPEN
+                self.opened_at = time.time()
+                self.probing = False
+                print(f"🔌 Breaker {self.name}: OPEN {self.reset_after:.0f} detik ({self.failures} gagal beruntun)")
+
+    def status(self):
+        return {'name': self.name, 'state': self.state, 'failures': self.failures, 'retry_in': round(self.retry_in(), 1)}
+
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def get_breaker(name):
+    """Breaker bersama per nama dependency (dibuat saat pertama diminta)"""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = _BREAKERS[name] = CircuitBreaker(name)
+        return breaker
+
+
+def breaker_status():
+    """Status semua breaker (untuk log / admin)"""
+    with _BREAKERS_LOCK:
+        return [b.status() for b in _BREAKERS.values()]
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test siklus breaker CLOSED -> OPEN -> HALF_OPEN -> CLOSED + deadline"""
+    print("🧪 Testing Resilience Module\n")
+    print("=" * 60)
+    breaker = CircuitBreaker('dummy', failures=3, reset_after=0.3)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    print(breaker.status())
+    try:
+        breaker.check()
+    except CircuitOpen as e:
+        print(f"Fail fast: {e}")
+
+    time.sleep(0.35)
+    print(f"Probe diizinkan: {breaker.allow()} | probe kedua: {breaker.allow()}")
+    breaker.record_failure()
+    print(f"Probe gagal -> {breaker.status()}")
+    time.sleep(0.35)
+    breaker.allow()
+    breaker.record_success()
+    print(breaker.status())
+
+    started = time.perf_counter()
+    for _ in range(100000):
+        breaker.allow()
+    print(f"allow(): {(time.perf_counter() - started) * 10:.2f} µs")
+
+    deadline = Deadline(0.2)
+    print(f"Deadline sisa {deadline.remaining():.2f}s, cap 0.05 -> {deadline.remaining(0.05):.2f}s")
+    time.sleep(0.25)
+    print(f"Expired: {deadline.expired}, sisa {deadline.remaining()}")
+    print("\n✅ Test completed!")
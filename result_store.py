@@ -0,0 +1,168 @@
+"""
+Result Store Module
+- Simpan hasil analisa (indikator, sinyal, news, AI, chart) ke SQLite + folder blob chart
+- Key: (symbol, market, profil, open time candle entry) -> request sama dalam 1 candle dilayani dari store
+- History per pair (paging) & data sinyal untuk scoring akurasi tanpa hitung ulang
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import numpy as np
+
+RESULT_DB_PATH = os.getenv('RESULT_DB_PATH', 'data/results.db')
+RESULT_BLOB_DIR = os.getenv('RESULT_BLOB_DIR', 'data/charts')
+RESULT_RETENTION_DAYS = int(os.getenv('RESULT_RETENTION_DAYS', '30'))
+# Prune data lama tiap N kali simpan
+PRUNE_EVERY = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol          TEXT NOT NULL,
+    market_type     TEXT NOT NULL,
+    profile         TEXT NOT NULL,
+    timeframe       TEXT NOT NULL,
+    candle_time     INTEGER NOT NULL,
+    created_at      REAL NOT NULL,
+    direction       TEXT,
+    signal_json     TEXT,
+    indicators      BLOB,
+    news_text       TEXT,
+    ai_text         TEXT,
+    ai_source       TEXT,
+    signal_text     TEXT,
+    caption         TEXT,
+    body            TEXT,
+    chart_path      TEXT,
+    UNIQUE (symbol, market_type, profile, candle_time)
+);
+CREATE INDEX IF NOT EXISTS idx_results_pair ON results (symbol, market_type, created_at DESC);
+"""
+
+COLUMNS = (
+    'symbol', 'market_type', 'profile', 'timeframe', 'candle_time', 'created_at', 'direction',
+    'signal_json', 'indicators', 'news_text', 'ai_text', 'ai_source',
+    'signal_text', 'caption', 'body', 'chart_path',
+)
+
+
+# ========== SERIALISASI ==========
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Tidak bisa serialisasi {type(value).__name__}")
+
+
+def signal_to_json(signal):
+    return json.dumps(signal, default=_json_default, separators=(',', ':'))
+
+
+# ========== STORE ==========
+class ResultStore:
+    """SQLite (WAL, aman dipakai beberapa proses di 1 host) + file chart di folder blob"""
+
+    def __init__(self, db_path=RESULT_DB_PATH, blob_dir=RESULT_BLOB_DIR):
+        self.db_path = db_path
+        self.blob_dir = blob_dir
+        self._local = threading.local()
+        self._saves = 0
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        os.makedirs(blob_dir, exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            # DB lama: indikator dulu disimpan sebagai JSON (indicators_json), sekarang blob snapshot biner
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(results)")}
+            if 'indicators' not in existing:
+                conn.execute("ALTER TABLE results ADD COLUMN indicators BLOB")
+
+    def _conn(self):
+        """1 koneksi per thread (dipanggil dari asyncio.to_thread)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def find(self, symbol, market_type, profile, candle_time):
+        """Hasil untuk candle ini (dedup) atau None"""
+        row = self._conn().execute(
+            "SELECT * FROM results WHERE symbol=? AND market_type=? AND profile=? AND candle_time=?",
+            (symbol, market_type, profile, candle_time)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get(self, result_id):
+        row = self._conn().execute("SELECT * FROM results WHERE id=?", (result_id,)).fetchone()
+        return dict(row) if row else None
+
+    def save(self, result, chart_path=None, keep_chart=False):
+        """
+        Simpan / timpa hasil 1 candle. Chart dipindah ke folder blob
+        (keep_chart=True: dicopy, misal chart milik warm cache). Return id
+        """
+        stored_chart = None
+        if chart_path and os.path.exists(chart_path):
+            name = (f"{result['symbol'].replace('/', '_').replace(':', '_')}_{result['market_type']}_"
+                    f"{result['profile']}_{result['candle_time']}{os.path.splitext(chart_path)[1] or '.png'}")
+            stored_chart = os.path.join(self.blob_dir, name)
+            (shutil.copyfile if keep_chart else os.replace)(chart_path, stored_chart)
+
+        row = dict(result, chart_path=stored_chart, created_at=result.get('created_at') or time.time())
+        # Hasil candle yang sama ditimpa: chart lama dengan format lain (PNG/JPEG) ikut dihapus
+        previous = self.find(result['symbol'], result['market_type'], result['profile'], result['candle_time'])
+        if previous and previous['chart_path'] and previous['chart_path'] != stored_chart \
+                and os.path.exists(previous['chart_path']):
+            os.remove(previous['chart_path'])
+        with self._conn() as conn:
+            cursor = conn.execute(
+                f"INSERT OR REPLACE INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [row.get(col) for col in COLUMNS]
+            )
+            result_id = cursor.lastrowid
+
+        self._saves += 1
+        if self._saves % PRUNE_EVERY == 0:
+            self.prune()
+        return result_id
+
+    def history(self, symbol, market_type, offset=0, limit=5):
+        """Hasil terbaru dulu. Return (rows, total)"""
+        conn = self._conn()
+        total = conn.execute(
+            "SELECT COUNT(*) FROM results WHERE symbol=? AND market_type=?", (symbol, market_type)
+        ).fetchone()[0]
+        rows = conn.execute(
+            "SELECT id, profile, timeframe, candle_time, created_at, direction, signal_json, ai_source "
+            "FROM results WHERE symbol=? AND market_type=? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+            (symbol, market_type, limit, offset)
+        ).fetchall()
+        return [dict(r) for r in rows], total
+
+    def signals(self, since=None):
+        """Sinyal tersimpan (untuk scoring akurasi): list dict tanpa teks/chart"""
+        rows = self._conn().execute(
+            "SELECT id, symbol, market_type, profile, timeframe, candle_time, created_at, direction, signal_json "
+            "FROM results WHERE created_at >= ? ORDER BY created_at",
+            (since or 0,)
+        ).fetchall()
+        return [dict(r, signal=json.loads(r['signal_json'] or 'null')) for r in rows]
+
+    def prune(self, days=RESULT_RETENTION_DAYS):
+        """Hapus hasil (dan chart) lebih tua dari `days` hari"""
+        cutoff = time.time() - days * 86400
+        with self._conn() as conn:
+            old = conn.execute("SELECT chart_path FROM results WHERE created_at < ?", (cutoff,)).fetchall()
+            conn.execute("DELETE FROM results WHERE created_at < ?", (cutoff,))
+        for (path,) in old:
+            if path and os.path.exists(path):
+                os.remove(path)
+        if old:
+            print(f"🧹 Result store: {len(old)} hasil lama dihapus")
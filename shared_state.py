@@ -0,0 +1,223 @@
+"""
+Shared State Module
+- State bersama antar worker: cooldown user, cache (pair / ticker / candle), antrian job analisa
+- MemoryBackend: in-process (default, cukup untuk 1 proses)
+- RedisBackend: Redis / server Redis-compatible (Valkey, KeyDB, Dragonfly) untuk banyak proses / node
+"""
+
+import io
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import numpy as np
+
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'memory')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0')
+KEY_PREFIX = os.getenv('STATE_KEY_PREFIX', 'tradingku:')
+# Identitas proses ini (untuk lease / leader antar worker)
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}".encode()
+
+
+# ========== SERIALISASI ==========
+def dumps_json(value):
+    return json.dumps(value, separators=(',', ':')).encode()
+
+
+def loads_json(raw):
+    return json.loads(raw) if raw is not None else None
+
+
+def dumps_array(array, fetched_at=None):
+    """numpy array -> bytes (format .npy) + timestamp fetch (8 byte di depan)"""
+    buf = io.BytesIO()
+    buf.write(np.float64(fetched_at if fetched_at is not None else time.time()).tobytes())
+    np.save(buf, np.ascontiguousarray(array), allow_pickle=False)
+    return buf.getvalue()
+
+
+def loads_array(raw):
+    """bytes -> (array, fetched_at) atau (None, None)"""
+    if raw is None:
+        return None, None
+    fetched_at = float(np.frombuffer(raw[:8], dtype=np.float64)[0])
+    return np.load(io.BytesIO(raw[8:]), allow_pickle=False), fetched_at
+
+
+# ========== MEMORY BACKEND ==========
+class MemoryBackend:
+    """State in-process (thread-safe). Semua worker harus di proses yang sama"""
+    name = 'memory'
+
+    def __init__(self):
+        self._data = {}
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key, now):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._alive(key, time.time())
+            return item[0] if item else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def set_if_absent(self, key, value, ttl=None):
+        """SET NX: True kalau key belum ada (atomic)"""
+        with self._lock:
+            now = time.time()
+            if self._alive(key, now):
+                return False
+            self._data[key] = (value, now + ttl if ttl else None)
+            return True
+
+    def ttl(self, key):
+        """Sisa TTL (detik) atau None"""
+        with self._lock:
+            item = self._alive(key, time.time())
+            if not item or item[1] is None:
+                return None
+            return item[1] - time.time()
+
+    def incr(self, key, ttl=None):
+        """Counter +1 (TTL di-reset tiap increment). Return nilai baru"""
+        with self._lock:
+            item = self._alive(key, time.time())
+            value = int(item[0]) + 1 if item else 1
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            return value
+
+    def extend_if_owner(self, key, owner, ttl):
+        """Perpanjang TTL key kalau nilainya masih `owner` (atomic). True kalau berhasil"""
+        with self._lock:
+            now = time.time()
+            item = self._alive(key, now)
+            if not item or item[0] != owner:
+                return False
+            self._data[key] = (owner, now + ttl)
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def keys(self, prefix):
+        with self._lock:
+            now = time.time()
+            return [k for k in list(self._data) if k.startswith(prefix) and self._alive(k, now)]
+
+    def _queue(self, name):
+        with self._lock:
+            return self._queues.setdefault(name, queue.Queue())
+
+    def push_job(self, name, payload):
+        self._queue(name).put(payload)
+
+    def pop_job(self, name, timeout=5):
+        """Ambil 1 job (blocking sampai timeout). None kalau kosong"""
+        try:
+            return self._queue(name).get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def queue_size(self, name):
+        return self._queue(name).qsize()
+
+
+# ========== REDIS BACKEND ==========
+class RedisBackend:
+    """State di server Redis-compatible, dipakai bersama semua proses / node"""
+    name = 'redis'
+
+    def __init__(self, url=REDIS_URL, prefix=KEY_PREFIX):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.client.ping()
+        # Compare-and-extend lease dalam 1 script (GET + PEXPIRE atomic di server)
+        self._extend_script = self.client.register_script(
+            "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+            "return redis.call('PEXPIRE', KEYS[1], ARGV[2]) else return 0 end"
+        )
+
+    def _k(self, key):
+        return f"{self.prefix}{key}"
+
+    def get(self, key):
+        return self.client.get(self._k(key))
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self._k(key), value, px=int(ttl * 1000) if ttl else None)
+
+    def set_if_absent(self, key, value, ttl=None):
+        return bool(self.client.set(self._k(key), value, nx=True, px=int(ttl * 1000) if ttl else None))
+
+    def ttl(self, key):
+        ms = self.client.pttl(self._k(key))
+        return ms / 1000 if ms and ms > 0 else None
+
+    def incr(self, key, ttl=None):
+        pipe = self.client.pipeline()
+        pipe.incr(self._k(key))
+        if ttl:
+            pipe.pexpire(self._k(key), int(ttl * 1000))
+        return pipe.execute()[0]
+
+    def extend_if_owner(self, key, owner, ttl):
+        return bool(self._extend_script(keys=[self._k(key)], args=[owner, int(ttl * 1000)]))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self._k(k) for k in keys])
+
+    def keys(self, prefix):
+        start = len(self.prefix)
+        return [k.decode()[start:] for k in self.client.scan_iter(match=f"{self._k(prefix)}*", count=500)]
+
+    def push_job(self, name, payload):
+        self.client.lpush(self._k(f"queue:{name}"), payload)
+
+    def pop_job(self, name, timeout=5):
+        item = self.client.brpop(self._k(f"queue:{name}"), timeout=max(1, int(timeout)))
+        return item[1] if item else None
+
+    def queue_size(self, name):
+        return self.client.llen(self._k(f"queue:{name}"))
+
+
+def acquire_lease(state, key, ttl, owner=WORKER_ID):
+    """
+    Lease sederhana (1 pemegang di semua worker): True kalau proses ini pemegangnya.
+    Pemegang memperpanjang lease tiap panggil; kalau pemegang mati, lease expired setelah ttl
+    """
+    if state.set_if_absent(key, owner, ttl=ttl):
+        return True
+    # Cek pemilik + perpanjang atomic: lease yang expired di antaranya tidak bisa diambil 2 worker
+    return state.extend_if_owner(key, owner, ttl)
+
+
+def build_state_backend():
+    """Pilih backend dari env STATE_BACKEND (memory / redis)"""
+    if STATE_BACKEND == 'redis':
+        try:
+            backend = RedisBackend()
+            print(f"✅ State backend: Redis ({REDIS_URL})")
+            return backend
+        except Exception as e:
+            print(f"⚠️ Redis tidak bisa dipakai ({e}), fallback ke memory")
+    print("✅ State backend: memory (1 proses)")
+    return MemoryBackend()
@@ -0,0 +1,151 @@
+"""
+Signal Engine Module
+- Sinyal rule-based dari IndicatorSnapshot (pure numpy, tanpa network)
+- Arah BUY / SELL / TUNGGU dari voting trend, RSI & MACD semua timeframe
+- Entry, TP1-TP3 (Fib / resistance / extension), SL (support / resistance), R:R
+"""
+
+import numpy as np
+
+# Ambang skor voting (-1..1) untuk BUY / SELL
+SIGNAL_THRESHOLD = 0.5
+# Minimal R:R di TP2 supaya sinyal tidak di-downgrade ke TUNGGU
+MIN_RISK_REWARD = 1.0
+# Jarak minimal TP dari entry (fraksi harga) supaya TP tidak nempel di harga
+MIN_TP_GAP = 0.001
+
+FIB_RATIOS = np.array([0.236, 0.382, 0.5, 0.618, 0.786, 1.0, 1.272, 1.618])
+
+
+def _rsi_vote(rsi):
+    if rsi >= 55:
+        return 1.0
+    if rsi <= 45:
+        return -1.0
+    return 0.0
+
+
+def signal_score(frames):
+    """Skor -1..1: rata-rata berbobot vote trend/RSI/MACD, timeframe lebih besar bobot lebih besar"""
+    votes = np.array([
+        [f['ind'].trend_dir, _rsi_vote(f['ind'].rsi), np.sign(f['ind'].macd_hist)]
+        for f in frames
+    ])
+    # Bobot: timeframe pertama (terbesar) paling berat
+    weights = np.arange(len(frames), 0, -1, dtype=float)[:, None] * np.ones((1, 3))
+    score = float((votes * weights).sum() / weights.sum())
+    # Persetujuan: fraksi vote yang searah dengan skor
+    agreement = float((np.sign(votes) == np.sign(score)).mean()) if score != 0 else 0.0
+    return score, agreement
+
+
+def _pick_targets(levels, entry, direction, count=3):
+    """Ambil `count` level terdekat searah arah trade (di atas entry untuk BUY, di bawah untuk SELL)"""
+    levels = np.unique(levels)
+    if direction == 'BUY':
+        targets = levels[levels > entry * (1 + MIN_TP_GAP)]
+    else:
+        targets = levels[levels < entry * (1 - MIN_TP_GAP)][::-1]
+    return targets[:count]
+
+
+def compute_signal(frames):
+    """
+    Sinyal terstruktur dari frames profil (timeframe terakhir = entry).
+    Return dict: direction, entry, tp (list 3), sl, rr (di TP1/TP2), score, agreement, reasons
+    """
+    ind = frames[-1]['ind']
+    score, agreement = signal_score(frames)
+    entry = float(ind.current_price)
+    reasons = []
+
+    direction = 'TUNGGU'
+    if score >= SIGNAL_THRESHOLD:
+        if ind.rsi >= 70:
+            reasons.append(f"RSI {frames[-1]['tf']} overbought ({ind.rsi:.0f}), tunggu pullback")
+        else:
+            direction = 'BUY'
+    elif score <= -SIGNAL_THRESHOLD:
+        if ind.rsi <= 30:
+            reasons.append(f"RSI {frames[-1]['tf']} oversold ({ind.rsi:.0f}), tunggu rebound")
+        else:
+            direction = 'SELL'
+    else:
+        reasons.append(f"Timeframe belum selaras (skor {score:+.2f})")
+
+    signal = {
+        'direction': direction, 'entry': entry, 'tp': [], 'sl': None, 'rr': None,
+        'score': score, 'agreement': agreement, 'reasons': reasons, 'timeframe': frames[-1]['tf'],
+    }
+    if direction == 'TUNGGU':
+        return signal
+
+    # Buffer SL: setengah standar deviasi Bollinger (volatilitas timeframe entry)
+    buffer = max((ind.bb_upper - ind.bb_mid) / 4, entry * 0.001)
+    low, high = ind.swing_low, ind.swing_high
+    swing_range = high - low
+
+    # Zona likuiditas order book (kalau ada): SL di belakang zona terdekat, zona seberang jadi target
+    support, resistance = ind.support, ind.resistance
+    book_levels = []
+    book = ind.orderbook
+    if book:
+        if book['support'] < entry:
+            support = max(support, book['support'])
+        if book['resistance'] > entry:
+            resistance = min(resistance, book['resistance'])
+        book_levels = [book['support'], book['resistance']]
+
+    if direction == 'BUY':
+        levels = np.r_[low + swing_range * FIB_RATIOS, resistance, ind.bb_upper, book_levels]
+        sl = support - buffer
+        if sl >= entry:
+            sl = entry - 2 * buffer
+    else:
+        levels = np.r_[high - swing_range * FIB_RATIOS, support, ind.bb_lower, book_levels]
+        sl = resistance + buffer
+        if sl <= entry:
+            sl = entry + 2 * buffer
+
+    tp = list(map(float, _pick_targets(levels, entry, direction)))
+    # Kurang dari 3 target: lanjutkan per 1R dari target terakhir
+    risk = abs(entry - sl)
+    step = risk if direction == 'BUY' else -risk
+    while len(tp) < 3:
+        tp.append((tp[-1] if tp else entry) + step)
+
+    rr = [abs(t - entry) / risk for t in tp[:2]] if risk > 0 else [0.0, 0.0]
+    signal.update({'tp': tp, 'sl': float(sl), 'rr': rr})
+
+    if rr[-1] < MIN_RISK_REWARD:
+        reasons.append(f"R:R terlalu kecil (1:{rr[-1]:.2f})")
+        signal['direction'] = 'TUNGGU'
+    else:
+        reasons.append(f"Skor {score:+.2f}, {agreement * 100:.0f}% indikator searah")
+    return signal
+
+
+def format_signal(signal, symbol, market_label):
+    """Format sinyal untuk Telegram (format tree sama seperti ENTRY/EXIT PLAN AI)"""
+    emoji = {'BUY': '🟢', 'SELL': '🔴', 'TUNGGU': '⏸️'}[signal['direction']]
+    msg = (
+        f"⚡ *SINYAL CEPAT {symbol}* ({market_label})\n"
+        f"━━━━━━━━━━━━━━━━━━\n"
+        f"{emoji} *{signal['direction']}*\n"
+    )
+    for reason in signal['reasons']:
+        msg += f"• {reason}\n"
+
+    if signal['direction'] != 'TUNGGU':
+        tp = signal['tp']
+        msg += (
+            f"\n🎯 *ENTRY POINT*\n"
+            f"└─ Price: ${signal['entry']:.4f} ({signal['timeframe']})\n"
+            f"\n🟢 *TAKE PROFIT*\n"
+            + "".join(f"{'└─' if i == len(tp) else '├─'} TP{i}: ${t:.4f}\n" for i, t in enumerate(tp, 1))
+            + f"\n🔴 *STOP LOSS*\n"
+            f"└─ SL: ${signal['sl']:.4f}\n"
+            f"\n📊 *RISK/REWARD*\n"
+            f"└─ TP1 1:{signal['rr'][0]:.2f} | TP2 1:{signal['rr'][-1]:.2f}\n"
+        )
+    return msg
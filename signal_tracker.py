@@ -0,0 +1,331 @@
+"""
+Signal Tracker Module
+- Cek hasil plan entry/TP/SL yang sudah dikirim terhadap candle berikutnya (TP1-TP3 / SL / expired)
+- Index level harga per pair: list terurut + bisect, range high/low 1 candle -> level yang kena
+  dalam O(log n) walau ada ribuan sinyal terbuka
+- Statistik hit-rate per pair di-update incremental saat sinyal ditutup (tanpa scan ulang history)
+"""
+
+import os
+import time
+from bisect import bisect_left, bisect_right
+
+TRACK_MAX_AGE = int(os.getenv('TRACK_MAX_AGE_HOURS', '48')) * 3600   # sinyal tanpa hasil -> expired
+TRACKER_REFRESH = 60                                                   # detik, cek candle baru
+STAT_FIELDS = ('signals', 'closed', 'tp1', 'tp2', 'tp3', 'sl', 'expired')
+
+
+def signal_key(row):
+    """Key unik 1 sinyal = 1 hasil candle di result store"""
+    return f"{row['market_type']}|{row['symbol']}|{row['profile']}|{row['candle_time']}"
+
+
+# ========== INDEX LEVEL HARGA ==========
+class LevelBook:
+    """
+    Level terbuka 1 pair. up: kena saat high >= level (TP BUY, SL SELL),
+    down: kena saat low <= level (TP SELL, SL BUY). Harga & item disimpan di list sejajar terurut
+    """
+
+    def __init__(self):
+        self.prices = {'up': [], 'down': []}
+        self.items = {'up': [], 'down': []}
+
+    def __len__(self):
+        return len(self.prices['up']) + len(self.prices['down'])
+
+    def add(self, side, price, item):
+        i = bisect_right(self.prices[side], price)
+        self.prices[side].insert(i, price)
+        self.items[side].insert(i, item)
+
+    def remove(self, side, price, item):
+        prices, items = self.prices[side], self.items[side]
+        i = bisect_left(prices, price)
+        while i < len(prices) and prices[i] == price:
+            if items[i] == item:
+                del prices[i], items[i]
+                return
+            i += 1
+
+    def trigger(self, high, low):
+        """Ambil (dan buang) semua item yang kena range candle [low, high]"""
+        up = bisect_right(self.prices['up'], high)
+        hits = self.items['up'][:up]
+        del self.prices['up'][:up], self.items['up'][:up]
+        down = bisect_left(self.prices['down'], low)
+        hits += self.items['down'][down:]
+        del self.prices['down'][down:], self.items['down'][down:]
+        return hits
+
+
+# ========== TRACKER ==========
+class SignalTracker:
+    """
+    Sinyal terbuka + index level per (symbol, market) + statistik per pair.
+    State bisa diserialisasi (to_dict / load) supaya leader baru melanjutkan tanpa hitung ganda
+    """
+
+    def __init__(self, max_age=TRACK_MAX_AGE):
+        self.max_age = max_age
+        self.open = {}
+        self.books = {}
+        self.cursor = {}
+        self.stats = {}
+        self.seen = {}
+        self.last_seen = 0.0
+
+    # ----- Registrasi -----
+    def _levels(self, signal):
+        """[(side, harga, item)] semua TP + SL 1 sinyal"""
+        tp_side, sl_side = ('up', 'down') if signal['direction'] == 'BUY' else ('down', 'up')
+        levels = [(tp_side, price, (signal['key'], n)) for n, price in enumerate(signal['tp'], 1)
+                  if n > signal['tp_hit']]
+        levels.append((sl_side, signal['sl'], (signal['key'], 0)))
+        return levels
+
+    def add(self, row):
+        """Daftarkan 1 baris RESULT_STORE.signals() (BUY/SELL dengan TP & SL). Return True kalau baru"""
+        self.last_seen = max(self.last_seen, row['created_at'])
+        plan = row.get('signal') or {}
+        key = signal_key(row)
+        if row.get('direction') not in ('BUY', 'SELL') or not plan.get('tp') or plan.get('sl') is None:
+            return False
+        # Hasil candle yang disimpan ulang (misal AI menyusul) tidak dihitung 2x
+        if key in self.seen:
+            return False
+        self.seen[key] = row['created_at']
+        signal = {
+            'key': key, 'symbol': row['symbol'], 'market_type': row['market_type'],
+            'timeframe': row['timeframe'], 'candle_time': row['candle_time'], 'opened_at': row['created_at'],
+            'direction': row['direction'], 'tp': [float(t) for t in plan['tp']], 'sl': float(plan['sl']),
+            'tp_hit': 0,
+        }
+        self._register(signal)
+        self._stat(signal)['signals'] += 1
+        return True
+
+    def _register(self, signal):
+        pair = (signal['symbol'], signal['market_type'])
+        # Candle sinyal masih berjalan saat sinyal dikirim: high/low-nya bisa terjadi sebelum sinyal ada.
+        # Penilaian mulai dari candle berikutnya (state lama tanpa start_time dihitung ulang di sini)
+        signal.setdefault('start_time', signal['candle_time'] + _tf_seconds(signal['timeframe']) * 1000)
+        self.open[signal['key']] = signal
+        book = self.books.setdefault(pair, LevelBook())
+        for side, price, item in self._levels(signal):
+            book.add(side, price, item)
+        # Candle mulai dicek dari candle setelah candle sinyal (candle yang sudah lewat tidak dihitung)
+        self.cursor[pair] = min(self.cursor.get(pair, signal['start_time']), signal['start_time'])
+
+    def _stat(self, signal):
+        return self.stats.setdefault(f"{signal['market_type']}|{signal['symbol']}", dict.fromkeys(STAT_FIELDS, 0))
+
+    def _close(self, signal, outcome):
+        pair = (signal['symbol'], signal['market_type'])
+        book = self.books.get(pair)
+        if book is not None:
+            for side, price, item in self._levels(signal):
+                book.remove(side, price, item)
+            if not len(book):
+                del self.books[pair]
+                self.cursor.pop(pair, None)
+        del self.open[signal['key']]
+
+        stat = self._stat(signal)
+        stat['closed'] += 1
+        if outcome in ('sl', 'expired'):
+            stat[outcome] += 1
+        for n in range(1, signal['tp_hit'] + 1):
+            stat[f'tp{n}'] += 1
+        return {'key': signal['key'], 'symbol': signal['symbol'], 'outcome': outcome, 'tp_hit': signal['tp_hit']}
+
+    # ----- Update dari candle -----
+    def on_candles(self, symbol, market_type, candles):
+        """
+        Proses candle [ts, o, h, l, c, v] mulai dari cursor pair (candle parsial terakhir diproses ulang
+        di update berikutnya). Return list sinyal yang ditutup
+        """
+        pair = (symbol, market_type)
+        closed = []
+        for row in candles:
+            book = self.books.get(pair)
+            if book is None:
+                break
+            ts = row[0]
+            if ts < self.cursor[pair]:
+                continue
+            self.cursor[pair] = ts
+
+            hits = {}
+            keep = []
+            for key, n in book.trigger(float(row[2]), float(row[3])):
+                signal = self.open.get(key)
+                if signal is None:
+                    continue
+                if ts < signal['start_time']:
+                    keep.append((key, n))
+                    continue
+                hits.setdefault(key, []).append(n)
+            for key, n in keep:
+                signal = self.open[key]
+                side, price, _ = next(l for l in self._levels(signal) if l[2] == (key, n))
+                book.add(side, price, (key, n))
+
+            for key, levels in hits.items():
+                signal = self.open[key]
+                tp_levels = [n for n in levels if n > 0]
+                if tp_levels:
+                    signal['tp_hit'] = max(signal['tp_hit'], *tp_levels)
+                if 0 in levels:
+                    # TP & SL di candle yang sama: urutan tidak diketahui -> anggap SL (konservatif)
+                    if tp_levels:
+                        signal['tp_hit'] = min(signal['tp_hit'], min(tp_levels) - 1)
+                    closed.append(self._close(signal, 'sl'))
+                elif signal['tp_hit'] >= len(signal['tp']):
+                    closed.append(self._close(signal, 'tp3'))
+        return closed
+
+    def expire(self, now=None):
+        """Tutup sinyal yang lebih tua dari max_age"""
+        now = now or time.time()
+        old = [s for s in self.open.values() if now - s['opened_at'] > self.max_age]
+        # Key yang sudah jauh lewat max_age tidak akan disimpan ulang -> boleh dilupakan
+        self.seen = {key: at for key, at in self.seen.items() if now - at <= self.max_age * 2}
+        return [self._close(signal, 'expired') for signal in old]
+
+    def open_pairs(self):
+        """[(symbol, market_type, timeframe terkecil, candle_time tertua)] pair yang punya sinyal terbuka"""
+        pairs = {}
+        for s in self.open.values():
+            pair = (s['symbol'], s['market_type'])
+            tf, since = pairs.get(pair, (s['timeframe'], s['candle_time']))
+            pairs[pair] = (min(tf, s['timeframe'], key=_tf_seconds), min(since, s['candle_time']))
+        return [(symbol, market, tf, since) for (symbol, market), (tf, since) in pairs.items()]
+
+    # ----- Serialisasi -----
+    def to_dict(self):
+        return {
+            'open': list(self.open.values()),
+            'cursor': [[symbol, market, ts] for (symbol, market), ts in self.cursor.items()],
+            'stats': self.stats,
+            'seen': self.seen,
+            'last_seen': self.last_seen,
+        }
+
+    def load(self, state):
+        """Lanjutkan dari to_dict() (leader sebelumnya / checkpoint)"""
+        self.open, self.books, self.cursor = {}, {}, {}
+        for signal in state.get('open', []):
+            self._register(signal)
+        for symbol, market, ts in state.get('cursor', []):
+            if (symbol, market) in self.books:
+                self.cursor[(symbol, market)] = ts
+        self.stats = state.get('stats', {})
+        self.seen = state.get('seen', {})
+        self.last_seen = state.get('last_seen', 0.0)
+
+
+def _tf_seconds(timeframe):
+    units = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+    return int(timeframe[:-1]) * units[timeframe[-1]]
+
+
+# ========== FORMAT TELEGRAM ==========
+def _rates(stat):
+    closed = stat['closed'] or 1
+    return stat['tp1'] / closed * 100, stat['sl'] / closed * 100
+
+
+def format_stats(stats, symbol=None, market_type=None, top=10):
+    """Statistik hasil sinyal: semua pair (top by jumlah sinyal) atau 1 pair"""
+    if symbol:
+        stat = stats.get(f"{market_type}|{symbol}")
+        if not stat:
+            return f"📈 Belum ada sinyal BUY/SELL tercatat untuk {symbol} ({market_type.upper()})."
+        tp1, sl = _rates(stat)
+        closed = stat['closed'] or 1
+        return (
+            f"📈 *STATISTIK SINYAL {symbol}* ({market_type.upper()})\n"
+            f"━━━━━━━━━━━━━━━━━━\n"
+            f"• Sinyal: {stat['signals']} (selesai {stat['closed']}, berjalan {stat['signals'] - stat['closed']})\n"
+            f"• TP1: {stat['tp1']} ({tp1:.0f}%)\n"
+            f"• TP2: {stat['tp2']} ({stat['tp2'] / closed * 100:.0f}%)\n"
+            f"• TP3: {stat['tp3']} ({stat['tp3'] / closed * 100:.0f}%)\n"
+            f"• SL: {stat['sl']} ({sl:.0f}%)\n"
+            f"• Expired: {stat['expired']}\n"
+        )
+
+    if not stats:
+        return "📈 Belum ada sinyal BUY/SELL yang tercatat."
+    totals = {field: sum(s[field] for s in stats.values()) for field in STAT_FIELDS}
+    tp1, sl = _rates(totals)
+    lines = [
+        "📈 *STATISTIK SINYAL*",
+        "━━━━━━━━━━━━━━━━━━",
+        f"Total {totals['signals']} sinyal, selesai {totals['closed']} | TP1 {tp1:.0f}% | SL {sl:.0f}%",
+        "",
+        f"*Top {top} pair:*",
+    ]
+    ranked = sorted(stats.items(), key=lambda item: -item[1]['signals'])[:top]
+    for key, stat in ranked:
+        market, pair = key.split('|', 1)
+        tp1, sl = _rates(stat)
+        lines.append(f"• {pair} ({market.upper()}): {stat['signals']} sinyal | TP1 {tp1:.0f}% | SL {sl:.0f}%")
+    lines.append("\n_Detail per pair: /stats BTC [spot|futures]_")
+    return "\n".join(lines)
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test 5000 sinyal terbuka di 50 pair + replay candle random walk"""
+    import random
+    import numpy as np
+
+    random.seed(7)
+    rng = np.random.default_rng(7)
+    tracker = SignalTracker()
+    now = time.time()
+    base_ts = 1_700_000_000_000
+    pairs = [f"C{i}/USDT" for i in range(50)]
+    for i in range(5000):
+        price = 100.0
+        direction = random.choice(['BUY', 'SELL'])
+        step = 1 if direction == 'BUY' else -1
+        tracker.add({
+            'symbol': random.choice(pairs), 'market_type': 'spot', 'profile': f'p{i}', 'timeframe': '5m',
+            'candle_time': base_ts + random.randint(0, 20) * 300_000, 'created_at': now, 'direction': direction,
+            'signal': {'tp': [price + step * d for d in (0.5, 1.0, 1.5)], 'sl': price - step * random.uniform(0.3, 1.0)},
+        })
+    print("🧪 Testing Signal Tracker\n")
+    print("=" * 60)
+    print(f"Sinyal terbuka: {len(tracker.open)} di {len(tracker.books)} pair")
+
+    started = time.perf_counter()
+    candles_seen = 0
+    for pair in pairs:
+        closes = 100 + np.cumsum(rng.normal(0, 0.15, 200))
+        candles = np.c_[base_ts + np.arange(200) * 300_000, closes, closes + 0.1, closes - 0.1, closes, np.ones(200)]
+        tracker.on_candles(pair, 'spot', candles)
+        candles_seen += len(candles)
+    elapsed = time.perf_counter() - started
+    print(f"Replay {candles_seen} candle: {elapsed * 1000:.1f} ms ({elapsed / candles_seen * 1e6:.1f} µs / candle)")
+    print(f"Masih terbuka: {len(tracker.open)}")
+
+    # Candle sinyal sendiri (high 101.2 sebelum sinyal dikirim di 100) tidak dihitung, candle berikutnya dihitung
+    single = SignalTracker()
+    single.add({'symbol': 'X/USDT', 'market_type': 'spot', 'profile': 'scalping', 'timeframe': '5m',
+                'candle_time': base_ts, 'created_at': now, 'direction': 'BUY',
+                'signal': {'tp': [100.5, 101.0, 102.0], 'sl': 99.0}})
+    single.on_candles('X/USDT', 'spot', [[base_ts, 100.0, 101.2, 98.5, 100.0, 1.0]])
+    assert single.open[next(iter(single.open))]['tp_hit'] == 0 and len(single.open) == 1, "candle sinyal ikut dinilai"
+    single.on_candles('X/USDT', 'spot', [[base_ts + 300_000, 100.0, 100.7, 99.8, 100.6, 1.0]])
+    assert single.open[next(iter(single.open))]['tp_hit'] == 1
+    print("Candle sinyal sendiri tidak dinilai, TP1 kena di candle berikutnya")
+
+    # State bisa dilanjutkan proses lain
+    clone = SignalTracker()
+    clone.load(tracker.to_dict())
+    assert len(clone.open) == len(tracker.open) and clone.stats == tracker.stats
+    print(format_stats(tracker.stats, top=3))
+    print(format_stats(tracker.stats, pairs[0], 'spot'))
+    print("\n✅ Test completed!")
@@ -0,0 +1,119 @@
+"""
+Sparkline Module
+- Mode lite: chart teks Unicode pengganti PNG (untuk user dengan koneksi lambat)
+- Sparkline close per timeframe (blok ▁..█) + tangga level kunci (S/R, Fib, BB, MA) di sekitar harga
+- Pure numpy dari IndicatorSnapshot (tanpa matplotlib), cukup beberapa puluh µs per analisa
+"""
+
+import os
+import numpy as np
+
+SPARK_WIDTH = int(os.getenv('SPARK_WIDTH', '24'))   # karakter per sparkline (muat di layar HP)
+SPARK_BLOCKS = np.array(list('▁▂▃▄▅▆▇█'))
+LADDER_FIB_KEYS = ('0.236', '0.382', '0.500', '0.618', '0.786', '1.272')
+
+
+# ========== SPARKLINE ==========
+def sparkline(values, width=SPARK_WIDTH):
+    """
+    Deret nilai -> string blok Unicode selebar `width`.
+    Deret lebih panjang diringkas per bucket (nilai terakhir bucket = close bucket)
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return ''
+    if len(values) > width:
+        # Ujung bucket dihitung dari belakang supaya close terakhir selalu tampil
+        edges = np.linspace(len(values) - 1, 0, width).round().astype(int)[::-1]
+        values = values[edges]
+    low, high = values.min(), values.max()
+    if high - low <= 0:
+        return SPARK_BLOCKS[3] * len(values)
+    steps = ((values - low) / (high - low) * (len(SPARK_BLOCKS) - 1)).round().astype(int)
+    return ''.join(SPARK_BLOCKS[steps])
+
+
+# ========== TANGGA LEVEL ==========
+def key_levels(ind):
+    """Level kunci (label, harga) dari snapshot: S/R, Fib, BB, MA20, zona order book"""
+    levels = [('Resist', ind.resistance), ('Support', ind.support),
+              ('BB Up', ind.bb_upper), ('BB Low', ind.bb_lower), ('MA20', ind.ma20)]
+    levels += [(f'Fib {key}', ind.fib(key)) for key in LADDER_FIB_KEYS]
+    if ind.orderbook:
+        levels += [('OB Bid', ind.orderbook['support']), ('OB Ask', ind.orderbook['resistance'])]
+    return levels
+
+
+def level_ladder(ind, span=3):
+    """
+    Tangga level urut harga (atas = tertinggi) dengan posisi harga sekarang,
+    hanya `span` level terdekat di atas & di bawah harga
+    """
+    labels, prices = zip(*key_levels(ind))
+    prices = np.asarray(prices, dtype=float)
+    order = np.argsort(prices)[::-1]
+    prices = prices[order]
+    labels = [labels[i] for i in order]
+    current = float(ind.current_price)
+
+    # Posisi harga di tangga (harga menurun -> cari di deret terbalik)
+    cut = len(prices) - int(np.searchsorted(prices[::-1], current))
+    above = range(max(cut - span, 0), cut)
+    below = range(cut, min(cut + span, len(prices)))
+
+    lines = [f"{labels[i]:<9}{prices[i]:>12.4f} {(prices[i] / current - 1) * 100:+6.2f}%" for i in above]
+    lines.append(f"{'▶ Harga':<9}{current:>12.4f}")
+    lines += [f"{labels[i]:<9}{prices[i]:>12.4f} {(prices[i] / current - 1) * 100:+6.2f}%" for i in below]
+    return lines
+
+
+# ========== FORMAT TELEGRAM ==========
+def format_lite_chart(symbol, market_type, frames):
+    """Chart teks (blok monospace Markdown): sparkline semua timeframe + tangga level timeframe entry"""
+    market_label = "SPOT" if market_type == 'spot' else "FUTURES"
+    entry = frames[-1]['ind']
+    lines = []
+    for frame in frames:
+        ind = frame['ind']
+        closes = ind.closes
+        change = (closes[-1] / closes[0] - 1) * 100 if len(closes) > 1 and closes[0] else 0.0
+        arrow = '▲' if change >= 0 else '▼'
+        lines.append(f"{frame['tf']:>4} {sparkline(closes)} {arrow}{abs(change):.2f}% RSI {ind.rsi:.0f}")
+    lines.append('')
+    lines += level_ladder(entry)
+
+    return (
+        f"📝 *{symbol} — Mode Lite* ({market_label})\n"
+        f"```\n" + "\n".join(lines) + "\n```\n"
+        f"_Level dari timeframe {frames[-1]['tf']} ({frames[-1]['role']}); /chart untuk ganti mode_"
+    )
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test sparkline + chart lite dari snapshot sintetis, bandingkan ukuran dengan PNG"""
+    import time
+    from indicators import calculate_indicators
+
+    rng = np.random.default_rng(5)
+    frames = []
+    for tf, role in (('15m', 'Trend'), ('5m', 'Entry')):
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, 100)))
+        opens = np.r_[closes[0], closes[:-1]]
+        candles = np.c_[np.arange(100) * 300_000, opens, np.maximum(opens, closes) * 1.001,
+                        np.minimum(opens, closes) * 0.999, closes, rng.random(100) * 100]
+        frames.append({'tf': tf, 'role': role, 'ind': calculate_indicators(candles)})
+
+    print("🧪 Testing Sparkline Module\n")
+    print("=" * 60)
+    print(sparkline([1, 2, 3, 4, 5, 6, 7, 8, 7, 5, 3, 1]))
+    print(sparkline([5, 5, 5]))
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        text = format_lite_chart('BTC/USDT', 'spot', frames)
+    print(f"Render lite: {(time.perf_counter() - started) * 1000:.1f} µs / call")
+    print(text)
+    print(f"Ukuran pesan: {len(text.encode())} byte (chart PNG ~400 KB)")
+    print("\n✅ Test completed!")
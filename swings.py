@@ -0,0 +1,194 @@
+"""
+Swings Module
+- Pivot fractal (high/low tertinggi/terendah di jendela ±k candle) via perbandingan jendela vectorized
+- Zigzag: pivot fractal dirapikan (selang-seling high/low, gerak minimal berbasis range candle)
+- Swing dominan per timeframe -> basis level Fibonacci (ganti max/min 20 candle terakhir)
+- Batch: level Fib + level terdekat untuk banyak symbol sekaligus (broadcast numpy)
+"""
+
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+FRACTAL_WINDOW = int(os.getenv('FRACTAL_WINDOW', '2'))      # k candle kiri & kanan
+ZIGZAG_MIN_PCT = float(os.getenv('ZIGZAG_MIN_PCT', '0.005'))  # gerak minimal 1 leg (fraksi harga)
+ZIGZAG_RANGE_MULT = 3.0      # ... atau kelipatan rata-rata range candle (mana yang lebih besar)
+DOMINANT_LOOKBACK_LEGS = 4   # leg terakhir yang dibandingkan untuk swing dominan
+FALLBACK_WINDOW = 20
+
+FIB_KEYS = ('0.000', '0.236', '0.382', '0.500', '0.618', '0.786', '1.000', '1.272', '1.618')
+FIB_RATIOS = np.array([float(k) for k in FIB_KEYS])
+
+
+# ========== PIVOT ==========
+def fractal_pivots(highs, lows, k=FRACTAL_WINDOW):
+    """
+    Mask pivot high / low (bentuk sama dengan input; 1D atau 2D baris = symbol).
+    Pivot = nilai ekstrem pertama di jendela ±k. k candle terakhir belum bisa dikonfirmasi
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    is_high = np.zeros(highs.shape, dtype=bool)
+    is_low = np.zeros(lows.shape, dtype=bool)
+    width = 2 * k + 1
+    if highs.shape[-1] < width:
+        return is_high, is_low
+    # argmax jendela == posisi tengah -> pivot (NaN di jendela = bukan pivot)
+    high_windows = sliding_window_view(highs, width, axis=-1)
+    low_windows = sliding_window_view(lows, width, axis=-1)
+    with np.errstate(invalid='ignore'):
+        is_high[..., k:-k] = (np.argmax(high_windows, axis=-1) == k) & ~np.isnan(high_windows).any(axis=-1)
+        is_low[..., k:-k] = (np.argmin(low_windows, axis=-1) == k) & ~np.isnan(low_windows).any(axis=-1)
+    return is_high, is_low
+
+
+def zigzag(highs, lows, k=FRACTAL_WINDOW, min_move=None):
+    """
+    Pivot zigzag 1 symbol: list (index, harga, tipe) tipe +1 high / -1 low, selang-seling.
+    Pivot berurutan setipe -> ambil yang paling ekstrem; leg lebih kecil dari min_move dibuang
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    if min_move is None:
+        avg_range = float(np.mean(highs[-50:] - lows[-50:])) if len(highs) else 0.0
+        min_move = max(ZIGZAG_MIN_PCT * float(highs[-1]), ZIGZAG_RANGE_MULT * avg_range) if len(highs) else 0.0
+
+    is_high, is_low = fractal_pivots(highs, lows, k)
+    idx = np.r_[np.flatnonzero(is_high), np.flatnonzero(is_low)]
+    kind = np.r_[np.ones(is_high.sum(), dtype=int), -np.ones(is_low.sum(), dtype=int)]
+    price = np.r_[highs[is_high], lows[is_low]]
+    order = np.lexsort((kind, idx))
+
+    # Loop hanya atas pivot (beberapa lusin), bukan atas candle
+    pivots = []
+    for i, t, p in zip(idx[order].tolist(), kind[order].tolist(), price[order].tolist()):
+        if pivots and pivots[-1][2] == t:
+            # Setipe: geser pivot ke yang lebih ekstrem
+            if (t == 1 and p > pivots[-1][1]) or (t == -1 and p < pivots[-1][1]):
+                pivots[-1] = (i, p, t)
+        elif not pivots or abs(p - pivots[-1][1]) >= min_move:
+            pivots.append((i, p, t))
+
+    # Awal history belum bisa jadi fractal: ekstrem sebelum pivot pertama jadi titik awal leg pertama
+    if pivots and pivots[0][0] > 0:
+        first, _, first_kind = pivots[0]
+        if first_kind == 1:
+            i = int(np.argmin(lows[:first]))
+            start = (i, float(lows[i]), -1)
+        else:
+            i = int(np.argmax(highs[:first]))
+            start = (i, float(highs[i]), 1)
+        if abs(start[1] - pivots[0][1]) >= min_move:
+            pivots.insert(0, start)
+    return pivots
+
+
+def dominant_swing(highs, lows, k=FRACTAL_WINDOW, lookback_legs=DOMINANT_LOOKBACK_LEGS):
+    """
+    Swing dominan: leg zigzag terbesar di antara `lookback_legs` leg terakhir,
+    diperpanjang ke ekstrem candle setelahnya (harga yang sudah menembus swing).
+    Return {'low', 'high', 'low_idx', 'high_idx', 'direction' (+1 naik / -1 turun)}
+    """
+    highs = np.asarray(highs, dtype=float)
+    lows = np.asarray(lows, dtype=float)
+    pivots = zigzag(highs, lows, k)
+    if len(pivots) < 2:
+        # History terlalu pendek / datar: fallback max/min jendela terakhir
+        window = slice(-FALLBACK_WINDOW, None)
+        high_idx = len(highs) - FALLBACK_WINDOW + int(np.argmax(highs[window])) if len(highs) >= FALLBACK_WINDOW else int(np.argmax(highs))
+        low_idx = len(lows) - FALLBACK_WINDOW + int(np.argmin(lows[window])) if len(lows) >= FALLBACK_WINDOW else int(np.argmin(lows))
+    else:
+        legs = list(zip(pivots[:-1], pivots[1:]))[-lookback_legs:]
+        start, end = max(legs, key=lambda leg: abs(leg[1][1] - leg[0][1]))
+        low_idx, high_idx = (start[0], end[0]) if start[2] == -1 else (end[0], start[0])
+        # Harga setelah swing menembus ujungnya -> ujung swing ikut bergeser
+        last = max(low_idx, high_idx)
+        if high_idx > low_idx and last + 1 < len(highs) and highs[last + 1:].max() > highs[high_idx]:
+            high_idx = last + 1 + int(np.argmax(highs[last + 1:]))
+        elif low_idx > high_idx and last + 1 < len(lows) and lows[last + 1:].min() < lows[low_idx]:
+            low_idx = last + 1 + int(np.argmin(lows[last + 1:]))
+
+    return {
+        'low': float(lows[low_idx]), 'high': float(highs[high_idx]),
+        'low_idx': int(low_idx), 'high_idx': int(high_idx),
+        'direction': 1 if high_idx > low_idx else -1,
+    }
+
+
+# ========== LEVEL FIB (BATCH) ==========
+def fib_matrix(swing_lows, swing_highs):
+    """Level Fib (urutan FIB_KEYS) untuk banyak symbol: shape (n, 9)"""
+    swing_lows = np.asarray(swing_lows, dtype=float)[..., None]
+    swing_highs = np.asarray(swing_highs, dtype=float)[..., None]
+    return swing_lows + (swing_highs - swing_lows) * FIB_RATIOS
+
+
+def nearest_levels(levels, prices):
+    """Index level terdekat + jarak (fraksi harga) per symbol"""
+    prices = np.asarray(prices, dtype=float)
+    distance = np.abs(levels - prices[..., None])
+    nearest = np.nanargmin(np.where(np.isnan(distance), np.inf, distance), axis=-1)
+    gap = np.take_along_axis(distance, nearest[..., None], axis=-1)[..., 0] / prices
+    return nearest, gap
+
+
+def swing_matrix(closes, k=FRACTAL_WINDOW * 2):
+    """
+    Swing per baris dari matriks close (n symbol x window), vectorized tanpa loop symbol:
+    pivot high & low terakhir per baris. Return (lows, highs, direction) — NaN kalau belum ada pivot
+    """
+    closes = np.asarray(closes, dtype=float)
+    is_high, is_low = fractal_pivots(closes, closes, k)
+    cols = np.arange(closes.shape[1])
+    last_high = np.where(is_high, cols, -1).max(axis=1)
+    last_low = np.where(is_low, cols, -1).max(axis=1)
+    rows = np.arange(closes.shape[0])
+    valid = (last_high >= 0) & (last_low >= 0)
+    highs = np.where(valid, closes[rows, np.maximum(last_high, 0)], np.nan)
+    lows = np.where(valid, closes[rows, np.maximum(last_low, 0)], np.nan)
+    direction = np.where(last_high > last_low, 1, -1)
+    return lows, highs, direction
+
+
+def scan_fib_zones(symbols, closes, prices, keys=('0.618',), tolerance=0.005):
+    """Symbol yang harganya dekat level Fib tertentu (swing terakhir). Return list (symbol, key, gap, arah)"""
+    lows, highs, direction = swing_matrix(closes)
+    levels = fib_matrix(lows, highs)
+    nearest, gap = nearest_levels(levels, prices)
+    wanted = np.isin(nearest, [FIB_KEYS.index(k) for k in keys])
+    hits = np.flatnonzero(wanted & (gap <= tolerance) & np.isfinite(gap))
+    hits = hits[np.argsort(gap[hits])]
+    return [(symbols[i], FIB_KEYS[nearest[i]], float(gap[i]), int(direction[i])) for i in hits]
+
+
+# ========== TEST FUNCTION ==========
+if __name__ == '__main__':
+    """Test swing dominan (data sintetis) + benchmark batch 400 symbol"""
+    import time
+
+    rng = np.random.default_rng(11)
+    # Naik 100 -> 130, koreksi ke 118, noise kecil
+    path = np.r_[np.linspace(100, 130, 60), np.linspace(130, 118, 40)] + rng.normal(0, 0.3, 100)
+    highs, lows = path + 0.4, path - 0.4
+
+    print("🧪 Testing Swings Module\n")
+    print("=" * 60)
+    started = time.perf_counter()
+    for _ in range(1000):
+        swing = dominant_swing(highs, lows)
+    print(f"Swing dominan: {swing} | {(time.perf_counter() - started):.3f} ms / call")
+    print(f"Lama (max/min 20): low {lows[-20:].min():.2f} high {highs[-20:].max():.2f}")
+    levels = fib_matrix(swing['low'], swing['high'])
+    print("Fib:", dict(zip(FIB_KEYS, np.round(levels, 2).tolist())))
+    assert swing['direction'] == 1 and swing['high'] > 128 and swing['low'] < 102
+
+    n, window = 400, 60
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n, window)), axis=1))
+    prices = closes[:, -1] * (1 + rng.normal(0, 0.002, n))
+    symbols = [f"C{i}/USDT" for i in range(n)]
+    started = time.perf_counter()
+    for _ in range(100):
+        zones = scan_fib_zones(symbols, closes, prices)
+    print(f"Batch {n} symbol: {(time.perf_counter() - started) * 10:.2f} ms | {len(zones)} dekat Fib 0.618")
+    print(zones[:5])
+    print("\n✅ Test completed!")
@@ -0,0 +1,148 @@
+"""
+Warm Cache Module
+- Hot pair: BTC/ETH/SOL + pair yang sering diminta + pair di menu Top Gainers/Losers/Volume
+- Hasil candle + indikator (opsional chart) per (symbol, market, profil) disimpan sampai candle entry berikutnya
+- Analisa untuk hot pair langsung pakai hasil ini (tanpa fetch exchange & hitung ulang)
+"""
+
+import os
+import time
+from candles import timeframe_to_ms
+
+BASE_HOT_PAIRS = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
+HOT_PAIR_LIMIT = int(os.getenv('HOT_PAIR_LIMIT', '20'))
+# Jumlah pair per menu top (sama dengan tombol di menu)
+HOT_MENU_TOP_N = 15
+# History request dihitung dalam jendela 1 jam
+REQUEST_HISTORY_TTL = 3600
+# Render chart juga untuk hot pair (CPU lebih berat, klik jadi instan)
+WARM_CHARTS = os.getenv('WARM_CHARTS', '0') == '1'
+# Jeda setelah candle close supaya candle baru sudah tersedia di Binance
+CANDLE_CLOSE_SETTLE = 2.0
+
+
+# ========== HISTORY REQUEST ==========
+def record_request(state, symbol, market_type, profile):
+    """Catat 1 request analisa (shared antar worker lewat state backend)"""
+    state.incr(f"hits:{market_type}:{profile}:{symbol}", ttl=REQUEST_HISTORY_TTL)
+
+
+def request_history(state):
+    """List (count, market_type, profile, symbol), paling sering diminta dulu"""
+    history = []
+    for key in state.keys('hits:'):
+        _, market_type, profile, symbol = key.split(':', 3)
+        raw = state.get(key)
+        if raw is not None:
+            history.append((int(raw), market_type, profile, symbol))
+    history.sort(reverse=True)
+    return history
+
+
+# ========== PILIH HOT PAIR ==========
+def _menu_pairs(snapshot, top_n=HOT_MENU_TOP_N):
+    """Pair dari menu Top Volume / Gainers / Losers (filter sama dengan get_top_*), diselang-seling"""
+    usdt = {k: v for k, v in snapshot.items() if '/USDT' in k}
+    by_volume = sorted(
+        (k for k, v in usdt.items() if v.get('quoteVolume') is not None),
+        key=lambda k: usdt[k]['quoteVolume'], reverse=True
+    )[:top_n]
+    by_change = sorted((k for k, v in usdt.items() if v.get('percentage') is not None),
+                       key=lambda k: usdt[k]['percentage'])
+    gainers = by_change[::-1][:top_n]
+    losers = by_change[:top_n]
+
+    ordered = []
+    for group in zip(by_volume, gainers, losers):
+        ordered.extend(group)
+    for rest in (by_volume, gainers, losers):
+        ordered.extend(rest)
+    return ordered
+
+
+def pick_hot_pairs(snapshots, history, default_profile, limit=HOT_PAIR_LIMIT):
+    """
+    Hot pair berurutan prioritas: history request -> BTC/ETH/SOL -> menu top per market.
+    snapshots: {market_type: snapshot ticker}. Return list (symbol, market_type, profile) unik
+    """
+    picked = []
+    seen = set()
+
+    def add(symbol, market_type, profile):
+        key = (symbol, market_type, profile)
+        if key not in seen and len(picked) < limit:
+            seen.add(key)
+            picked.append(key)
+
+    for _, market_type, profile, symbol in history:
+        add(symbol, market_type, profile)
+    for symbol in BASE_HOT_PAIRS:
+        add(symbol, 'spot', default_profile)
+
+    menus = {market_type: _menu_pairs(snapshot) for market_type, snapshot in snapshots.items() if snapshot}
+    for rank in range(max((len(pairs) for pairs in menus.values()), default=0)):
+        for market_type, pairs in menus.items():
+            if rank < len(pairs):
+                add(pairs[rank], market_type, default_profile)
+    return picked
+
+
+# ========== JADWAL CANDLE CLOSE ==========
+def candle_open_time(timeframe, now=None):
+    """Open time (ms) candle yang sedang berjalan"""
+    tf_ms = timeframe_to_ms(timeframe)
+    now_ms = int((now if now is not None else time.time()) * 1000)
+    return now_ms // tf_ms * tf_ms
+
+
+def seconds_until_close(timeframe, now=None):
+    """Detik sampai candle timeframe ini close (+ jeda settle)"""
+    now = now if now is not None else time.time()
+    close_ms = candle_open_time(timeframe, now) + timeframe_to_ms(timeframe)
+    return close_ms / 1000 - now + CANDLE_CLOSE_SETTLE
+
+
+# ========== CACHE HASIL ==========
+class WarmCache:
+    """
+    Hasil siap pakai per (symbol, market_type, profile):
+    {'frames', 'candle_time' (open time candle entry), 'chart_path', 'built_at'}.
+    Dipakai hanya selama candle entry yang sama masih berjalan
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def put(self, symbol, market_type, profile, frames, entry_tf, chart_path=None):
+        key = (symbol, market_type, profile)
+        old = self.entries.get(key)
+        self.entries[key] = {
+            'frames': frames,
+            'entry_tf': entry_tf,
+            'candle_time': candle_open_time(entry_tf),
+            'chart_path': chart_path,
+            'built_at': time.time(),
+        }
+        if old and old.get('chart_path') and old['chart_path'] != chart_path:
+            _remove_file(old['chart_path'])
+
+    def get_fresh(self, symbol, market_type, profile):
+        """Entry kalau masih di candle entry yang sama, selain itu None"""
+        entry = self.entries.get((symbol, market_type, profile))
+        if entry and entry['candle_time'] == candle_open_time(entry['entry_tf']):
+            return entry
+        return None
+
+    def prune(self, keep):
+        """Buang pair yang tidak lagi hot (beserta file chart-nya)"""
+        for key in [k for k in self.entries if k not in keep]:
+            entry = self.entries.pop(key)
+            if entry.get('chart_path'):
+                _remove_file(entry['chart_path'])
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass